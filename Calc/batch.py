@@ -0,0 +1,90 @@
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+from multiprocessing import Pool
+from expression import evaluate_text
+from units import convert_units
+
+# "5 km to mi" or "2*3.5 ft to m": a value, which may be an expression, and two unit names
+CONVERSION = re.compile(r'^(.+?)\s+([A-Za-z]+)\s+to\s+([A-Za-z]+)$')
+FORMATS = ['csv', 'jsonl']
+
+
+def evaluate_line(line, precision=None):
+    """Evaluate one expression or unit conversion line; return (result, error), one of them None."""
+    try:
+        match = CONVERSION.match(line)
+        if match:
+            value, from_unit, to_unit = match.groups()
+            return convert_units(evaluate_text(value), from_unit, to_unit), None
+        return evaluate_text(line, precision), None
+    except Exception as error:
+        return None, f"{type(error).__name__}: {error}"
+
+
+def _evaluate_task(task):
+    line, precision = task
+    return (line, *evaluate_line(line, precision))
+
+
+def evaluate_lines(lines, precision=None, workers=1, chunksize=16):
+    """Yield (line, result, error) for each line in input order, skipping blanks and # comments.
+
+    With more than one worker the lines go to a process pool in chunks; imap reads the input
+    only as fast as the workers take it, so a large file or an endless stdin is streamed.
+    """
+    tasks = ((line, precision) for line in (line.strip() for line in lines)
+             if line and not line.startswith('#'))
+    if workers <= 1:
+        yield from map(_evaluate_task, tasks)
+        return
+    with Pool(workers) as pool:
+        yield from pool.imap(_evaluate_task, tasks, chunksize)
+
+
+def write_results(results, output, output_format):
+    """Write (line, result, error) rows as CSV with a header or as JSON lines; return the number of errors."""
+    writer = csv.writer(output) if output_format == 'csv' else None
+    if writer:
+        writer.writerow(['input', 'result', 'error'])
+    failures = 0
+    for line, result, error in results:
+        failures += error is not None
+        if writer:
+            writer.writerow([line, result, error])
+        else:
+            output.write(json.dumps({'input': line, 'result': result, 'error': error}) + '\n')
+    return failures
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog='calc.py --batch',
+        description='Evaluate expressions and unit conversions such as "5 km to mi", one per line, without the GUI.')
+    parser.add_argument('input', nargs='?', help='Input file, standard input if omitted or -')
+    parser.add_argument('-o', '--output', help='Output file, standard output if omitted')
+    parser.add_argument('--format', choices=FORMATS, default='csv')
+    parser.add_argument('--precision', type=int, help='Evaluate in Precise mode with this many digits')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes, 1 to evaluate in-process')
+    parser.add_argument('--chunksize', type=int, default=16, help='Lines per worker task')
+    options = parser.parse_args(sys.argv[1:] if args is None else args)
+    if options.precision is not None and options.precision < 1:
+        parser.error("--precision must be at least 1")
+    source = sys.stdin if options.input in (None, '-') else open(options.input)
+    output = sys.stdout if options.output is None else open(options.output, 'w', newline='')
+    try:
+        results = evaluate_lines(source, options.precision, options.workers, options.chunksize)
+        failures = write_results(results, output, options.format)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,18 @@
+import sys
+
+if __name__ == "__main__" and '--batch' in sys.argv[1:]:
+    # Headless: hand off before the Tk and Matplotlib imports so batch runs need neither
+    import batch
+    sys.exit(batch.main([arg for arg in sys.argv[1:] if arg != '--batch']))
+
 import tkinter as tk
 from tkinter import messagebox, colorchooser
-import numpy as np
 import configparser
 import sqlite3
 from colors import get_colors
-import matplotlib.pyplot as plt
+from expression import evaluate_text
+from plotting import AdaptivePlot
+from units import convert_units
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 
@@ -58,6 +66,13 @@ class CalculatorApp:
         '1', '2', '3', '-', 'ln', 'log2', 'log10',
         '0', '.', '=', '+', '!', '(', ')'
     ]
+    # Text the function keys add to the expression: function names open their argument list,
+    # and the x**y style keys add the operator to apply to the number already entered
+    KEY_TEXT = {
+        'log': 'log(', 'exp': 'exp(', 'sqrt': 'sqrt(', 'pow': 'pow(',
+        'ln': 'ln(', 'log2': 'log2(', 'log10': 'log10(',
+        'x**2': '**2', 'x**3': '**3', 'x**y': '**', '1/x': '1/(', 'e**x': 'e**', '10**x': '10**'
+    }
     MODES = ['Basic', 'Trig', 'Units', 'Advanced']
     DEFAULT_DISPLAY_FONT = 'Courier New'
 
@@ -200,6 +215,8 @@ class CalculatorApp:
         self.display_font_size = self.settings.get('display_font_size', 18)
         self.console_font_size = self.settings.get('console_font_size', 12)
         self.theme = self.settings.get('color_theme', 'Dark')
+        self.precision_mode = self.settings.get('precision_mode', 'Float')
+        self.precision_digits = self.settings.get('precision_digits', 50)
 
         # Apply color theme
         self.colors = get_colors(self.theme)
@@ -211,6 +228,10 @@ class CalculatorApp:
         self.settings['display_font_size'] = str(self.display_font_size_var.get())
         self.settings['console_font_size'] = str(self.console_font_size_var.get())
         self.settings['color_theme'] = self.color_theme_var.get()
+        self.settings['precision_mode'] = self.precision_mode_var.get()
+        self.settings['precision_digits'] = str(self.precision_digits_var.get())
+        self.precision_mode = self.settings['precision_mode']
+        self.precision_digits = self.settings['precision_digits']
 
         with open('settings.ini', 'w') as configfile:
             self.config.write(configfile)
@@ -353,6 +374,7 @@ class CalculatorApp:
         self.figure = Figure(figsize=(5, 4), dpi=100)
         self.plot_canvas = FigureCanvasTkAgg(self.figure, master=self.root)
         self.plot_canvas.get_tk_widget().grid(row=0, column=4, rowspan=5, padx=20, pady=20, sticky='ns')
+        self.plot = AdaptivePlot(self.figure.add_subplot(111), self.plot_canvas)
 
     # Event handling methods
     def on_history_click(self, event):
@@ -438,16 +460,21 @@ class CalculatorApp:
         }
 
     # Mathematical operations
+    @property
+    def precision(self):
+        # Digits for Precise mode; None keeps floats
+        return int(self.precision_digits) if self.precision_mode == 'Precise' else None
+
     def evaluate_expression(self, key):
-        result = str(eval(self.expression))
+        result = evaluate_text(self.expression, self.precision)
         self.add_to_history(self.expression, result)
         self.expression = result
 
     def apply_function(self, key):
         if key in ['log', 'exp', 'sqrt', 'pow', 'x**2', 'x**3', 'x**y', '1/x', 'e**x', '10**x', 'ln', 'log2', 'log10', '!', '(', ')', ',']:
-            self.expression += key
+            self.expression += self.KEY_TEXT.get(key, key)
         else:
-            result = str(getattr(np, key)(eval(self.expression)))
+            result = evaluate_text(f"{key}({self.expression})", self.precision)
             self.add_to_history(f"{key}({self.expression})", result)
             self.expression = result
 
@@ -458,7 +485,7 @@ class CalculatorApp:
         elif self.expression[-3:] == " to":
             self.expression += f" {key}"
             value, unit = self.expression.split(" ")[0:2]
-            result = self.convert_units(value, unit, key)
+            result = convert_units(value, unit, key)
             self.add_to_history(self.expression, result)
             self.expression = result
         else:
@@ -467,126 +494,6 @@ class CalculatorApp:
             else:
                 self.expression = ""
 
-    def convert_units(self, value, from_unit, to_unit):
-        switcher = {
-            'mm': {
-                'cm': lambda x: x / 10,
-                'm': lambda x: x / 1000,
-                'km': lambda x: x / 1000000,
-                'in': lambda x: x / 25.4,
-                'ft': lambda x: x / 304.8,
-                'yd': lambda x: x / 914.4,
-                'mi': lambda x: x / 1609344
-            },
-            'cm': {
-                'mm': lambda x: x * 10,
-                'm': lambda x: x / 100,
-                'km': lambda x: x / 100000,
-                'in': lambda x: x / 2.54,
-                'ft': lambda x: x / 30.48,
-                'yd': lambda x: x / 91.44,
-                'mi': lambda x: x / 160934.4
-            },
-            'm': {
-                'mm': lambda x: x * 1000,
-                'cm': lambda x: x * 100,
-                'km': lambda x: x / 1000,
-                'in': lambda x: x * 39.37,
-                'ft': lambda x: x * 3.281,
-                'yd': lambda x: x * 1.094,
-                'mi': lambda x: x / 1609.344
-            },
-            'km': {
-                'mm': lambda x: x * 1000000,
-                'cm': lambda x: x * 100000,
-                'm': lambda x: x * 1000,
-                'in': lambda x: x * 39370.079,
-                'ft': lambda x: x * 3280.84,
-                'yd': lambda x: x * 1093.613,
-                'mi': lambda x: x / 1.609
-            },
-            'in': {
-                'mm': lambda x: x * 25.4,
-                'cm': lambda x: x * 2.54,
-                'm': lambda x: x / 39.37,
-                'km': lambda x: x / 39370.079,
-                'ft': lambda x: x / 12,
-                'yd': lambda x: x / 36,
-                'mi': lambda x: x / 63360
-            },
-            'ft': {
-                'mm': lambda x: x * 304.8,
-                'cm': lambda x: x * 30.48,
-                'm': lambda x: x / 3.281,
-                'km': lambda x: x / 3280.84,
-                'in': lambda x: x * 12,
-                'yd': lambda x: x / 3,
-                'mi': lambda x: x / 5280
-            },
-            'yd': {
-                'mm': lambda x: x * 914.4,
-                'cm': lambda x: x * 91.44,
-                'm': lambda x: x / 1.094,
-                'km': lambda x: x / 1093.613,
-                'in': lambda x: x * 36,
-                'ft': lambda x: x * 3,
-                'mi': lambda x: x / 1760
-            },
-            'mi': {
-                'mm': lambda x: x * 1609344,
-                'cm': lambda x: x * 160934.4,
-                'm': lambda x: x * 1609.344,
-                'km': lambda x: x * 1.609,
-                'in': lambda x: x * 63360,
-                'ft': lambda x: x * 5280,
-                'yd': lambda x: x * 1760
-            },
-            'mg': {
-                'g': lambda x: x / 1000,
-                'kg': lambda x: x / 1000000,
-                'ton': lambda x: x / 1000000000,
-                'oz': lambda x: x / 28349.523,
-                'lb': lambda x: x / 453592.37,
-            },
-            'g': {
-                'mg': lambda x: x * 1000,
-                'kg': lambda x: x / 1000,
-                'ton': lambda x: x / 1000000,
-                'oz': lambda x: x / 28.35,
-                'lb': lambda x: x / 453.592
-            },
-            'kg': {
-                'mg': lambda x: x * 1000000,
-                'g': lambda x: x * 1000,
-                'ton': lambda x: x / 1000,
-                'oz': lambda x: x * 35.274,
-                'lb': lambda x: x * 2.205
-            },
-            'ton': {
-                'mg': lambda x: x * 1000000000,
-                'g': lambda x: x * 1000000,
-                'kg': lambda x: x * 1000,
-                'oz': lambda x: x * 35273.962,
-                'lb': lambda x: x * 2204.623
-            },
-            'oz': {
-                'mg': lambda x: x * 28349.523,
-                'g': lambda x: x * 28.35,
-                'kg': lambda x: x / 35.274,
-                'ton': lambda x: x / 35273.962,
-                'lb': lambda x: x / 16
-            },
-            'lb': {
-                'mg': lambda x: x * 453592.37,
-                'g': lambda x: x * 453.592,
-                'kg': lambda x: x / 2.205,
-                'ton': lambda x: x / 2204.623,
-                'oz': lambda x: x * 16
-            }
-        }
-
-        return str(switcher[from_unit][to_unit](float(value)))
-
     # History management
     def add_to_history(self, expression, result):
         self.history_console.config(state='normal')
@@ -672,17 +579,27 @@ class CalculatorApp:
         tk.Entry(settings_window, textvariable=self.color_theme_var, font=(self.font, self.calc_font_size)
             ).grid(row=7, column=1, padx=10, pady=2, sticky='w')
 
-        tk.Button(settings_window, text="Save", command=self.save_settings).grid(row=8, column=0, columnspan=2, pady=20)
+        tk.Label(settings_window, text="Precision settings", font=(self.font, 16)
+            ).grid(row=8, column=0, columnspan=2, pady=10)
+
+        tk.Label(settings_window, text="Number Mode:", font=(self.font, self.calc_font_size)
+            ).grid(row=9, column=0, padx=10, pady=2, sticky='e')
+        self.precision_mode_var = tk.StringVar(value=self.precision_mode)
+        tk.OptionMenu(settings_window, self.precision_mode_var, 'Float', 'Precise'
+            ).grid(row=9, column=1, padx=10, pady=2, sticky='w')
+
+        tk.Label(settings_window, text="Precise Digits:", font=(self.font, self.calc_font_size)
+            ).grid(row=10, column=0, padx=10, pady=2, sticky='e')
+        self.precision_digits_var = tk.IntVar(value=self.precision_digits)
+        tk.Entry(settings_window, textvariable=self.precision_digits_var, font=(self.font, self.calc_font_size)
+            ).grid(row=10, column=1, padx=10, pady=2, sticky='w')
+
+        tk.Button(settings_window, text="Save", command=self.save_settings).grid(row=11, column=0, columnspan=2, pady=20)
 
     # Plotting
     def draw_plot(self):
         try:
-            x = np.linspace(-10, 10, 400)
-            y = eval(self.expression)
-            self.figure.clear()
-            ax = self.figure.add_subplot(111)
-            ax.plot(x, y)
-            self.plot_canvas.draw()
+            self.plot.set_expression(self.expression)
             self.add_to_history("Plotted", self.expression)
         except Exception as e:
             messagebox.showerror("Plot Error", f"Error plotting the function: {e}")
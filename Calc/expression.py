@@ -0,0 +1,294 @@
+import math
+import operator
+import re
+from functools import lru_cache
+import numpy as np
+import precise
+
+TOKEN = re.compile(r'\s*(?:(\d+\.?\d*(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?)|([A-Za-z_]\w*)|(\*\*|[-+*/%^(),!]))')
+CACHE_SIZE = 256
+# Exact integer results past these sizes would hang the UI, so they are refused or done in floats
+MAX_RESULT_BITS = 100000
+MAX_FACTORIAL = 5000
+# Float mode shows ints too long for str() rounded to the digits a float would show
+FLOAT_DIGITS = 17
+
+
+class ExpressionError(ValueError):
+    pass
+
+
+def power(base, exponent):
+    if isinstance(base, int) and isinstance(exponent, int) and exponent * base.bit_length() > MAX_RESULT_BITS:
+        return float(base) ** exponent
+    return base ** exponent
+
+
+def _gamma(value):
+    try:
+        return math.gamma(value)
+    except (ValueError, OverflowError):
+        # Poles and overflow become gaps in a plot instead of failing the whole curve
+        return math.nan
+
+
+def factorial(value):
+    """n! for whole numbers, gamma(n + 1) otherwise; arrays are handled element by element."""
+    if isinstance(value, np.ndarray):
+        return np.vectorize(lambda item: _gamma(item + 1), otypes=[float])(value)
+    if float(value).is_integer() and value >= 0:
+        if value > MAX_FACTORIAL:
+            raise ExpressionError(f"Factorial argument above {MAX_FACTORIAL}")
+        return math.factorial(int(value))
+    return math.gamma(value + 1)
+
+
+CONSTANTS = {'pi': lambda: math.pi, 'e': lambda: math.e}
+# numpy functions work on plain numbers and on arrays of x values alike
+FUNCTIONS = {
+    'sin': np.sin, 'cos': np.cos, 'tan': np.tan,
+    'asin': np.arcsin, 'acos': np.arccos, 'atan': np.arctan,
+    'sinh': np.sinh, 'cosh': np.cosh, 'tanh': np.tanh,
+    'asinh': np.arcsinh, 'acosh': np.arccosh, 'atanh': np.arctanh,
+    'exp': np.exp, 'sqrt': np.sqrt, 'abs': np.abs,
+    'ln': np.log, 'log': np.log, 'log2': np.log2, 'log10': np.log10,
+    'pow': power,
+}
+ARITY = {'pow': 2}
+BINARY = {'+': operator.add, '-': operator.sub, '*': operator.mul, '/': operator.truediv, '%': operator.mod,
+          '**': power, '^': power}
+
+
+def literal(text):
+    return float(text) if any(c in text for c in '.eE') else int(text)
+
+
+class Arithmetic:
+    """The number type an expression is built for: literals, constants, operators and functions."""
+
+    def __init__(self, literal, constants, functions, binary, negate, factorial):
+        self.literal = literal
+        self.constants = constants
+        self.functions = functions
+        self.binary = binary
+        self.negate = negate
+        self.factorial = factorial
+
+
+# Floats and NumPy arrays, for the calculator's default mode and for plotting
+FLOAT = Arithmetic(literal, CONSTANTS, FUNCTIONS, BINARY, operator.neg, factorial)
+# Exact ints and Fractions where possible, Decimals to a set number of digits otherwise
+PRECISE = Arithmetic(precise.literal, precise.CONSTANTS, precise.FUNCTIONS, precise.BINARY,
+                     precise.negate, precise.factorial)
+
+
+def tokenize(source):
+    tokens = []
+    position = 0
+    source = source.rstrip()
+    while position < len(source):
+        match = TOKEN.match(source, position)
+        if not match:
+            raise ExpressionError(f"Unexpected character {source[position:].strip()[:1]!r}")
+        number, name, symbol = match.groups()
+        if number is not None:
+            tokens.append(('number', number))
+        elif name is not None:
+            tokens.append(('name', name))
+        else:
+            tokens.append(('op', symbol))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive descent parser from tokens to a tuple AST.
+
+    Precedence from loosest: + -, * / % (and implicit multiplication as in 2x or 3(x+1)),
+    unary + -, ** and ^ (right associative), postfix !.
+    """
+
+    def __init__(self, tokens, variables):
+        self.tokens = tokens
+        self.index = 0
+        self.variables = variables
+
+    def peek(self):
+        return self.tokens[self.index] if self.index < len(self.tokens) else (None, None)
+
+    def take(self, symbol=None):
+        kind, value = self.peek()
+        if symbol is not None and value != symbol:
+            raise ExpressionError(f"Expected {symbol!r}" + (f" before {value!r}" if kind else " at the end"))
+        if kind is None:
+            raise ExpressionError("Unexpected end of expression")
+        self.index += 1
+        return kind, value
+
+    def parse(self):
+        node = self.sum()
+        if self.index < len(self.tokens):
+            raise ExpressionError(f"Unexpected {self.tokens[self.index][1]!r}")
+        return node
+
+    def sum(self):
+        node = self.product()
+        while self.peek()[1] in ('+', '-'):
+            symbol = self.take()[1]
+            node = ('binary', symbol, node, self.product())
+        return node
+
+    def product(self):
+        node = self.unary()
+        while True:
+            kind, value = self.peek()
+            if value in ('*', '/', '%'):
+                self.take()
+                node = ('binary', value, node, self.unary())
+            elif kind in ('number', 'name') or value == '(':
+                node = ('binary', '*', node, self.unary())
+            else:
+                return node
+
+    def unary(self):
+        if self.peek()[1] in ('+', '-'):
+            symbol = self.take()[1]
+            operand = self.unary()
+            return operand if symbol == '+' else ('negate', operand)
+        return self.power()
+
+    def power(self):
+        node = self.postfix()
+        if self.peek()[1] in ('**', '^'):
+            self.take()
+            node = ('binary', '**', node, self.unary())
+        return node
+
+    def postfix(self):
+        node = self.atom()
+        while self.peek()[1] == '!':
+            self.take()
+            node = ('factorial', node)
+        return node
+
+    def atom(self):
+        kind, value = self.take()
+        if kind == 'number':
+            return ('number', value)
+        if value == '(':
+            node = self.sum()
+            self.take(')')
+            return node
+        if kind == 'name':
+            if value in FUNCTIONS:
+                self.take('(')
+                arguments = [self.sum()]
+                while self.peek()[1] == ',':
+                    self.take()
+                    arguments.append(self.sum())
+                self.take(')')
+                if len(arguments) != ARITY.get(value, 1):
+                    raise ExpressionError(f"{value} takes {ARITY.get(value, 1)} argument(s)")
+                return ('call', value, arguments)
+            if value in self.variables:
+                return ('variable', value)
+            if value in CONSTANTS:
+                return ('constant', value)
+            raise ExpressionError(f"Unknown name {value!r}")
+        raise ExpressionError(f"Unexpected {value!r}")
+
+
+def _build(node, arithmetic):
+    """Turn an AST node into a closure that takes the dict of variable values."""
+    kind = node[0]
+    if kind in ('number', 'constant'):
+        value = arithmetic.literal(node[1]) if kind == 'number' else arithmetic.constants[node[1]]()
+        return lambda env: value
+    if kind == 'variable':
+        name = node[1]
+        return lambda env: env[name]
+    if kind == 'negate':
+        operand = _build(node[1], arithmetic)
+        negate = arithmetic.negate
+        return lambda env: negate(operand(env))
+    if kind == 'factorial':
+        operand = _build(node[1], arithmetic)
+        factorial = arithmetic.factorial
+        return lambda env: factorial(operand(env))
+    if kind == 'binary':
+        function = arithmetic.binary[node[1]]
+        left, right = _build(node[2], arithmetic), _build(node[3], arithmetic)
+        return lambda env: function(left(env), right(env))
+    function = arithmetic.functions[node[1]]
+    arguments = [_build(argument, arithmetic) for argument in node[2]]
+    if len(arguments) == 1:
+        argument = arguments[0]
+        return lambda env: function(argument(env))
+    return lambda env: function(*[argument(env) for argument in arguments])
+
+
+def _names(node):
+    """Return the variable names an AST node depends on."""
+    kind = node[0]
+    if kind in ('number', 'constant'):
+        return set()
+    if kind == 'variable':
+        return {node[1]}
+    if kind in ('negate', 'factorial'):
+        return _names(node[1])
+    if kind == 'binary':
+        return _names(node[2]) | _names(node[3])
+    return set().union(*(_names(argument) for argument in node[2]))
+
+
+class Expression:
+    """A compiled expression: parsed once, then called with variable values as often as needed.
+
+    With precision set it is built on exact and Decimal arithmetic and evaluated with that
+    many digits plus guard digits; otherwise on floats and NumPy arrays.
+    """
+
+    def __init__(self, source, variables=(), precision=None):
+        self.source = source
+        self.variables = tuple(variables)
+        self.precision = precision
+        self.tree = _Parser(tokenize(source), self.variables).parse()
+        # Names the expression really uses: a plot of an expression without x is a flat line
+        self.names = _names(self.tree)
+        if precision is None:
+            self.function = _build(self.tree, FLOAT)
+        else:
+            with precise.working_context(precision + precise.GUARD_DIGITS):
+                self.function = _build(self.tree, PRECISE)
+
+    def __call__(self, **variables):
+        if self.precision is None:
+            return self.function(variables)
+        with precise.working_context(self.precision + precise.GUARD_DIGITS):
+            return self.function(variables)
+
+    def __repr__(self):
+        return f"Expression({self.source!r})"
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_expression(source, variables=(), precision=None):
+    """Return the compiled Expression for source, reusing the last CACHE_SIZE compilations."""
+    if not source.strip():
+        raise ExpressionError("Empty expression")
+    return Expression(source, variables, precision)
+
+
+def evaluate(source, precision=None, **variables):
+    return compile_expression(source, tuple(sorted(variables)), precision)(**variables)
+
+
+def evaluate_text(source, precision=None):
+    """Evaluate source and return the result as the calculator shows it."""
+    result = evaluate(source, precision)
+    if precision is not None:
+        return precise.format_result(result, precision)
+    if isinstance(result, int):
+        # Exact up to precise.MAX_SHOWN_DIGITS; str() refuses ints past 4300 digits
+        return precise.format_result(result, FLOAT_DIGITS)
+    return str(result)
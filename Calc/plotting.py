@@ -0,0 +1,150 @@
+import math
+from collections import OrderedDict
+import numpy as np
+from expression import compile_expression
+
+# Each view is covered by about this many cached segments of the current zoom level
+SEGMENTS_PER_VIEW = 8
+INITIAL_SAMPLES = 32
+MAX_REFINEMENTS = 6
+# Refine where the second difference exceeds this share of the segment's y spread
+TOLERANCE = 1e-3
+CACHE_SEGMENTS = 512
+ZOOM_STEP = 1.25
+
+
+def vectorize(source):
+    """Compile source once into a function of a NumPy array of x values returning an array of y values."""
+    expression = compile_expression(source, ('x',))
+
+    def function(x):
+        with np.errstate(all='ignore'):
+            y = expression(x=x)
+        y = np.asarray(y, dtype=float)
+        if 'x' not in expression.names:
+            y = np.full_like(x, y)
+        return np.where(np.isfinite(y), y, np.nan)
+    return function
+
+
+def sample(function, start, stop, initial=INITIAL_SAMPLES, refinements=MAX_REFINEMENTS, tolerance=TOLERANCE):
+    """Sample function on [start, stop], adding points only where the curve bends or leaves its domain.
+
+    Each pass estimates curvature from second differences, then evaluates the midpoints of the
+    flagged intervals in one vectorized call and merges them in.
+    """
+    xs = np.linspace(start, stop, initial + 1)
+    ys = function(xs)
+    finite = ys[np.isfinite(ys)]
+    spread = max(float(finite.max() - finite.min()), 1e-12) if finite.size else 1.0
+    for _ in range(refinements):
+        flagged = np.zeros(len(xs) - 1, dtype=bool)
+        bend = np.abs(ys[:-2] - 2 * ys[1:-1] + ys[2:]) > tolerance * spread
+        flagged[:-1] |= bend
+        flagged[1:] |= bend
+        # An interval with one end outside the domain hides where the curve stops
+        flagged |= np.isnan(ys[:-1]) != np.isnan(ys[1:])
+        indexes = np.nonzero(flagged)[0]
+        if not indexes.size:
+            break
+        middles = (xs[indexes] + xs[indexes + 1]) / 2
+        xs = np.insert(xs, indexes + 1, middles)
+        ys = np.insert(ys, indexes + 1, function(middles))
+    return xs, ys
+
+
+class AdaptivePlot:
+    """One function plot on a Matplotlib axes, with scroll zoom and drag pan.
+
+    The x axis is split into segments whose width is a power of two chosen from the zoom, so
+    panning or zooming back reuses cached segments and only samples the newly visible ones.
+    The line is created once and updated with set_data.
+    """
+
+    def __init__(self, axes, canvas, xlim=(-10, 10)):
+        self.axes = axes
+        self.canvas = canvas
+        self.function = None
+        self.source = None
+        self.segments = OrderedDict()
+        self.xlim = xlim
+        self.drag = None
+        self.line, = axes.plot([], [])
+        axes.grid(True, alpha=0.3)
+        canvas.mpl_connect('scroll_event', self.on_scroll)
+        canvas.mpl_connect('button_press_event', self.on_press)
+        canvas.mpl_connect('motion_notify_event', self.on_motion)
+        canvas.mpl_connect('button_release_event', self.on_release)
+
+    def set_expression(self, source):
+        if source != self.source:
+            self.function = vectorize(source)
+            self.source = source
+            self.segments.clear()
+            self.axes.set_title(source)
+        self.update()
+
+    def segment(self, level, index):
+        key = (level, index)
+        if key in self.segments:
+            self.segments.move_to_end(key)
+            return self.segments[key]
+        width = 2.0 ** level
+        data = sample(self.function, index * width, (index + 1) * width)
+        self.segments[key] = data
+        if len(self.segments) > CACHE_SEGMENTS:
+            self.segments.popitem(last=False)
+        return data
+
+    def update(self):
+        if self.function is None:
+            return
+        start, stop = self.xlim
+        level = math.floor(math.log2((stop - start) / SEGMENTS_PER_VIEW))
+        width = 2.0 ** level
+        parts = [self.segment(level, index)
+                 for index in range(math.floor(start / width), math.floor(stop / width) + 1)]
+        xs = np.concatenate([part[0] for part in parts])
+        ys = np.concatenate([part[1] for part in parts])
+        self.line.set_data(xs, ys)
+        self.axes.set_xlim(start, stop)
+        self.axes.set_ylim(*self.y_range(ys[(xs >= start) & (xs <= stop)]))
+        self.canvas.draw_idle()
+
+    @staticmethod
+    def y_range(ys):
+        ys = ys[np.isfinite(ys)]
+        if not ys.size:
+            return -1, 1
+        low, high = float(ys.min()), float(ys.max())
+        inner_low, inner_high = np.percentile(ys, [2, 98])
+        # Near an asymptote the extremes would flatten the rest of the curve
+        if high - low > 10 * (inner_high - inner_low) > 0:
+            low, high = float(inner_low), float(inner_high)
+        margin = (high - low) * 0.05 or 1
+        return low - margin, high + margin
+
+    def zoom(self, factor, center):
+        start, stop = self.xlim
+        self.xlim = (center - (center - start) * factor, center + (stop - center) * factor)
+        self.update()
+
+    def on_scroll(self, event):
+        if event.inaxes is self.axes and event.xdata is not None:
+            self.zoom(1 / ZOOM_STEP if event.button == 'up' else ZOOM_STEP, event.xdata)
+
+    def on_press(self, event):
+        if event.inaxes is self.axes and event.button == 1:
+            self.drag = (event.x, self.xlim)
+
+    def on_motion(self, event):
+        if self.drag is None or event.x is None:
+            return
+        x, (start, stop) = self.drag
+        # Pixels to data units from the axes width, which is stable while the limits move
+        shift = (event.x - x) * (stop - start) / self.axes.bbox.width
+        self.xlim = (start - shift, stop - shift)
+        self.update()
+
+    def on_release(self, event):
+        self.drag = None
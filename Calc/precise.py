@@ -0,0 +1,357 @@
+import decimal
+import math
+import operator
+from decimal import Decimal
+from fractions import Fraction
+from functools import lru_cache
+
+# Extra working digits so the displayed digits are right after rounding
+GUARD_DIGITS = 10
+# Exact integer results are kept up to this many bits; past that they are rounded Decimals
+MAX_EXACT_BITS = 4000000
+# n! is exact up to here (math.factorial splits the product in halves and takes ~20ms);
+# larger and non-integer factorials use Stirling's series to the working precision
+EXACT_FACTORIAL_LIMIT = 20000
+# str() refuses ints longer than this many digits, so longer ones are shown rounded
+MAX_SHOWN_DIGITS = 4000
+
+
+def working_context(digits):
+    """A local Decimal context with digits of precision and room for exponents like 1000000!'s."""
+    return decimal.localcontext(decimal.Context(prec=digits, Emax=decimal.MAX_EMAX, Emin=decimal.MIN_EMIN))
+
+
+def literal(text):
+    """Exact value of a number literal: an int, or a Fraction for 0.1 so it stays 1/10."""
+    return Fraction(text) if any(c in text for c in '.eE') else int(text)
+
+
+def _exact(value):
+    return isinstance(value, (int, Fraction))
+
+
+def _normalize(value):
+    if isinstance(value, Fraction) and value.denominator == 1:
+        return value.numerator
+    return value
+
+
+def to_decimal(value):
+    """Convert to a Decimal rounded to the current precision.
+
+    Decimal(int) is quadratic in the length of the int, so huge ints are rounded from their
+    top bits times a power of two instead of being converted digit by digit.
+    """
+    if isinstance(value, Decimal):
+        return +value
+    if isinstance(value, Fraction):
+        return to_decimal(value.numerator) / to_decimal(value.denominator)
+    precision = decimal.getcontext().prec
+    shift = abs(value).bit_length() - 4 * precision - 64
+    if shift <= 0:
+        return +Decimal(value)
+    with decimal.localcontext() as context:
+        context.prec = precision + GUARD_DIGITS + len(str(shift))
+        result = Decimal(value >> shift) * Decimal(2) ** shift
+    return +result
+
+
+def _noise_floor(value, reference):
+    """0 if value is below the rounding error of an inexact reference, e.g. sin(pi) or sqrt(2)**2 - 2.
+
+    The working precision carries GUARD_DIGITS past the shown digits; a result smaller than the
+    reference's last shown digit is left over from rounding, not a real value.
+    """
+    if _exact(reference) or not value:
+        return value
+    reference = to_decimal(reference)
+    if not reference:
+        return value
+    digits = decimal.getcontext().prec - GUARD_DIGITS
+    return Decimal(0) if abs(value) < Decimal(1).scaleb(reference.adjusted() - digits) else value
+
+
+def _arithmetic(exact, inexact, cancels=False):
+    def function(a, b):
+        if _exact(a) and _exact(b):
+            return _normalize(exact(a, b))
+        result = inexact(to_decimal(a), to_decimal(b))
+        if cancels:
+            return _noise_floor(result, max(abs(to_decimal(a)), abs(to_decimal(b))))
+        return result
+    return function
+
+
+def divide(a, b):
+    if b == 0:
+        raise ZeroDivisionError("division by zero")
+    if _exact(a) and _exact(b):
+        return _normalize(Fraction(a) / b)
+    return to_decimal(a) / to_decimal(b)
+
+
+def power(base, exponent):
+    """Exact for whole exponents of exact bases (Python's int pow squares repeatedly), else Decimal."""
+    if _exact(exponent) and Fraction(exponent).denominator == 1:
+        exponent = int(exponent)
+        if _exact(base):
+            base = Fraction(base)
+            bits = max(base.numerator.bit_length(), base.denominator.bit_length())
+            if abs(exponent) * bits <= MAX_EXACT_BITS:
+                return _normalize(base ** exponent)
+        return to_decimal(base) ** exponent
+    base = to_decimal(base)
+    if base < 0:
+        raise ValueError("Negative base with a fractional exponent")
+    return base ** to_decimal(exponent)
+
+
+def negate(value):
+    return -value
+
+
+@lru_cache(maxsize=16)
+def _pi(precision):
+    # Series from the decimal module documentation, converging by about 1.5 digits a term
+    with decimal.localcontext() as context:
+        context.prec = precision + 2
+        three = Decimal(3)
+        last, total, term, n, na, d, da = 0, three, three, 1, 0, 0, 24
+        while total != last:
+            last = total
+            n, na = n + na, na + 8
+            d, da = d + da, da + 32
+            term = term * n / d
+            total += term
+    return +total
+
+
+def pi():
+    return +_pi(decimal.getcontext().prec)
+
+
+def e():
+    return Decimal(1).exp()
+
+
+@lru_cache(maxsize=None)
+def _bernoulli(count):
+    """Return B_2, B_4, ..., B_2count as Fractions (Akiyama-Tanigawa)."""
+    numbers = []
+    row = []
+    for m in range(2 * count + 1):
+        row.append(Fraction(1, m + 1))
+        for j in range(m, 0, -1):
+            row[j - 1] = j * (row[j - 1] - row[j])
+        if m >= 2 and m % 2 == 0:
+            numbers.append(row[0])
+    return tuple(numbers)
+
+
+def _log_factorial(z):
+    """ln(z!) for a Decimal z large enough that Stirling's series converges to the working precision."""
+    context = decimal.getcontext()
+    total = (z + Decimal('0.5')) * z.ln() - z + (2 * pi()).ln() / 2
+    epsilon = Decimal(10) ** (-context.prec - 2)
+    power = z
+    square = z * z
+    numbers = ()
+    k = 1
+    while True:
+        if k > len(numbers):
+            numbers = _bernoulli(2 * k)
+        term = to_decimal(numbers[k - 1] / (2 * k * (2 * k - 1))) / power
+        total += term
+        if abs(term) < epsilon:
+            return total
+        power *= square
+        k += 1
+
+
+def _stirling_factorial(z):
+    """z! to the working precision for any Decimal z that is not a negative integer."""
+    context = decimal.getcontext()
+    precision = context.prec
+    if z < 0 and z == z.to_integral_value():
+        raise ValueError("Factorial of a negative integer")
+    # The series needs z of about the working precision; smaller z are shifted up and divided back
+    target = max(precision, 20)
+    shift = max(0, int(target - z) + 1)
+    with decimal.localcontext() as working:
+        log_size = len(str(abs(int(z + shift)))) + 2
+        working.prec = precision + GUARD_DIGITS + log_size + len(str(shift))
+        shifted = z + shift
+        result = _log_factorial(shifted).exp()
+        divisor = Decimal(1)
+        for step in range(1, shift + 1):
+            divisor *= z + step
+        result /= divisor
+    return +result
+
+
+def factorial(value):
+    """Exact n! for whole n up to EXACT_FACTORIAL_LIMIT, else gamma(value + 1) from Stirling's series."""
+    if _exact(value) and Fraction(value).denominator == 1 and 0 <= value <= EXACT_FACTORIAL_LIMIT:
+        return math.factorial(int(value))
+    return _stirling_factorial(to_decimal(value))
+
+
+def _reduce_angle(x):
+    # Subtract whole turns with enough extra digits to keep the remainder's precision
+    context = decimal.getcontext()
+    with decimal.localcontext() as working:
+        working.prec = context.prec + max(0, x.adjusted()) + GUARD_DIGITS
+        turn = 2 * pi()
+        x = x - turn * (x / turn).to_integral_value()
+    return +x
+
+
+def sin(x):
+    argument = x
+    x = _reduce_angle(to_decimal(x))
+    with decimal.localcontext() as context:
+        context.prec += 2
+        i, last, total, factorial_term, number, sign = 1, 0, x, 1, x, 1
+        while total != last:
+            last = total
+            i += 2
+            factorial_term *= i * (i - 1)
+            number *= x * x
+            sign *= -1
+            total += number / factorial_term * sign
+    return _noise_floor(+total, argument)
+
+
+def cos(x):
+    argument = x
+    x = _reduce_angle(to_decimal(x))
+    with decimal.localcontext() as context:
+        context.prec += 2
+        i, last, total, factorial_term, number, sign = 0, 0, Decimal(1), 1, Decimal(1), 1
+        while total != last:
+            last = total
+            i += 2
+            factorial_term *= i * (i - 1)
+            number *= x * x
+            sign *= -1
+            total += number / factorial_term * sign
+    return _noise_floor(+total, argument)
+
+
+def tan(x):
+    return sin(x) / cos(x)
+
+
+def atan(x):
+    x = to_decimal(x)
+    with decimal.localcontext() as context:
+        context.prec += 4
+        # atan(x) = 2 atan(x / (1 + sqrt(1 + x^2))) until the series converges quickly
+        doublings = 0
+        while abs(x) > Decimal('0.1'):
+            x = x / (1 + (1 + x * x).sqrt())
+            doublings += 1
+        last, total, number, i = 0, x, x, 1
+        while total != last:
+            last = total
+            number *= -x * x
+            i += 2
+            total += number / i
+        total *= 2 ** doublings
+    return +total
+
+
+def asin(x):
+    x = to_decimal(x)
+    if abs(x) > 1:
+        raise ValueError("asin argument outside [-1, 1]")
+    if abs(x) == 1:
+        return pi() / 2 * x
+    return atan(x / (1 - x * x).sqrt())
+
+
+def acos(x):
+    return pi() / 2 - asin(x)
+
+
+def sinh(x):
+    exp = to_decimal(x).exp()
+    return (exp - 1 / exp) / 2
+
+
+def cosh(x):
+    exp = to_decimal(x).exp()
+    return (exp + 1 / exp) / 2
+
+
+def tanh(x):
+    exp = (2 * to_decimal(x)).exp()
+    return (exp - 1) / (exp + 1)
+
+
+def asinh(x):
+    x = to_decimal(x)
+    return (x + (x * x + 1).sqrt()).ln()
+
+
+def acosh(x):
+    x = to_decimal(x)
+    return (x + (x * x - 1).sqrt()).ln()
+
+
+def atanh(x):
+    x = to_decimal(x)
+    return ((1 + x) / (1 - x)).ln() / 2
+
+
+def ln(x):
+    return to_decimal(x).ln()
+
+
+def log2(x):
+    return to_decimal(x).ln() / Decimal(2).ln()
+
+
+def log10(x):
+    return to_decimal(x).log10()
+
+
+def sqrt(x):
+    return to_decimal(x).sqrt()
+
+
+def exp(x):
+    return to_decimal(x).exp()
+
+
+def absolute(x):
+    return abs(x)
+
+
+CONSTANTS = {'pi': pi, 'e': e}
+FUNCTIONS = {
+    'sin': sin, 'cos': cos, 'tan': tan, 'asin': asin, 'acos': acos, 'atan': atan,
+    'sinh': sinh, 'cosh': cosh, 'tanh': tanh, 'asinh': asinh, 'acosh': acosh, 'atanh': atanh,
+    'exp': exp, 'sqrt': sqrt, 'abs': absolute,
+    'ln': ln, 'log': ln, 'log2': log2, 'log10': log10,
+    'pow': power,
+}
+BINARY = {
+    '+': _arithmetic(operator.add, operator.add, cancels=True),
+    '-': _arithmetic(operator.sub, operator.sub, cancels=True),
+    '*': _arithmetic(operator.mul, operator.mul), '/': divide,
+    '%': _arithmetic(operator.mod, operator.mod), '**': power, '^': power,
+}
+
+
+def format_result(value, digits):
+    """Show a result with up to digits significant digits; exact ints are shown in full up to MAX_SHOWN_DIGITS."""
+    value = _normalize(value)
+    if isinstance(value, int) and abs(value).bit_length() * 0.30103 < MAX_SHOWN_DIGITS:
+        return str(value)
+    with working_context(digits):
+        # Rounding to digits first drops the guard digits before normalize strips trailing zeros
+        result = +to_decimal(value)
+        if result == result.to_integral_value() and 0 <= result.adjusted() < digits:
+            return str(result.quantize(Decimal(1)))
+        return str(result.normalize()) if result else '0'
@@ -0,0 +1,67 @@
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+try:
+    import numpy  # noqa: F401 - the expression engine needs it
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class BatchWithoutGuiTest(unittest.TestCase):
+    def setUp(self):
+        # Stand-in tkinter and matplotlib packages that fail on import, ahead of any real ones
+        self.blocked = tempfile.TemporaryDirectory()
+        for name in ('tkinter', 'matplotlib'):
+            package = os.path.join(self.blocked.name, name)
+            os.mkdir(package)
+            with open(os.path.join(package, '__init__.py'), 'w') as module:
+                module.write(f"raise ImportError('{name} is unavailable in this test')\n")
+
+    def tearDown(self):
+        self.blocked.cleanup()
+
+    def run_calc(self, *args, input_text):
+        environment = dict(os.environ)
+        environment['PYTHONPATH'] = os.pathsep.join(
+            [self.blocked.name] + [path for path in sys.path if path and path != HERE])
+        return subprocess.run([sys.executable, os.path.join(HERE, 'calc.py'), '--batch', *args],
+                              input=input_text, capture_output=True, text=True, cwd=HERE,
+                              env=environment, timeout=60)
+
+    def test_gui_modules_are_blocked(self):
+        completed = subprocess.run([sys.executable, '-c', 'import tkinter'], capture_output=True,
+                                   env={**os.environ, 'PYTHONPATH': self.blocked.name})
+        self.assertNotEqual(completed.returncode, 0)
+
+    def test_expressions_and_conversions(self):
+        completed = self.run_calc('--format', 'jsonl', '--workers', '1',
+                                  input_text="1+2\n# comment\n\n5 km to m\n10 km to kg\n")
+        self.assertEqual(completed.returncode, 1, completed.stderr)
+        rows = [json.loads(line) for line in completed.stdout.splitlines()]
+        self.assertEqual([row['input'] for row in rows], ['1+2', '5 km to m', '10 km to kg'])
+        self.assertEqual(rows[0]['result'], '3')
+        self.assertEqual(rows[1]['result'], '5000.0')
+        self.assertIsNone(rows[2]['result'])
+        self.assertIn('Cannot convert', rows[2]['error'])
+
+    def test_worker_pool_keeps_input_order(self):
+        lines = [f"{n}!" for n in range(1, 41)]
+        completed = self.run_calc('--workers', '2', '--chunksize', '3', '--precision', '60',
+                                  input_text='\n'.join(lines) + '\n')
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        rows = completed.stdout.splitlines()
+        self.assertEqual(rows[0], 'input,result,error')
+        self.assertEqual([row.split(',')[0] for row in rows[1:]], lines)
+        self.assertEqual(rows[-1], f"40!,{math.factorial(40)},")
+
+
+if __name__ == '__main__':
+    unittest.main()
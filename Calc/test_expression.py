@@ -0,0 +1,38 @@
+import math
+import unittest
+
+try:
+    import numpy  # noqa: F401 - the expression engine needs it
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    from expression import evaluate_text
+    from precise import MAX_SHOWN_DIGITS
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class FloatModeIntTextTest(unittest.TestCase):
+    def test_ints_within_the_shown_digits_are_exact(self):
+        self.assertEqual(evaluate_text('100!'), str(math.factorial(100)))
+        self.assertEqual(evaluate_text('2**64'), '18446744073709551616')
+
+    def test_ints_past_str_limit_are_shown_rounded(self):
+        # All of these are allowed by MAX_FACTORIAL and MAX_RESULT_BITS but longer than str() accepts
+        cases = {
+            '2000!': '3.3162750924506332E+5735',
+            '5000!': '4.2285779266055435E+16325',
+            '2**20000': '3.9802768403379666E+6020',
+            '10**5000': '1E+5000',
+        }
+        for source, text in cases.items():
+            with self.subTest(source=source):
+                self.assertEqual(evaluate_text(source), text)
+
+    def test_limit_is_the_shown_digits(self):
+        self.assertEqual(len(evaluate_text(f'10**{MAX_SHOWN_DIGITS - 2}')), MAX_SHOWN_DIGITS - 1)
+        self.assertEqual(evaluate_text(f'10**{MAX_SHOWN_DIGITS}'), f'1E+{MAX_SHOWN_DIGITS}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+# Length and mass conversions: CONVERSIONS[from_unit][to_unit] maps a value in from_unit to to_unit
+CONVERSIONS = {
+    'mm': {
+        'cm': lambda x: x / 10,
+        'm': lambda x: x / 1000,
+        'km': lambda x: x / 1000000,
+        'in': lambda x: x / 25.4,
+        'ft': lambda x: x / 304.8,
+        'yd': lambda x: x / 914.4,
+        'mi': lambda x: x / 1609344
+    },
+    'cm': {
+        'mm': lambda x: x * 10,
+        'm': lambda x: x / 100,
+        'km': lambda x: x / 100000,
+        'in': lambda x: x / 2.54,
+        'ft': lambda x: x / 30.48,
+        'yd': lambda x: x / 91.44,
+        'mi': lambda x: x / 160934.4
+    },
+    'm': {
+        'mm': lambda x: x * 1000,
+        'cm': lambda x: x * 100,
+        'km': lambda x: x / 1000,
+        'in': lambda x: x * 39.37,
+        'ft': lambda x: x * 3.281,
+        'yd': lambda x: x * 1.094,
+        'mi': lambda x: x / 1609.344
+    },
+    'km': {
+        'mm': lambda x: x * 1000000,
+        'cm': lambda x: x * 100000,
+        'm': lambda x: x * 1000,
+        'in': lambda x: x * 39370.079,
+        'ft': lambda x: x * 3280.84,
+        'yd': lambda x: x * 1093.613,
+        'mi': lambda x: x / 1.609
+    },
+    'in': {
+        'mm': lambda x: x * 25.4,
+        'cm': lambda x: x * 2.54,
+        'm': lambda x: x / 39.37,
+        'km': lambda x: x / 39370.079,
+        'ft': lambda x: x / 12,
+        'yd': lambda x: x / 36,
+        'mi': lambda x: x / 63360
+    },
+    'ft': {
+        'mm': lambda x: x * 304.8,
+        'cm': lambda x: x * 30.48,
+        'm': lambda x: x / 3.281,
+        'km': lambda x: x / 3280.84,
+        'in': lambda x: x * 12,
+        'yd': lambda x: x / 3,
+        'mi': lambda x: x / 5280
+    },
+    'yd': {
+        'mm': lambda x: x * 914.4,
+        'cm': lambda x: x * 91.44,
+        'm': lambda x: x / 1.094,
+        'km': lambda x: x / 1093.613,
+        'in': lambda x: x * 36,
+        'ft': lambda x: x * 3,
+        'mi': lambda x: x / 1760
+    },
+    'mi': {
+        'mm': lambda x: x * 1609344,
+        'cm': lambda x: x * 160934.4,
+        'm': lambda x: x * 1609.344,
+        'km': lambda x: x * 1.609,
+        'in': lambda x: x * 63360,
+        'ft': lambda x: x * 5280,
+        'yd': lambda x: x * 1760
+    },
+    'mg': {
+        'g': lambda x: x / 1000,
+        'kg': lambda x: x / 1000000,
+        'ton': lambda x: x / 1000000000,
+        'oz': lambda x: x / 28349.523,
+        'lb': lambda x: x / 453592.37,
+    },
+    'g': {
+        'mg': lambda x: x * 1000,
+        'kg': lambda x: x / 1000,
+        'ton': lambda x: x / 1000000,
+        'oz': lambda x: x / 28.35,
+        'lb': lambda x: x / 453.592
+    },
+    'kg': {
+        'mg': lambda x: x * 1000000,
+        'g': lambda x: x * 1000,
+        'ton': lambda x: x / 1000,
+        'oz': lambda x: x * 35.274,
+        'lb': lambda x: x * 2.205
+    },
+    'ton': {
+        'mg': lambda x: x * 1000000000,
+        'g': lambda x: x * 1000000,
+        'kg': lambda x: x * 1000,
+        'oz': lambda x: x * 35273.962,
+        'lb': lambda x: x * 2204.623
+    },
+    'oz': {
+        'mg': lambda x: x * 28349.523,
+        'g': lambda x: x * 28.35,
+        'kg': lambda x: x / 35.274,
+        'ton': lambda x: x / 35273.962,
+        'lb': lambda x: x / 16
+    },
+    'lb': {
+        'mg': lambda x: x * 453592.37,
+        'g': lambda x: x * 453.592,
+        'kg': lambda x: x / 2.205,
+        'ton': lambda x: x / 2204.623,
+        'oz': lambda x: x * 16
+    }
+}
+
+
+def convert_units(value, from_unit, to_unit):
+    """Convert value (a number or numeric string) and return the result as the calculator shows it."""
+    if from_unit not in CONVERSIONS:
+        raise ValueError(f"Unknown unit {from_unit!r}")
+    if to_unit not in CONVERSIONS[from_unit]:
+        raise ValueError(f"Cannot convert {from_unit} to {to_unit}")
+    return str(CONVERSIONS[from_unit][to_unit](float(value)))
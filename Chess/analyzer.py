@@ -0,0 +1,233 @@
+import argparse
+import glob
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from multiprocessing import Pool
+from bitboard import Position, START_FEN, WHITE, QUEEN, KING, parse_square
+from engine import Search, MATE
+from movegen import generate_legal_moves, in_check, make_move, move_from, move_to, move_to_uci, promotion_type
+
+# Chess log: "Turn 3: WP from E7 to E5" with ranks counted from the top of the board as printed
+TEXT_MOVE = re.compile(r'Turn \d+: \S* ?from ([A-H])(\d) to ([A-H])(\d)')
+# Kivy log: "Turn 3: Moving WP from (1, 4) to (3, 4)" with (row, column) board indices
+KIVY_MOVE = re.compile(r'Turn \d+: Moving .*from \((\d), (\d)\) to \((\d), (\d)\)')
+TIME_TAKEN = re.compile(r'Time taken: ([\d.]+) seconds')
+GAME_START = ('Game started', 'New game started')
+# Mate scores are capped so one missed mate does not swamp a game's averages
+SCORE_CAP = 2000
+
+
+def _text_square(letter, digit):
+    return (8 - int(digit)) * 8 + ord(letter) - ord('A')
+
+
+def parse_text_log(path):
+    """Yield the games in a chess or Kivy text log, each as a dict of (from, to) square pairs and times."""
+    game = None
+    index = 0
+    with open(path, 'r', errors='replace') as f:
+        for line in f:
+            if line.startswith(GAME_START) or game is None:
+                if game and game['moves']:
+                    yield game
+                    index += 1
+                game = {'source': path, 'game': index, 'start_fen': START_FEN, 'moves': [], 'times': []}
+            match = TEXT_MOVE.match(line)
+            if match:
+                game['moves'].append((_text_square(*match.group(1, 2)), _text_square(*match.group(3, 4))))
+                game['times'].append(None)
+                continue
+            match = KIVY_MOVE.match(line)
+            if match:
+                from_row, from_col, to_row, to_col = map(int, match.groups())
+                game['moves'].append((from_row * 8 + from_col, to_row * 8 + to_col))
+                game['times'].append(None)
+                continue
+            match = TIME_TAKEN.match(line)
+            if match and game['times']:
+                game['times'][-1] = float(match.group(1))
+    if game and game['moves']:
+        yield game
+
+
+def _uci_pairs(moves):
+    return [(parse_square(text[:2]), parse_square(text[2:4])) for text in moves]
+
+
+def parse_json_games(path):
+    """Yield the games in a save slot snapshot, a legacy saved_game.json or a self-play JSONL file."""
+    with open(path, 'r') as f:
+        if path.endswith('.jsonl'):
+            for index, line in enumerate(f):
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                start_fen = data['opening'] if '/' in data.get('opening', '') else START_FEN
+                yield {'source': path, 'game': data.get('game', index), 'start_fen': start_fen,
+                       'moves': _uci_pairs(data['moves']), 'times': [None] * len(data['moves'])}
+            return
+        data = json.load(f)
+    if 'start_fen' in data:
+        from save_slots import _unpack
+        moves = _unpack(data['moves'])
+        times = list(_unpack(data['times']))
+        yield {'source': path, 'game': 0, 'start_fen': data['start_fen'],
+               'moves': [(move_from(move), move_to(move)) for move in moves],
+               'times': [value / 100 for value in times] if len(times) == len(moves) else [None] * len(moves)}
+    elif 'board' in data:
+        # Old saves hold only the final board, so there is a position to score but no moves
+        pos = Position()
+        pos.set_board(data['board'], data.get('turn', 'W'))
+        yield {'source': path, 'game': 0, 'start_fen': pos.fen(), 'moves': [], 'times': []}
+
+
+def iter_games(patterns):
+    """Yield games lazily from files and glob patterns, so thousands of logs never sit in memory at once."""
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            if path.endswith(('.json', '.jsonl')):
+                yield from parse_json_games(path)
+            else:
+                yield from parse_text_log(path)
+
+
+_search = None
+_depth = 2
+
+
+def _init_worker(depth, hash_mb):
+    global _search, _depth
+    _search = Search(hash_mb=hash_mb)
+    _depth = depth
+
+
+def _score(pos, history):
+    """Return the search score of pos for the side to move, capped at SCORE_CAP."""
+    if not generate_legal_moves(pos):
+        score = -MATE if in_check(pos) else 0
+    else:
+        _search.search(pos, time_limit=0, max_depth=_depth, history=history)
+        score = _search.depth_times[-1][3]
+    return max(-SCORE_CAP, min(SCORE_CAP, score))
+
+
+def _legal_position(pos):
+    """Return True if both kings are on the board and the side that just moved is not in check."""
+    return bool(pos.pieces[KING] and pos.pieces[6 + KING]) and not in_check(pos, pos.side ^ 1)
+
+
+def _time_stats(times):
+    times = [value for value in times if value is not None]
+    if not times:
+        return None
+    return {'moves': len(times), 'mean': round(statistics.fmean(times), 2),
+            'median': round(statistics.median(times), 2), 'max': round(max(times), 2)}
+
+
+def analyze_game(game, blunder=300, mistake=100):
+    """Replay a parsed game, score every position and report evaluation swings, blunders and timing."""
+    start = time.perf_counter()
+    pos = Position(game['start_fen'])
+    white_first = pos.side == WHITE
+    history = [pos.key]
+    moves = []
+    times = {'W': [], 'B': []}
+    played = list(zip(game['moves'], game['times']))
+    skipped = 0
+    if _legal_position(pos):
+        scores = [_score(pos, history)]
+    else:
+        # Boards saved before moves were checked for legality can leave a king in check or missing
+        scores = []
+        skipped = len(played)
+        played = []
+    for (from_sq, to_sq), seconds in played:
+        candidates = [move for move in generate_legal_moves(pos) if move_from(move) == from_sq and move_to(move) == to_sq]
+        if not candidates:
+            # Older logs repeat entries or record raw moves; keep replaying from the last legal position
+            skipped += 1
+            continue
+        move = next((move for move in candidates if promotion_type(move) in (None, QUEEN)), candidates[0])
+        times['W' if pos.side == WHITE else 'B'].append(seconds)
+        moves.append(move_to_uci(move))
+        make_move(pos, move)
+        history.append(pos.key)
+        scores.append(_score(pos, history))
+    pos.undo.clear()
+
+    swings = []
+    blunders = []
+    mistakes = 0
+    losses = {'W': [], 'B': []}
+    for ply, text in enumerate(moves):
+        # Both scores are for the side to move, so the mover's loss is best score minus what the move kept
+        loss = max(0, scores[ply] + scores[ply + 1])
+        color = 'W' if (ply % 2 == 0) == white_first else 'B'
+        swings.append(loss)
+        losses[color].append(loss)
+        if loss >= blunder:
+            blunders.append({'ply': ply + 1, 'color': color, 'move': text, 'loss': loss})
+        elif loss >= mistake:
+            mistakes += 1
+    white_view = [score if (index % 2 == 0) == white_first else -score
+                  for index, score in enumerate(scores)]
+    return {
+        'source': game['source'],
+        'game': game['game'],
+        'moves': moves,
+        'skipped': skipped,
+        'evals': white_view,
+        'swings': swings,
+        'blunders': blunders,
+        'mistakes': mistakes,
+        'average_loss': {color: round(statistics.fmean(values), 1) if values else 0 for color, values in losses.items()},
+        'times': {color: _time_stats(values) for color, values in times.items()},
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+def _analyze_task(task):
+    game, blunder, mistake = task
+    return analyze_game(game, blunder, mistake)
+
+
+def analyze(patterns, output, workers=None, depth=2, hash_mb=16, blunder=300, mistake=100):
+    """Analyze every game found in patterns on a worker pool, writing one JSON report per game to output."""
+    tasks = ((game, blunder, mistake) for game in iter_games(patterns))
+    start = time.perf_counter()
+    games = moves = blunders = mistakes = skipped = 0
+    with open(output, 'w') as out, Pool(workers, initializer=_init_worker, initargs=(depth, hash_mb)) as pool:
+        for report in pool.imap_unordered(_analyze_task, tasks, chunksize=4):
+            out.write(json.dumps(report) + '\n')
+            games += 1
+            moves += len(report['moves'])
+            blunders += len(report['blunders'])
+            mistakes += report['mistakes']
+            skipped += report['skipped']
+            worst = max(report['blunders'], key=lambda entry: entry['loss'], default=None)
+            print(f"{report['source']}#{report['game']}: {len(report['moves'])} moves, "
+                  f"{len(report['blunders'])} blunders, {report['mistakes']} mistakes"
+                  + (f", worst {worst['move']} (-{worst['loss']})" if worst else ''))
+    elapsed = time.perf_counter() - start
+    print(f"{games} games, {moves} moves ({skipped} log entries skipped), {blunders} blunders, "
+          f"{mistakes} mistakes in {elapsed:.1f}s ({games / elapsed if elapsed else 0:.2f} games/s)")
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='main.py analyze', description='Analyze saved chess games and logs.')
+    parser.add_argument('paths', nargs='*', default=['game_log_*.txt'], help='Log, save or self-play files, or glob patterns')
+    parser.add_argument('--output', default='analysis.jsonl')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--depth', type=int, default=2, help='Search depth per position')
+    parser.add_argument('--blunder', type=int, default=300, help='Centipawn loss counted as a blunder')
+    parser.add_argument('--mistake', type=int, default=100, help='Centipawn loss counted as a mistake')
+    options = parser.parse_args(sys.argv[1:] if args is None else args)
+    analyze(options.paths, options.output, options.workers, options.depth,
+            blunder=options.blunder, mistake=options.mistake)
+
+if __name__ == "__main__":
+    main()
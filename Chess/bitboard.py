@@ -0,0 +1,221 @@
+import random
+
+WHITE, BLACK = 0, 1
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+# Piece indices: colour * 6 + type, so 'WP' is 0 and 'BK' is 11. EMPTY marks a free square.
+EMPTY = 12
+PIECE_NAMES = ['WP', 'WN', 'WB', 'WR', 'WQ', 'WK', 'BP', 'BN', 'BB', 'BR', 'BQ', 'BK', '  ']
+PIECE_INDEX = {name: index for index, name in enumerate(PIECE_NAMES)}
+FEN_CHARS = 'PNBRQKpnbrqk'
+
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+CASTLING_CHARS = 'KQkq'
+
+FULL = (1 << 64) - 1
+START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+# Zobrist keys, seeded so a position hashes the same in every process and run
+_random = random.Random(0x5EED)
+ZOBRIST_PIECES = [[_random.getrandbits(64) for _ in range(64)] for _ in range(12)]
+ZOBRIST_SIDE = _random.getrandbits(64)
+ZOBRIST_CASTLING = [_random.getrandbits(64) for _ in range(16)]
+ZOBRIST_EP = [_random.getrandbits(64) for _ in range(8)]
+
+
+def square(row, col):
+    """Return the 0-63 square index of a board (row, col); row 0 is White's back rank."""
+    return row * 8 + col
+
+
+def square_name(sq):
+    """Return the algebraic name of a square index, e.g. 4 -> 'e1'."""
+    return 'abcdefgh'[sq & 7] + str((sq >> 3) + 1)
+
+
+def parse_square(name):
+    """Return the square index of an algebraic name, e.g. 'e1' -> 4."""
+    return (int(name[1]) - 1) * 8 + ord(name[0].lower()) - ord('a')
+
+
+def iter_bits(mask):
+    """Yield the square index of every set bit in mask, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class Position:
+    """A chess position stored as twelve piece bitboards plus side, castling and en-passant state."""
+
+    __slots__ = ('pieces', 'occupied', 'mailbox', 'side', 'castling', 'ep', 'halfmove', 'fullmove', 'key', 'undo')
+
+    def __init__(self, fen=START_FEN):
+        self.set_fen(fen)
+
+    def clear(self):
+        """Remove every piece and reset the state to White to move with no rights."""
+        self.pieces = [0] * 12
+        self.occupied = [0, 0]
+        self.mailbox = [EMPTY] * 64
+        self.side = WHITE
+        self.castling = 0
+        self.ep = None
+        self.halfmove = 0
+        self.fullmove = 1
+        self.key = ZOBRIST_CASTLING[0]
+        self.undo = []
+
+    def copy(self):
+        """Return an independent copy of the position; moves made before the copy cannot be unmade on it."""
+        other = Position.__new__(Position)
+        other.pieces = self.pieces[:]
+        other.occupied = self.occupied[:]
+        other.mailbox = self.mailbox[:]
+        other.side = self.side
+        other.castling = self.castling
+        other.ep = self.ep
+        other.halfmove = self.halfmove
+        other.fullmove = self.fullmove
+        other.key = self.key
+        other.undo = []
+        return other
+
+    def piece_at(self, sq):
+        """Return the piece index on sq, or EMPTY."""
+        return self.mailbox[sq]
+
+    def put(self, piece, sq):
+        """Place piece on an empty square."""
+        bit = 1 << sq
+        self.pieces[piece] |= bit
+        self.occupied[piece // 6] |= bit
+        self.mailbox[sq] = piece
+        self.key ^= ZOBRIST_PIECES[piece][sq]
+
+    def remove(self, sq):
+        """Remove and return the piece on sq, or EMPTY if the square is free."""
+        piece = self.mailbox[sq]
+        if piece != EMPTY:
+            bit = 1 << sq
+            self.pieces[piece] ^= bit
+            self.occupied[piece // 6] ^= bit
+            self.mailbox[sq] = EMPTY
+            self.key ^= ZOBRIST_PIECES[piece][sq]
+        return piece
+
+    def move(self, from_sq, to_sq):
+        """Move the piece on from_sq to to_sq and return whatever stood on to_sq."""
+        captured = self.remove(to_sq)
+        piece = self.mailbox[from_sq]
+        from_to = (1 << from_sq) | (1 << to_sq)
+        self.pieces[piece] ^= from_to
+        self.occupied[piece // 6] ^= from_to
+        self.mailbox[from_sq] = EMPTY
+        self.mailbox[to_sq] = piece
+        self.key ^= ZOBRIST_PIECES[piece][from_sq] ^ ZOBRIST_PIECES[piece][to_sq]
+        return captured
+
+    def set_side(self, side):
+        """Set the side to move, keeping the Zobrist key in step."""
+        if side != self.side:
+            self.side = side
+            self.key ^= ZOBRIST_SIDE
+
+    def set_castling(self, castling):
+        """Set the castling rights, keeping the Zobrist key in step."""
+        self.key ^= ZOBRIST_CASTLING[self.castling] ^ ZOBRIST_CASTLING[castling]
+        self.castling = castling
+
+    def set_ep(self, ep):
+        """Set the en-passant square (or None), keeping the Zobrist key in step."""
+        if self.ep is not None:
+            self.key ^= ZOBRIST_EP[self.ep & 7]
+        if ep is not None:
+            self.key ^= ZOBRIST_EP[ep & 7]
+        self.ep = ep
+
+    def compute_key(self):
+        """Return the Zobrist key of the position computed from scratch."""
+        key = ZOBRIST_CASTLING[self.castling]
+        for sq, piece in enumerate(self.mailbox):
+            if piece != EMPTY:
+                key ^= ZOBRIST_PIECES[piece][sq]
+        if self.side == BLACK:
+            key ^= ZOBRIST_SIDE
+        if self.ep is not None:
+            key ^= ZOBRIST_EP[self.ep & 7]
+        return key
+
+    def to_board(self):
+        """Return the position as an 8x8 list of piece names such as 'WP' and '  '."""
+        names = [PIECE_NAMES[piece] for piece in self.mailbox]
+        return [names[row * 8:row * 8 + 8] for row in range(8)]
+
+    def set_board(self, board, turn='W'):
+        """Load an 8x8 list of piece names, inferring castling rights from the home squares."""
+        self.clear()
+        for row, cells in enumerate(board):
+            for col, cell in enumerate(cells):
+                piece = PIECE_INDEX.get(cell, EMPTY)
+                if piece != EMPTY:
+                    self.put(piece, square(row, col))
+        self.set_side(WHITE if turn == 'W' else BLACK)
+        rights = (
+            (WHITE_KINGSIDE, PIECE_INDEX['WK'], 4, PIECE_INDEX['WR'], 7),
+            (WHITE_QUEENSIDE, PIECE_INDEX['WK'], 4, PIECE_INDEX['WR'], 0),
+            (BLACK_KINGSIDE, PIECE_INDEX['BK'], 60, PIECE_INDEX['BR'], 63),
+            (BLACK_QUEENSIDE, PIECE_INDEX['BK'], 60, PIECE_INDEX['BR'], 56),
+        )
+        for right, king, king_sq, rook, rook_sq in rights:
+            if self.mailbox[king_sq] == king and self.mailbox[rook_sq] == rook:
+                self.set_castling(self.castling | right)
+
+    def set_fen(self, fen):
+        """Load a position from a FEN string."""
+        self.clear()
+        fields = fen.split()
+        placement = fields[0]
+        for rank_index, rank in enumerate(placement.split('/')):
+            row = 7 - rank_index
+            col = 0
+            for char in rank:
+                if char.isdigit():
+                    col += int(char)
+                else:
+                    self.put(FEN_CHARS.index(char), square(row, col))
+                    col += 1
+        self.set_side(WHITE if len(fields) < 2 or fields[1] == 'w' else BLACK)
+        if len(fields) > 2 and fields[2] != '-':
+            for char in fields[2]:
+                self.set_castling(self.castling | 1 << CASTLING_CHARS.index(char))
+        if len(fields) > 3 and fields[3] != '-':
+            self.set_ep(parse_square(fields[3]))
+        if len(fields) > 4:
+            self.halfmove = int(fields[4])
+        if len(fields) > 5:
+            self.fullmove = int(fields[5])
+
+    def fen(self):
+        """Return the position as a FEN string."""
+        ranks = []
+        for row in range(7, -1, -1):
+            rank = ''
+            empty = 0
+            for col in range(8):
+                piece = self.mailbox[square(row, col)]
+                if piece == EMPTY:
+                    empty += 1
+                    continue
+                if empty:
+                    rank += str(empty)
+                    empty = 0
+                rank += FEN_CHARS[piece]
+            if empty:
+                rank += str(empty)
+            ranks.append(rank)
+        castling = ''.join(char for bit, char in enumerate(CASTLING_CHARS) if self.castling & (1 << bit)) or '-'
+        ep = square_name(self.ep) if self.ep is not None else '-'
+        side = 'w' if self.side == WHITE else 'b'
+        return f"{'/'.join(ranks)} {side} {castling} {ep} {self.halfmove} {self.fullmove}"
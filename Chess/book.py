@@ -0,0 +1,130 @@
+import argparse
+import json
+import mmap
+import os
+import random
+import struct
+import sys
+from bitboard import Position
+from movegen import generate_legal_moves, make_move, parse_uci
+
+# Polyglot entry layout: key, move, weight, learn; big-endian and sorted by key
+ENTRY = struct.Struct('>QHHI')
+DEFAULT_BOOK = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'book.bin')
+
+
+class OpeningBook:
+    """Read-only opening book: a memory-mapped file of 16-byte entries sorted by Zobrist key.
+
+    Opening the book maps the file without reading it; each lookup is a binary search.
+    """
+
+    def __init__(self, path=DEFAULT_BOOK, seed=None):
+        self.path = path
+        self.file = open(path, 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        self.count = size // ENTRY.size
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self.rng = random.Random(seed)
+
+    def __len__(self):
+        return self.count
+
+    def entries(self, key):
+        """Return the (move, weight) pairs stored for key."""
+        data = self.data
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if ENTRY.unpack_from(data, middle * ENTRY.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        found = []
+        while low < self.count:
+            entry_key, move, weight, _ = ENTRY.unpack_from(data, low * ENTRY.size)
+            if entry_key != key:
+                break
+            found.append((move, weight))
+            low += 1
+        return found
+
+    def choose(self, pos):
+        """Return a book move for pos picked at random by weight, or None when out of book."""
+        entries = self.entries(pos.key)
+        if not entries:
+            return None
+        # Guard against key collisions and stale books: only play moves that are legal here
+        legal = set(generate_legal_moves(pos))
+        entries = [(move, weight) for move, weight in entries if move in legal and weight]
+        if not entries:
+            return None
+        moves, weights = zip(*entries)
+        return self.rng.choices(moves, weights)[0]
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+
+def open_book(path=DEFAULT_BOOK, seed=None):
+    """Return the book at path, or None if it has not been built."""
+    if not os.path.exists(path):
+        return None
+    return OpeningBook(path, seed)
+
+
+def build_book(lines, path=DEFAULT_BOOK, max_plies=20):
+    """Write a book from opening lines in long algebraic form; a move's weight is how often it was played.
+
+    Returns the number of entries written.
+    """
+    counts = {}
+    for line in lines:
+        pos = Position()
+        for text in line.split()[:max_plies]:
+            move = parse_uci(pos, text)
+            if move is None:
+                break
+            counts[pos.key, move] = counts.get((pos.key, move), 0) + 1
+            make_move(pos, move)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        for (key, move), count in sorted(counts.items()):
+            f.write(ENTRY.pack(key, move, min(count, 0xFFFF), 0))
+    os.replace(temp_path, path)
+    return len(counts)
+
+
+def read_lines(path):
+    """Yield move lines from a text file of openings or a self-play JSONL file, skipping FEN starts."""
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if path.endswith('.jsonl'):
+                game = json.loads(line)
+                if '/' not in game['opening']:
+                    yield ' '.join(game['moves'])
+            elif '/' not in line:
+                yield line
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='main.py book', description='Build the opening book.')
+    parser.add_argument('sources', nargs='*', help='Opening files or self-play .jsonl files (default: built-in openings)')
+    parser.add_argument('--output', default=DEFAULT_BOOK)
+    parser.add_argument('--plies', type=int, default=20, help='Book depth in plies')
+    options = parser.parse_args(sys.argv[1:] if args is None else args)
+    if options.sources:
+        lines = [line for source in options.sources for line in read_lines(source)]
+    else:
+        from selfplay import DEFAULT_OPENINGS
+        lines = DEFAULT_OPENINGS
+    count = build_book(lines, options.output, options.plies)
+    print(f"Wrote {count} entries from {len(lines)} lines to {options.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,140 +1,215 @@
 import time
+from game_log import GameLogger
+from game_record import GameRecord
+from bitboard import Position, WHITE, BLACK, EMPTY, PIECE_NAMES, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, square
+from movegen import (
+    generate_legal_moves, in_check, make_move, unmake_move, move_from, move_to, perft, promotion_type,
+)
 
 class Chess:
-    def __init__(self):
-        self.board = [ 
-            [ 'WR', 'WN', 'WB', 'WQ', 'WK', 'WB', 'WN', 'WR' ],
-            [ 'WP', 'WP', 'WP', 'WP', 'WP', 'WP', 'WP', 'WP' ],
-            [ '  ', '  ', '  ', '  ', '  ', '  ', '  ', '  ' ],
-            [ '  ', '  ', '  ', '  ', '  ', '  ', '  ', '  ' ],
-            [ '  ', '  ', '  ', '  ', '  ', '  ', '  ', '  ' ],
-            [ '  ', '  ', '  ', '  ', '  ', '  ', '  ', '  ' ],
-            [ 'BP', 'BP', 'BP', 'BP', 'BP', 'BP', 'BP', 'BP' ],
-            [ 'BR', 'BN', 'BB', 'BQ', 'BK', 'BB', 'BN', 'BR' ] 
-        ]
-        self.black_pieces = ['BR', 'BR', 'BN', 'BN', 'BB', 'BB', 'BQ', 'BK', 'BP', 'BP', 'BP', 'BP', 'BP', 'BP', 'BP', 'BP']
-        self.white_pieces = ['WR', 'WR', 'WN', 'WN', 'WB', 'WB', 'WQ', 'WK', 'WP', 'WP', 'WP', 'WP', 'WP', 'WP', 'WP', 'WP']
-        self.turn = 'W'
+    def __init__(self, log_file="chess_log.txt"):
+        self.position = Position()
+        self._board_view = None
+        self._turn = 'W'
+        self.key_history = [self.position.key]
+        self.move_stack = []
+        self.record = GameRecord()
         self.turns_played = 0
         self.start_time = time.time()
-        self.log_file = "chess_log.txt"
-        with open(self.log_file, 'w') as f:
-            f.write("Game started\n")
+        self.log_file = log_file
+        self.logger = None
+        if log_file:
+            self.logger = GameLogger(log_file)
+            self.logger.write("Game started\n")
+
+    @property
+    def board(self):
+        # 8x8 view of the bitboard position for the front ends, rebuilt only after a change
+        if self._board_view is None:
+            self._board_view = self.position.to_board()
+        return self._board_view
+
+    @board.setter
+    def board(self, board):
+        self.position.set_board(board, self.turn)
+        self._board_view = None
+        self.key_history = [self.position.key]
+        self.move_stack = []
+        self.record = GameRecord(self.position.fen())
+
+    def load_fen(self, fen):
+        self.position.set_fen(fen)
+        self._turn = 'W' if self.position.side == WHITE else 'B'
+        self._board_view = None
+        self.key_history = [self.position.key]
+        self.move_stack = []
+        self.record = GameRecord(self.position.fen())
+
+    def restore(self, fen, record):
+        """Set up the position from fen and continue the given record, as when loading a saved game."""
+        self.load_fen(fen)
+        self.record = record
+
+    @property
+    def white_pieces(self):
+        return self._piece_names(WHITE)
+
+    @property
+    def black_pieces(self):
+        return self._piece_names(BLACK)
+
+    def _piece_names(self, color):
+        # Counted from the bitboards, so captures, promotions and unmake never edit a list
+        pieces = self.position.pieces
+        names = []
+        for piece_type in (ROOK, KNIGHT, BISHOP, QUEEN, KING, PAWN):
+            piece = color * 6 + piece_type
+            names += [PIECE_NAMES[piece]] * pieces[piece].bit_count()
+        return names
+
+    @property
+    def turn(self):
+        # Player whose turn it is in the front ends; the position already flips its
+        # side to move inside move_piece, before the front end calls change_turn
+        return self._turn
+
+    @turn.setter
+    def turn(self, turn):
+        self._turn = turn
+        self.position.set_side(WHITE if turn == 'W' else BLACK)
+        self.key_history[-1] = self.position.key
+        if not len(self.record):
+            self.record = GameRecord(self.position.fen())
+
+    @property
+    def key(self):
+        """Zobrist key of the current position."""
+        return self.position.key
 
     def notation_to_index(self, notation):
         col = ord(notation[0].lower()) - ord('a')
         row = 8 - int(notation[1])
         return row, col
 
-    def move_piece(self, from_square, to_square):
+    def generate_legal_moves(self):
+        return generate_legal_moves(self.position)
+
+    def find_move(self, from_square, to_square, promotion=QUEEN):
+        from_sq = square(*from_square)
+        to_sq = square(*to_square)
+        for move in self.generate_legal_moves():
+            if move_from(move) == from_sq and move_to(move) == to_sq and promotion_type(move) in (None, promotion):
+                return move
+        return None
+
+    def move_to_squares(self, move):
+        return divmod(move_from(move), 8), divmod(move_to(move), 8)
+
+    def perft(self, depth):
+        return perft(self.position, depth)
+
+    def move_piece(self, from_square, to_square, promotion=QUEEN):
         from_row, from_col = from_square
         to_row, to_col = to_square
-        self.eat_piece(from_square, to_square)
-        self.board[to_row][to_col] = self.board[from_row][from_col]
-        self.board[from_row][from_col] = '  '
+        move = self.find_move(from_square, to_square, promotion)
+        if move is None:
+            self.position.move(square(from_row, from_col), square(to_row, to_col))
+            self._board_view = None
+            self.key_history.append(self.position.key)
+        else:
+            self.make_move(move)
+            self.record.append(move, time.time() - self.start_time)
         self.log_action(from_square, to_square)
         self.turns_played += 1
         self.start_time = time.time()
 
+    def make_move(self, move):
+        # Unlike move_piece this neither logs nor touches turn, so it is cheap enough for analysis
+        make_move(self.position, move)
+        self.move_stack.append(move)
+        self.key_history.append(self.position.key)
+        self._board_view = None
+
+    def unmake_move(self):
+        move = self.move_stack.pop()
+        unmake_move(self.position, move)
+        self.key_history.pop()
+        self._board_view = None
+        return move
+
     def is_valid_move(self, from_square, to_square):
-        from_row, from_col = from_square
-        piece = self.board[from_row][from_col]
-        if piece == '  ' or piece[0] != self.turn or from_square == to_square or not self.is_within_bounds(*to_square):
+        if not self.is_within_bounds(*from_square) or not self.is_within_bounds(*to_square):
             return False
-        
-        piece_type = piece[1]
-        move_validators = {
-            'P': self.is_valid_pawn_move,
-            'R': self.is_valid_rook_move,
-            'N': self.is_valid_knight_move,
-            'B': self.is_valid_bishop_move,
-            'Q': self.is_valid_queen_move,
-            'K': self.is_valid_king_move
-        }
-        if piece_type in move_validators:
-            return move_validators[piece_type](from_square, to_square)
-        return False
+        return self.find_move(from_square, to_square) is not None
     
     def is_within_bounds(self, row, col):
         return 0 <= row < 8 and 0 <= col < 8
 
     def is_capture(self, to_square):
-        to_row, to_col = to_square
-        target_piece = self.board[to_row][to_col]
-        return target_piece != '  ' and target_piece[0] != self.turn
-
-    def is_valid_pawn_move(self, from_square, to_square):
-        from_row, from_col = from_square
-        to_row, to_col = to_square
-        piece = self.board[from_row][from_col]
-        direction = 1 if piece[0] == 'W' else -1
-        if from_col == to_col:
-            if to_row - from_row == direction and not self.is_capture(to_square):
-                return True
-        elif abs(from_col - to_col) == 1:
-            if to_row - from_row == direction and self.is_capture(to_square):
-                return True
-        return False
-
-    def is_valid_rook_move(self, from_square, to_square):
-        from_row, from_col = from_square
-        to_row, to_col = to_square
-        return from_row == to_row or from_col == to_col
-
-    def is_valid_knight_move(self, from_square, to_square):
-        from_row, from_col = from_square
-        to_row, to_col = to_square
-        return (abs(from_row - to_row) == 2 and abs(from_col - to_col) == 1) or \
-                (abs(from_row - to_row) == 1 and abs(from_col - to_col) == 2)
-
-    def is_valid_bishop_move(self, from_square, to_square):
-        from_row, from_col = from_square
-        to_row, to_col = to_square
-        return abs(from_row - to_row) == abs(from_col - to_col)
-
-    def is_valid_queen_move(self, from_square, to_square):
-        return self.is_valid_rook_move(from_square, to_square) or self.is_valid_bishop_move(from_square, to_square)
-    
-    def is_valid_king_move(self, from_square, to_square):
-        from_row, from_col = from_square
-        to_row, to_col = to_square
-        return abs(from_row - to_row) <= 1 and abs(from_col - to_col) <= 1
+        return bool(self.position.occupied[self.position.side ^ 1] >> square(*to_square) & 1)
 
     def eat_piece(self, from_square, to_square):
-        to_row, to_col = to_square
-        target_piece = self.board[to_row][to_col]
-        if target_piece == '  ':
+        mailbox = self.position.mailbox
+        target_piece = mailbox[square(*to_square)]
+        if target_piece == EMPTY:
             return
-        from_row, from_col = from_square
-        piece = self.board[from_row][from_col]
-        if piece[0] != target_piece[0]:
-            if piece[0] == 'W':
-                self.black_pieces.remove(target_piece)
-            else:
-                self.white_pieces.remove(target_piece)
-            return target_piece
+        piece = mailbox[square(*from_square)]
+        if piece // 6 != target_piece // 6:
+            return PIECE_NAMES[target_piece]
         
     def change_turn(self):
         self.turn = 'W' if self.turn == 'B' else 'B'
         self.start_time = time.time()
 
     def log_action(self, from_square, to_square):
+        if self.logger is None:
+            return
         from_row, from_col = from_square
         to_row, to_col = to_square
-        piece = self.board[to_row][to_col]
+        piece = PIECE_NAMES[self.position.mailbox[square(to_row, to_col)]]
         action = f"{piece} from {chr(from_col + ord('A'))}{8 - from_row} to {chr(to_col + ord('A'))}{8 - to_row}"
-        with open(self.log_file, 'a') as f:
-            f.write(f"Turn {self.turns_played + 1}: {action}\n")
-            f.write(f"Time taken: {time.time() - self.start_time:.2f} seconds\n")
-            f.write(self.get_board_state())
+        # Boards are no longer dumped per move; record.board_at(ply) rebuilds any of them
+        self.logger.write(
+            f"Turn {self.turns_played + 1}: {action}\n"
+            f"Time taken: {time.time() - self.start_time:.2f} seconds\n"
+        )
+
+    def export_pgn(self, headers=None):
+        winner = self.check_winner()
+        if winner:
+            result = '1-0' if winner == 'W' else '0-1'
+        else:
+            result = '1/2-1/2' if self.check_draw() else '*'
+        return self.record.to_pgn(headers, result)
+
+    def save_record(self, path):
+        self.record.save(path)
+
+    def flush_log(self):
+        if self.logger is not None:
+            self.logger.flush()
+
+    def close(self):
+        if self.logger is not None:
+            self.logger.close()
 
     def get_board_state(self):
         state = "\n".join([" ".join(row) for row in self.board])
         return f"{state}\n\n"
 
     def check_winner(self):
-        if 'WK' not in self.white_pieces:
+        if not self.position.pieces[KING]:
             return 'B'
-        if 'BK' not in self.black_pieces:
+        if not self.position.pieces[6 + KING]:
             return 'W'
+        if not self.generate_legal_moves() and in_check(self.position):
+            return 'B' if self.position.side == WHITE else 'W'
         return None
+
+    def is_repetition(self, count=3):
+        return self.key_history.count(self.position.key) >= count
+
+    def check_draw(self):
+        if self.position.halfmove >= 100 or self.is_repetition():
+            return True
+        return not self.generate_legal_moves() and not in_check(self.position)
@@ -1,8 +1,18 @@
 from chess import Chess
+from engine import Search, Ponderer
+from book import open_book
+from tablebase import Tablebase
+from movegen import move_to_uci, promotion_type
+from bitboard import QUEEN
 
 class ChessCLI:
-    def __init__(self):
+    def __init__(self, ai_time_limit=2.0):
         self.chess = Chess()
+        self.ai = None
+        self.ponderer = None
+        self.ai_color = 'B'
+        self.ai_time_limit = ai_time_limit
+        self.last_move = None
 
     def print_board(self):
         print("    A  B  C  D  E  F  G  H")
@@ -16,7 +26,7 @@ class ChessCLI:
     def get_game_mode(self):
         print("Select game mode:")
         print("1. Player vs Player")
-        print("2. Player vs AI (not available)")
+        print("2. Player vs AI")
         return input("Enter 1 or 2: ")
 
     def get_move(self):
@@ -26,29 +36,54 @@ class ChessCLI:
         to_square = input("Enter to square (e.g., F7): ")
         return self.chess.notation_to_index(from_square), self.chess.notation_to_index(to_square)
 
+    def get_ai_move(self):
+        move = self.ponderer.finish(self.last_move, self.ai_time_limit)
+        if move is not None:
+            print(f"AI plays {move_to_uci(move)} (ponder hit, {self.ai.info()})")
+        else:
+            move = self.ai.search(self.chess.position, history=self.chess.key_history)
+            print(f"AI plays {move_to_uci(move)} ({self.ai.info()})")
+        from_square, to_square = self.chess.move_to_squares(move)
+        return from_square, to_square, promotion_type(move) or QUEEN
+
     def play(self):
         if self.get_user_input().lower() == 'exit':
             return
         game_mode = self.get_game_mode()
-        if game_mode != '1':
-            print("PvAI is not available at the moment. Exiting.")
+        if game_mode not in ['1', '2']:
+            print("Invalid game mode. Exiting.")
             return
+        if game_mode == '2':
+            self.ai = Search(time_limit=self.ai_time_limit, book=open_book(), tablebase=Tablebase())
+            self.ponderer = Ponderer(self.ai)
         self.print_board()
         print(f"Current turn: {'White' if self.chess.turn == 'W' else 'Black'}")
         while True:
-            from_square, to_square = self.get_move()
+            if self.ai and self.chess.turn == self.ai_color:
+                from_square, to_square, promotion = self.get_ai_move()
+            else:
+                from_square, to_square = self.get_move()
+                promotion = QUEEN
             if from_square is None:
                 break
             if self.chess.is_valid_move(from_square, to_square):
-                self.chess.move_piece(from_square, to_square)
+                self.last_move = self.chess.find_move(from_square, to_square, promotion)
+                self.chess.move_piece(from_square, to_square, promotion)
                 winner = self.chess.check_winner()  # Check for winner after each move
                 if winner:
                     print(f"{winner} wins!")
                     self.print_board()
                     return
+                if self.chess.check_draw():
+                    print("It's a draw!")
+                    self.print_board()
+                    return
                 self.chess.change_turn()
                 self.print_board()
                 print(f"Current turn: {'White' if self.chess.turn == 'W' else 'Black'}")
+                if self.ai and self.chess.turn != self.ai_color:
+                    # Think on the expected reply while waiting for the player's input
+                    self.ponderer.start(self.chess.position, self.chess.key_history)
             else:
                 print("Invalid move! Try again.")
                 print("\n")
@@ -56,7 +91,12 @@ class ChessCLI:
 
 def main():
     chess = ChessCLI()
-    chess.play()
+    try:
+        chess.play()
+    finally:
+        if chess.ponderer is not None:
+            chess.ponderer.stop()
+        chess.chess.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
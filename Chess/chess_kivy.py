@@ -1,5 +1,5 @@
+import threading
 import time
-import json
 from kivy.app import App
 from kivy.uix.gridlayout import GridLayout
 from kivy.uix.button import Button
@@ -9,13 +9,23 @@ from kivy.uix.boxlayout import BoxLayout
 from kivy.clock import Clock
 from kivy.core.window import Window
 from chess import Chess
+from game_log import GameLogger
+from save_slots import SaveSlots
+from engine import Search, Ponderer
+from book import open_book
+from tablebase import Tablebase
+from movegen import promotion_type, move_from, move_to
+from bitboard import QUEEN, PIECE_NAMES, square
 from kivy.uix.popup import Popup
 from kivy.uix.dropdown import DropDown
 from kivy.graphics import Color, Ellipse, Line
 from datetime import datetime
 
+SELECTED_COLOR = (0, 1, 0, 1)
+DESTINATION_COLOR = (0.4, 0.8, 0.4, 1)
+
 class ChessKivy(App):
-    def __init__(self, **kwargs):
+    def __init__(self, ai_time_limit=2.0, **kwargs):
         """Initialize the ChessKivy app."""
         super().__init__(**kwargs)
         self.chess = Chess()
@@ -25,17 +35,35 @@ class ChessKivy(App):
         self.selected_piece = None
         self.selected_square = None
         self.buttons = []
+        self.ai = None
+        self.ponderer = None
+        self.ai_thread = None
+        self.last_move = None
+        self.ai_color = 'B'
+        self.ai_time_limit = ai_time_limit
+        self.saved_key = None
+        self.saves = SaveSlots()
+        self.rendered = [None] * 64
+        self.destinations_key = None
+        self.destinations = {}
+        self.dirty = set()
+        self.highlighted = {}
+        self.show_frame_time = False
+        self.redraw_ms = 0.0
+        self.redraw_squares = 0
+        self.logger = None
         self.reset_log()
 
-    def reset_log(self):
-        """Reset the log file."""
-        with open(self.log_file, 'w') as f:
-            f.write("Game started\n")
+    def reset_log(self, contents="Game started\n"):
+        """Reset the log file and start a new buffered logger on it."""
+        if self.logger is not None:
+            self.logger.close()
+        self.logger = GameLogger(self.log_file)
+        self.logger.write(contents)
 
     def log(self, message):
-        """Log a message to the log file."""
-        with open(self.log_file, 'a') as f:
-            f.write(message + "\n")
+        """Queue a message for the log file; it is written on the logger's background thread."""
+        self.logger.write(message + "\n")
 
     def build(self):
         """Build the main layout of the app."""
@@ -67,16 +95,22 @@ class ChessKivy(App):
         return main_layout
 
     def create_menu(self, menu_layout, dropdown, tile_size):
-        """Create the menu layout with buttons for new game, save game, load game, and exit."""
+        """Create the menu layout with buttons for new game, game vs AI, save game, load game, and exit."""
         new_game_btn = Button(text='New Game', font_size=12, size_hint_y=None, height=tile_size)
         new_game_btn.bind(on_release=self.new_game)
         dropdown.add_widget(new_game_btn)
+        new_ai_game_btn = Button(text='New Game vs AI', font_size=12, size_hint_y=None, height=tile_size)
+        new_ai_game_btn.bind(on_release=self.new_ai_game)
+        dropdown.add_widget(new_ai_game_btn)
         save_game_btn = Button(text='Save Game', font_size=12, size_hint_y=None, height=tile_size)
         save_game_btn.bind(on_release=self.save_game)
         dropdown.add_widget(save_game_btn)
         load_game_btn = Button(text='Load Game', font_size=12, size_hint_y=None, height=tile_size)
         load_game_btn.bind(on_release=self.load_game)
         dropdown.add_widget(load_game_btn)
+        frame_time_btn = Button(text='Frame Time', font_size=12, size_hint_y=None, height=tile_size)
+        frame_time_btn.bind(on_release=self.toggle_frame_time)
+        dropdown.add_widget(frame_time_btn)
         exit_btn = Button(text='Exit', font_size=12, size_hint_y=None, height=tile_size)
         exit_btn.bind(on_release=self.stop)
         dropdown.add_widget(exit_btn)
@@ -85,14 +119,16 @@ class ChessKivy(App):
         menu_layout.add_widget(menu_btn)
 
     def create_header(self, header_layout, menu_layout, tile_size):
-        """Create the header layout with turn, turns played, and timer labels."""
+        """Create the header layout with turn, turns played, timer and frame time labels."""
         self.turn_label = Label(text=f"Turn: {self.chess.turn}", font_size=14)
         self.turns_played_label = Label(text=f"Turns Played: {self.turns_played}", font_size=14)
-        self.timer_label = Label(text="Time: 0.00s", font_size=14)
+        self.timer_label = Label(text="Time: 0s", font_size=14)
+        self.frame_label = Label(text="", font_size=10)
         header_layout.add_widget(menu_layout)
         header_layout.add_widget(self.turn_label)
         header_layout.add_widget(self.turns_played_label)
         header_layout.add_widget(self.timer_label)
+        header_layout.add_widget(self.frame_label)
 
     def create_board(self, board_layout, tile_size):
         """Create the chessboard layout with buttons for each square."""
@@ -110,13 +146,61 @@ class ChessKivy(App):
         self.update_board_buttons()
 
     def update_board_buttons(self):
-        """Update the buttons on the board with the current state."""
-        for i, row in enumerate(self.chess.board):
-            for j, cell in enumerate(row):
-                button = self.get_button_at(i, j)
-                piece = cell.strip()
-                button.text = piece if piece else ''
-                self.set_button_color(button, i, j)
+        """Repaint only the squares whose piece or highlight changed since the last redraw."""
+        start = time.perf_counter()
+        mailbox = self.chess.position.mailbox
+        rendered = self.rendered
+        dirty = self.dirty
+        for sq in range(64):
+            if mailbox[sq] != rendered[sq]:
+                dirty.add(sq)
+        for sq in dirty:
+            button = self.buttons[sq]
+            button.text = PIECE_NAMES[mailbox[sq]].strip()
+            if sq in self.highlighted:
+                button.background_color = self.highlighted[sq]
+            else:
+                self.set_button_color(button, *divmod(sq, 8))
+            rendered[sq] = mailbox[sq]
+        self.redraw_squares = len(dirty)
+        dirty.clear()
+        self.redraw_ms = (time.perf_counter() - start) * 1000
+        self.update_frame_label()
+
+    def set_highlight(self, highlights, redraw=True):
+        """Replace the highlighted squares with a {square: colour} dict, marking changed squares dirty."""
+        for sq in set(highlights) | set(self.highlighted):
+            if highlights.get(sq) != self.highlighted.get(sq):
+                self.dirty.add(sq)
+        self.highlighted = dict(highlights)
+        if redraw:
+            self.update_board_buttons()
+
+    def clear_selection(self):
+        """Forget the selected piece; its highlight is removed on the next redraw."""
+        self.selected_piece = None
+        self.selected_square = None
+        self.set_highlight({}, redraw=False)
+
+    def set_label_text(self, label, text):
+        """Set a label's text only when the displayed value changes."""
+        if label.text != text:
+            label.text = text
+
+    def toggle_frame_time(self, instance):
+        """Show or hide the redraw cost overlay."""
+        self.show_frame_time = not self.show_frame_time
+        self.update_frame_label()
+
+    def update_frame_label(self):
+        """Show the cost of the last board redraw and the current frame rate."""
+        if not hasattr(self, 'frame_label'):
+            return
+        if self.show_frame_time:
+            text = f"{self.redraw_ms:.2f}ms/{self.redraw_squares}sq {Clock.get_fps():.0f}fps"
+        else:
+            text = ""
+        self.set_label_text(self.frame_label, text)
 
     def set_button_color(self, button, row, col):
         """Set the color of the button based on its position."""
@@ -127,56 +211,146 @@ class ChessKivy(App):
             button.background_color = (0.1, 0.1, 0.1, 1)
             button.color = (1, 1, 1, 1)
 
+    def new_ai_game(self, instance):
+        """Start a new game against the AI, which plays Black."""
+        self.new_game(instance)
+        self.ai = Search(time_limit=self.ai_time_limit, book=open_book(), tablebase=Tablebase())
+        self.ponderer = Ponderer(self.ai)
+        self.log("AI plays Black")
+
     def new_game(self, instance):
         """Start a new game and reset the board and labels."""
+        self.stop_pondering()
+        self.chess.close()
         self.chess = Chess()
+        self.ai = None
+        self.ponderer = None
         self.turns_played = 0
         self.start_time = time.time()
-        self.selected_piece = None
-        self.selected_square = None
-        self.turn_label.text = f"Turn: {self.chess.turn}"
-        self.turns_played_label.text = f"Turns Played: {self.turns_played}"
-        self.timer_label.text = "Time: 0.00s"
+        self.clear_selection()
+        self.set_label_text(self.turn_label, f"Turn: {self.chess.turn}")
+        self.set_label_text(self.turns_played_label, f"Turns Played: {self.turns_played}")
+        self.set_label_text(self.timer_label, "Time: 0s")
         self.update_board_buttons()
         self.reset_log()
         self.log("New game started")
 
     def update_timer(self, dt):
-        """Update the timer label with the elapsed time."""
+        """Update the timer label with the elapsed time, touching the widget only when the text changes.
+
+        The label shows whole seconds while the clock ticks every 0.1s, so it follows the time
+        closely but is rewritten only once a second.
+        """
         elapsed_time = time.time() - self.start_time
-        self.timer_label.text = f"Time: {elapsed_time:.2f}s"
-        
+        self.set_label_text(self.timer_label, f"Time: {int(elapsed_time)}s")
+        if self.show_frame_time:
+            self.update_frame_label()
 
     def on_button_press(self, instance):
         """Handle button press events for selecting and moving pieces."""
         row, col = instance.coords
-        if self.selected_piece is None:
-            if self.chess.board[row][col].strip() and self.chess.board[row][col].strip()[0] == self.chess.turn[0]:
-                self.selected_piece = self.chess.board[row][col]
-                self.selected_square = (row, col)
-                instance.background_color = (0, 1, 0, 1)
+        if self.ai and self.chess.turn == self.ai_color:
+            return
+        clicked_own_piece = self.chess.board[row][col].strip()[:1] == self.chess.turn[0]
+        if self.selected_piece is None or (clicked_own_piece and (row, col) != self.selected_square):
+            if clicked_own_piece:
+                self.select_square(row, col)
         else:
             from_square = self.selected_square
             to_square = (row, col)
-            if from_square != to_square and self.chess.is_valid_move(from_square, to_square):
-                self.chess.move_piece(from_square, to_square)
-                self.chess.log_action(from_square, to_square)
-                self.turns_played += 1
-                self.start_time = time.time()
-                winner = self.chess.check_winner()
-                if winner:
-                    self.update_board(from_square, to_square)
-                    self.on_win(winner)
-                    return
-                self.chess.change_turn()
-                self.turn_label.text = f"Turn: {self.chess.turn}"
-                self.turns_played_label.text = f"Turns Played: {self.turns_played}"
-                self.selected_piece = None
-                self.selected_square = None
-                self.update_board(from_square, to_square)
+            if square(*to_square) in self.legal_destinations().get(square(*from_square), ()):
+                self.last_move = self.chess.find_move(from_square, to_square)
+                if self.play_move(from_square, to_square) and self.ai and self.chess.turn == self.ai_color:
+                    Clock.schedule_once(self.play_ai_move, 0.1)
             else:
-                self.selected_piece = None
-                self.selected_square = None
+                self.clear_selection()
+                self.update_board_buttons()
+
+    def legal_destinations(self):
+        """Return {from square: set of destination squares} for the side to move, computed once per position."""
+        if self.destinations_key != self.chess.key:
+            destinations = {}
+            for move in self.chess.generate_legal_moves():
+                destinations.setdefault(move_from(move), set()).add(move_to(move))
+            self.destinations = destinations
+            self.destinations_key = self.chess.key
+        return self.destinations
+
+    def select_square(self, row, col):
+        """Select the piece on a square and highlight where it can legally move."""
+        self.selected_piece = self.chess.board[row][col]
+        self.selected_square = (row, col)
+        from_sq = square(row, col)
+        highlights = {to_sq: DESTINATION_COLOR for to_sq in self.legal_destinations().get(from_sq, ())}
+        highlights[from_sq] = SELECTED_COLOR
+        self.set_highlight(highlights)
+
+    def play_move(self, from_square, to_square, promotion=QUEEN):
+        """Play a validated move, update the display and return False if it ended the game."""
+        self.chess.move_piece(from_square, to_square, promotion)
+        self.chess.log_action(from_square, to_square)
+        self.turns_played += 1
+        self.start_time = time.time()
+        winner = self.chess.check_winner()
+        self.clear_selection()
+        if winner:
+            self.update_board(from_square, to_square)
+            self.on_win(winner)
+            return False
+        if self.chess.check_draw():
+            self.update_board(from_square, to_square)
+            self.on_draw()
+            return False
+        self.chess.change_turn()
+        self.set_label_text(self.turn_label, f"Turn: {self.chess.turn}")
+        self.set_label_text(self.turns_played_label, f"Turns Played: {self.turns_played}")
+        self.update_board(from_square, to_square)
+        return True
+
+    def play_ai_move(self, dt):
+        """Start the AI's reply on a worker thread so the window stays responsive while it thinks."""
+        if self.ai_thread is not None:
+            return
+        self.ai_thread = threading.Thread(
+            target=self.think, args=(self.chess.position, list(self.chess.key_history), self.last_move),
+            name="AI", daemon=True)
+        self.ai_thread.start()
+
+    def think(self, position, history, last_move):
+        """Find the AI's reply off the UI thread, from pondering when the player made the expected move."""
+        thread = threading.current_thread()
+        move = self.ponderer.finish(last_move, self.ai_time_limit)
+        ponder_hit = move is not None
+        if not ponder_hit:
+            move = self.ai.search(position, history=history)
+        info = self.ai.info()
+        # Widgets may only be touched on the UI thread
+        Clock.schedule_once(lambda dt: self.apply_ai_move(thread, move, ponder_hit, info))
+
+    def apply_ai_move(self, thread, move, ponder_hit, info):
+        """Play the move a finished AI search chose, unless the game changed while it was thinking."""
+        if thread is not self.ai_thread:
+            return
+        self.ai_thread = None
+        if move is None:
+            return
+        self.log(f"AI (ponder hit): {info}" if ponder_hit else f"AI: {info}")
+        from_square, to_square = self.chess.move_to_squares(move)
+        if self.play_move(from_square, to_square, promotion_type(move) or QUEEN):
+            # Keep searching on the expected reply between the player's clicks
+            self.ponderer.start(self.chess.position, self.chess.key_history)
+
+    def stop_pondering(self):
+        """Stop any background search, the AI's move or pondering, before the game it was thinking about changes."""
+        if self.ai_thread is not None:
+            # Repeat the stop: a ponder miss resets the flag just before the real search starts
+            while self.ai_thread.is_alive():
+                self.ai.stop()
+                self.ai_thread.join(0.05)
+            # Its scheduled move is dropped since it no longer matches ai_thread
+            self.ai_thread = None
+        if self.ponderer is not None:
+            self.ponderer.stop()
 
     def on_win(self, winner):
         """Handle the end of the game when a player wins."""
@@ -188,6 +362,16 @@ class ChessKivy(App):
 
         self.show_win_popup(f"{winner} wins!", title="Game Over")
 
+    def on_draw(self):
+        """Handle the end of the game by stalemate, repetition or the fifty-move rule."""
+        self.turn_label.text = "Draw"
+
+        self.log("Draw")
+
+        Clock.schedule_once(lambda dt: self.stop(), 2)
+
+        self.show_win_popup("It's a draw!", title="Game Over")
+
     def show_win_popup(self, message, title='Info'):
         """Show a win popup with a message and save log button."""
         content = BoxLayout(orientation='vertical')
@@ -203,32 +387,32 @@ class ChessKivy(App):
         """Save the log of the current game to a new file with a timestamp."""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         new_log_file = f"game_log_{timestamp}.txt"
+        self.logger.flush()
         with open(new_log_file, 'w') as new_log_f:
             with open(self.log_file, 'r') as log_f:
                 new_log_f.write(log_f.read())
+        self.chess.save_record(f"game_{timestamp}.chr")
+        with open(f"game_{timestamp}.pgn", 'w') as pgn_f:
+            pgn_f.write(self.chess.export_pgn({'Date': datetime.now().strftime("%Y.%m.%d")}))
         print(f"Log saved to {new_log_file}")
 
     def on_stop(self):
-        """Handle the app stop event and log the game end."""
+        """Handle the app stop event, log the game end and flush the logs."""
         self.log("Game ended")
+        self.stop_pondering()
+        self.logger.close()
+        self.chess.close()
 
     def update_board(self, from_square, to_square):
         """Update the board display after a piece is moved."""
         from_row, from_col = from_square
-        to_row, to_col = to_square
-        from_button = self.get_button_at(from_row, from_col)
-        to_button = self.get_button_at(to_row, to_col)
-        from_button.text = ''
-        piece = self.chess.board[to_row][to_col].strip()
-        if piece:
-            to_button.text = piece
+        # Castling, en passant and promotion change squares other than from and to,
+        # so redraw whatever differs from what is on screen rather than just two buttons
+        self.update_board_buttons()
         
         log_message = f"Moving {self.chess.board[from_row][from_col]} from {from_square} to {to_square}"
         print(f"Turn {self.turns_played}: {log_message}")
         self.log(f"Turn {self.turns_played}: {log_message}")
-        
-        self.set_button_color(to_button, to_row, to_col)
-        self.set_button_color(from_button, from_row, from_col)
 
     def get_button_at(self, row, col):
         """Get the button at the specified row and column."""
@@ -236,45 +420,69 @@ class ChessKivy(App):
 
     def save_game(self, instance):
         """Save the current game state to a file."""
-        elapsed_time = time.time() - self.start_time
-        game_state = {
-            'board': self.chess.board,
-            'turn': self.chess.turn,
-            'turns_played': self.turns_played,
-            'elapsed_time': elapsed_time,
-            'pieces': {
-                'white': self.chess.white_pieces,
-                'black': self.chess.black_pieces
-            }
-        }
-        with open('saved_game.json', 'w') as f:
-            json.dump(game_state, f)
-        with open('saved_game_log.txt', 'w') as f:
-            with open(self.log_file, 'r') as log_f:
-                f.write(log_f.read())
-        print("Game saved")
+        if self.chess.key == self.saved_key:
+            print("Game already saved")
+            return
+        self.logger.flush()
+        slot = self.saves.save(self.chess, turns_played=self.turns_played,
+                               elapsed_time=time.time() - self.start_time)
+        self.log(f"Saved to slot {slot}")
+        self.saved_key = self.chess.key
+        print(f"Game saved to slot {slot}")
 
     def load_game(self, instance):
-        """Load a saved game state from a file."""
-        try:
-            with open('saved_game.json', 'r') as f:
-                game_state = json.load(f)
-            self.chess.board = game_state['board']
-            self.chess.turn = game_state['turn']
-            self.turns_played = game_state['turns_played']
-            self.start_time = time.time() - game_state['elapsed_time']
-            self.chess.white_pieces = game_state['pieces']['white']
-            self.chess.black_pieces = game_state['pieces']['black']
-            self.update_board_buttons()
-            self.turn_label.text = f"Turn: {self.chess.turn}"
-            self.turns_played_label.text = f"Turns Played: {self.turns_played}"
-            
-            with open('saved_game_log.txt', 'r') as f:
-                with open(self.log_file, 'w') as log_f:
-                    log_f.write(f.read())
-            print("Game loaded")
-        except FileNotFoundError:
+        """Show the saved games, read from the save index, and load the one picked."""
+        slots = self.saves.list()
+        if not slots:
             self.show_popup("No saved game found", title="Error")
+            return
+        content = BoxLayout(orientation='vertical')
+        popup = Popup(title='Load Game', content=content, size_hint=(None, None), size=(460, 60 + 40 * len(slots)))
+        for slot, summary in sorted(slots.items(), reverse=True):
+            saved_at = datetime.fromtimestamp(summary['saved_at']).strftime("%Y-%m-%d %H:%M")
+            row = BoxLayout(orientation='horizontal', size_hint_y=None, height=40)
+            button = Button(text=f"Slot {slot}: {saved_at}, {summary['moves']} moves, {summary['turn']} to move",
+                            font_size=12)
+            button.bind(on_release=lambda instance, slot=slot: (popup.dismiss(), self.load_slot(slot)))
+            row.add_widget(button)
+            delete_btn = Button(text='Delete', font_size=12, size_hint_x=None, width=60)
+            delete_btn.bind(on_release=lambda instance, slot=slot: (popup.dismiss(), self.delete_slot(slot)))
+            row.add_widget(delete_btn)
+            content.add_widget(row)
+        popup.open()
+
+    def delete_slot(self, slot):
+        """Delete a saved slot and show the remaining ones."""
+        self.saves.delete(slot)
+        # The deleted slot may have held this position, so the next save must not be skipped
+        self.saved_key = None
+        self.log(f"Deleted slot {slot}")
+        self.load_game(None)
+
+    def load_slot(self, slot):
+        """Load a saved slot straight from its FEN, without replaying moves or logs."""
+        try:
+            snapshot = self.saves.load(slot)
+        except (FileNotFoundError, ValueError) as e:
+            self.show_popup(f"Cannot load slot {slot}: {e}", title="Error")
+            return
+        self.stop_pondering()
+        self.chess.restore(snapshot['fen'], snapshot['record'])
+        self.turns_played = snapshot['turns_played']
+        self.start_time = time.time() - snapshot['elapsed_time']
+        self.saved_key = self.chess.key
+        self.clear_selection()
+        self.update_board_buttons()
+        self.set_label_text(self.turn_label, f"Turn: {self.chess.turn}")
+        self.set_label_text(self.turns_played_label, f"Turns Played: {self.turns_played}")
+        self.log(f"Loaded slot {slot}")
+        print(f"Game loaded from slot {slot}")
+        # The move that led here was not seen by the ponderer, so it cannot be a ponder hit
+        self.last_move = None
+        if self.ai and self.chess.turn == self.ai_color:
+            Clock.schedule_once(self.play_ai_move, 0.1)
+        elif self.ai:
+            self.ponderer.start(self.chess.position, self.chess.key_history)
 
     def show_popup(self, message, title='Info'):
         """Show a popup with a message."""
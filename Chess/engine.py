@@ -0,0 +1,333 @@
+import threading
+import time
+from evaluation import evaluate_position
+from movegen import generate_legal_moves, in_check, make_move, unmake_move, move_to_uci, CAPTURE, PROMOTION
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+MATE = 100000
+INFINITY = 1000000
+MAX_PLY = 128
+
+CAPTURE_SCORE = 1000000
+KILLER_SCORES = (900000, 800000)
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class Search:
+    """Iterative-deepening alpha-beta search with a transposition table and MVV-LVA, killer and history move ordering.
+
+    An opening book and endgame tablebase, when given, are consulted before searching.
+    on_depth, when given, is called with (depth, elapsed, nodes, score, move) after each iteration.
+    table replaces the private transposition table, e.g. with one shared between processes.
+    """
+
+    def __init__(self, time_limit=2.0, max_depth=64, hash_mb=16, book=None, tablebase=None, on_depth=None,
+                 table=None):
+        self.time_limit = time_limit
+        self.book = book
+        self.tablebase = tablebase
+        self.on_depth = on_depth
+        self.source = None
+        self.stopped = False
+        self.max_depth = max_depth
+        self.tt = TranspositionTable(hash_mb) if table is None else table
+        self.path = []
+        self.history = [[0] * 4096 for _ in range(2)]
+        self.killers = [[0, 0] for _ in range(MAX_PLY)]
+        self.nodes = 0
+        self.elapsed = 0.0
+        self.depth_times = []
+        self.deadline = None
+
+    @property
+    def nps(self):
+        """Nodes searched per second during the last search."""
+        return int(self.nodes / self.elapsed) if self.elapsed > 0 else 0
+
+    @staticmethod
+    def allocate_time(remaining, increment=0.0, moves_to_go=None):
+        """Split the remaining clock time into a budget for one move."""
+        moves_to_go = moves_to_go or 30
+        budget = remaining / moves_to_go + increment * 0.8
+        return max(0.01, min(budget, remaining * 0.5))
+
+    def stop(self):
+        """Ask a search running on another thread to return its best move so far."""
+        self.stopped = True
+
+    def search(self, pos, time_limit=None, max_depth=None, history=()):
+        """Return the best move for the side to move in pos, or None if there is no legal move.
+
+        history holds the Zobrist keys of the game so far, used to score repetitions as draws.
+        """
+        try:
+            return self._search(pos, time_limit, max_depth, history)
+        finally:
+            self.stopped = False
+
+    def _search(self, pos, time_limit, max_depth, history):
+        time_limit = self.time_limit if time_limit is None else time_limit
+        max_depth = max_depth or self.max_depth
+        # Search a private copy: a timeout can unwind mid-move and leave it unrestored
+        pos = pos.copy()
+        self.path = [key for key in history]
+        if self.path and self.path[-1] == pos.key:
+            self.path.pop()
+        self.tt.new_search()
+        self.nodes = 0
+        self.depth_times = []
+        self.killers = [[0, 0] for _ in range(MAX_PLY)]
+        self.history = [[value >> 3 for value in table] for table in self.history]
+        start = time.perf_counter()
+        self.deadline = start + time_limit if time_limit else None
+
+        moves = generate_legal_moves(pos)
+        if not moves:
+            return None
+        move = self._lookup(pos)
+        if move:
+            self.elapsed = time.perf_counter() - start
+            return move
+        self.source = 'search'
+        best_move = self._order_moves(pos, moves, 0)[0]
+        for depth in range(1, max_depth + 1):
+            try:
+                score, move = self._search_root(pos, moves, depth, best_move)
+            except SearchTimeout:
+                break
+            best_move = move
+            self.elapsed = time.perf_counter() - start
+            self.depth_times.append((depth, self.elapsed, self.nodes, score, move))
+            if self.on_depth is not None:
+                self.on_depth(depth, self.elapsed, self.nodes, score, move)
+            if abs(score) >= MATE - MAX_PLY:
+                break
+        self.elapsed = time.perf_counter() - start
+        return best_move
+
+    def _lookup(self, pos):
+        """Return a book or tablebase move for pos, or None to search it."""
+        if self.book is not None:
+            move = self.book.choose(pos)
+            if move:
+                self.source = 'book'
+                return move
+        if self.tablebase is not None:
+            move = self.tablebase.best_move(pos)
+            if move:
+                self.source = 'tablebase'
+                return move
+        return None
+
+    def info(self):
+        """Return a one-line summary of the last search: depth, score, nodes, speed and time to depth."""
+        if self.source in ('book', 'tablebase'):
+            return f"{self.source} move"
+        if not self.depth_times:
+            return f"depth 0 nodes {self.nodes} nps {self.nps}"
+        depth, elapsed, nodes, score, move = self.depth_times[-1]
+        return (f"depth {depth} score {score} nodes {self.nodes} nps {self.nps} "
+                f"time {elapsed:.2f}s tt hits {self.tt.hit_rate:.0%} best {move_to_uci(move)}")
+
+    def _tick(self):
+        self.nodes += 1
+        if self.stopped:
+            raise SearchTimeout()
+        if self.nodes & 1023 == 0 and self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+    def _search_root(self, pos, moves, depth, previous_best):
+        alpha = -INFINITY
+        best_move = previous_best
+        ordered = self._order_moves(pos, moves, 0, previous_best)
+        self.path.append(pos.key)
+        for move in ordered:
+            make_move(pos, move)
+            score = -self._negamax(pos, depth - 1, -INFINITY, -alpha, 1)
+            unmake_move(pos, move)
+            if score > alpha:
+                alpha = score
+                best_move = move
+        self.path.pop()
+        self.tt.store(pos.key, best_move, depth, EXACT, alpha)
+        return alpha, best_move
+
+    def _negamax(self, pos, depth, alpha, beta, ply):
+        if depth <= 0:
+            return self._quiesce(pos, alpha, beta, ply)
+        self._tick()
+        key = pos.key
+        if pos.halfmove and key in self.path[-pos.halfmove:]:
+            return 0
+        tt_move = 0
+        entry = self.tt.probe(key)
+        if entry is not None:
+            tt_move, tt_depth, flag, score = entry
+            if tt_depth >= depth:
+                score = self._score_from_tt(score, ply)
+                if flag == EXACT or (flag == LOWER and score >= beta) or (flag == UPPER and score <= alpha):
+                    return score
+        moves = generate_legal_moves(pos)
+        if not moves:
+            return -MATE + ply if in_check(pos) else 0
+        if pos.halfmove >= 100:
+            return 0
+        original_alpha = alpha
+        best = -INFINITY
+        best_move = 0
+        self.path.append(key)
+        for move in self._order_moves(pos, moves, ply, tt_move):
+            make_move(pos, move)
+            score = -self._negamax(pos, depth - 1, -beta, -alpha, ply + 1)
+            unmake_move(pos, move)
+            if score > best:
+                best = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if not move >> 12 & (CAPTURE | PROMOTION):
+                            self._store_killer(move, ply)
+                            self.history[pos.side][move & 4095] += depth * depth
+                        break
+        self.path.pop()
+        if best <= original_alpha:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, best_move, depth, flag, self._score_to_tt(best, ply))
+        return best
+
+    @staticmethod
+    def _score_to_tt(score, ply):
+        # Mate scores are stored relative to the node so they stay valid at any ply
+        if score >= MATE - MAX_PLY:
+            return score + ply
+        if score <= -MATE + MAX_PLY:
+            return score - ply
+        return score
+
+    @staticmethod
+    def _score_from_tt(score, ply):
+        if score >= MATE - MAX_PLY:
+            return score - ply
+        if score <= -MATE + MAX_PLY:
+            return score + ply
+        return score
+
+    def _quiesce(self, pos, alpha, beta, ply):
+        self._tick()
+        stand_pat = evaluate_position(pos)
+        if stand_pat >= beta or ply >= MAX_PLY - 1:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+        captures = [move for move in generate_legal_moves(pos) if move >> 12 & CAPTURE]
+        for move in self._order_moves(pos, captures, ply):
+            make_move(pos, move)
+            score = -self._quiesce(pos, -beta, -alpha, ply + 1)
+            unmake_move(pos, move)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    def _store_killer(self, move, ply):
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+
+    def _order_moves(self, pos, moves, ply, first=None):
+        mailbox = pos.mailbox
+        killers = self.killers[ply] if ply < MAX_PLY else (0, 0)
+        history = self.history[pos.side]
+        scored = []
+        for move in moves:
+            if move == first:
+                score = INFINITY
+            elif move >> 12 & (CAPTURE | PROMOTION):
+                # Most valuable victim first, least valuable attacker breaks ties; an empty
+                # target (en passant or a quiet promotion) counts as a pawn since EMPTY % 6 == PAWN
+                victim_type = mailbox[move >> 6 & 63] % 6
+                score = CAPTURE_SCORE + victim_type * 10 - mailbox[move & 63] % 6 + (move >> 12 & PROMOTION) * 10
+            elif move == killers[0]:
+                score = KILLER_SCORES[0]
+            elif move == killers[1]:
+                score = KILLER_SCORES[1]
+            else:
+                score = min(history[move & 4095], KILLER_SCORES[1] - 1)
+            scored.append((score, move))
+        scored.sort(reverse=True)
+        return [move for score, move in scored]
+
+
+class Ponderer:
+    """Keeps a Search busy while the opponent thinks, on the position after the reply it expects.
+
+    The expected reply is the best move the transposition table holds for the opponent. When the
+    opponent plays it, the pondered search is already on the right position and only has to use up
+    what is left of the move's time; otherwise it is stopped, and its table entries remain for the
+    real search.
+    """
+
+    def __init__(self, search):
+        self.search = search
+        self.thread = None
+        self.expected = None
+        self.result = None
+        self.started = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def start(self, pos, history=()):
+        """Start pondering with the opponent to move in pos; return False if no reply can be predicted."""
+        self.stop()
+        entry = self.search.tt.probe(pos.key)
+        if entry is None or entry[0] not in generate_legal_moves(pos):
+            return False
+        self.expected = entry[0]
+        pos = pos.copy()
+        make_move(pos, self.expected)
+        pos.undo.clear()
+        history = list(history) + [pos.key]
+        self.result = None
+        self.started = time.perf_counter()
+        self.thread = threading.Thread(target=self._run, args=(pos, history), name="Ponderer", daemon=True)
+        self.thread.start()
+        return True
+
+    def _run(self, pos, history):
+        self.result = self.search.search(pos, time_limit=0, history=history)
+
+    def finish(self, move, time_limit):
+        """Return the pondered reply to move if it was the expected one, else stop pondering and return None.
+
+        On a hit the search keeps running until time_limit has passed since pondering began.
+        """
+        if self.thread is None:
+            return None
+        if move != self.expected:
+            self.misses += 1
+            self.stop()
+            return None
+        self.hits += 1
+        self.thread.join(max(0.0, time_limit - (time.perf_counter() - self.started)))
+        self.stop()
+        return self.result
+
+    def stop(self):
+        """Stop any pondering search and wait for its thread."""
+        if self.thread is not None:
+            if self.thread.is_alive():
+                self.search.stop()
+                self.thread.join()
+            # A stop that lands just as the search returns must not cut short the next one
+            self.search.stopped = False
+        self.thread = None
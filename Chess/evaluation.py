@@ -0,0 +1,192 @@
+from bitboard import WHITE, EMPTY, KNIGHT, BISHOP, ROOK, QUEEN, iter_bits
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PIECE_VALUES = [100, 320, 330, 500, 900, 20000]
+# Centipawns per square a piece attacks that is empty or holds an enemy piece
+MOBILITY_WEIGHTS = [0, 4, 5, 2, 1, 0]
+BATCH_SIZE = 4096
+
+# Piece-square tables from White's point of view, listed from rank 8 down to rank 1
+PAWN_TABLE = [
+    0, 0, 0, 0, 0, 0, 0, 0,
+    50, 50, 50, 50, 50, 50, 50, 50,
+    10, 10, 20, 30, 30, 20, 10, 10,
+    5, 5, 10, 25, 25, 10, 5, 5,
+    0, 0, 0, 20, 20, 0, 0, 0,
+    5, -5, -10, 0, 0, -10, -5, 5,
+    5, 10, 10, -20, -20, 10, 10, 5,
+    0, 0, 0, 0, 0, 0, 0, 0,
+]
+KNIGHT_TABLE = [
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20, 0, 0, 0, 0, -20, -40,
+    -30, 0, 10, 15, 15, 10, 0, -30,
+    -30, 5, 15, 20, 20, 15, 5, -30,
+    -30, 0, 15, 20, 20, 15, 0, -30,
+    -30, 5, 10, 15, 15, 10, 5, -30,
+    -40, -20, 0, 5, 5, 0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50,
+]
+BISHOP_TABLE = [
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10, 0, 0, 0, 0, 0, 0, -10,
+    -10, 0, 5, 10, 10, 5, 0, -10,
+    -10, 5, 5, 10, 10, 5, 5, -10,
+    -10, 0, 10, 10, 10, 10, 0, -10,
+    -10, 10, 10, 10, 10, 10, 10, -10,
+    -10, 5, 0, 0, 0, 0, 5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20,
+]
+ROOK_TABLE = [
+    0, 0, 0, 0, 0, 0, 0, 0,
+    5, 10, 10, 10, 10, 10, 10, 5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    0, 0, 0, 5, 5, 0, 0, 0,
+]
+QUEEN_TABLE = [
+    -20, -10, -10, -5, -5, -10, -10, -20,
+    -10, 0, 0, 0, 0, 0, 0, -10,
+    -10, 0, 5, 5, 5, 5, 0, -10,
+    -5, 0, 5, 5, 5, 5, 0, -5,
+    0, 0, 5, 5, 5, 5, 0, -5,
+    -10, 5, 5, 5, 5, 5, 0, -10,
+    -10, 0, 5, 0, 0, 0, 0, -10,
+    -20, -10, -10, -5, -5, -10, -10, -20,
+]
+KING_TABLE = [
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+    20, 20, 0, 0, 0, 0, 20, 20,
+    20, 30, 10, 0, 0, 10, 30, 20,
+]
+TABLES = [PAWN_TABLE, KNIGHT_TABLE, BISHOP_TABLE, ROOK_TABLE, QUEEN_TABLE, KING_TABLE]
+
+
+def _square_values():
+    # SQUARE_VALUES[piece][sq] is material plus placement, signed so White is positive
+    values = []
+    for color in range(2):
+        for piece_type, table in enumerate(TABLES):
+            row_values = []
+            for sq in range(64):
+                row, col = sq >> 3, sq & 7
+                if color == WHITE:
+                    bonus = table[(7 - row) * 8 + col]
+                    row_values.append(PIECE_VALUES[piece_type] + bonus)
+                else:
+                    bonus = table[row * 8 + col]
+                    row_values.append(-(PIECE_VALUES[piece_type] + bonus))
+            values.append(row_values)
+    return values
+
+
+SQUARE_VALUES = _square_values()
+
+
+def evaluate_position(pos):
+    """Return the material and piece-square score of pos in centipawns for the side to move."""
+    score = 0
+    for piece, mask in enumerate(pos.pieces):
+        values = SQUARE_VALUES[piece]
+        for sq in iter_bits(mask):
+            score += values[sq]
+    return score if pos.side == WHITE else -score
+
+
+def _ray_tables():
+    # RAYS[sq][direction] lists the squares outward from sq, padded to eight with 64 (off the board) so
+    # every ray ends in a blocker; directions 0-3 are rook moves and 4-7 bishop moves.
+    # KNIGHT_TARGETS is padded the same way.
+    directions = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+    rays = []
+    knights = []
+    for sq in range(64):
+        row, col = sq >> 3, sq & 7
+        square_rays = []
+        for d_row, d_col in directions:
+            ray = []
+            r, c = row + d_row, col + d_col
+            while 0 <= r < 8 and 0 <= c < 8:
+                ray.append(r * 8 + c)
+                r, c = r + d_row, c + d_col
+            square_rays.append(ray + [64] * (8 - len(ray)))
+        rays.append(square_rays)
+        jumps = [(row + d_row) * 8 + col + d_col
+                 for d_row, d_col in [(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)]
+                 if 0 <= row + d_row < 8 and 0 <= col + d_col < 8]
+        knights.append(jumps + [64] * (8 - len(jumps)))
+    return rays, knights
+
+
+_arrays = None
+
+
+def _numpy_tables():
+    global _arrays
+    if _arrays is None:
+        rays, knights = _ray_tables()
+        square_values = np.zeros((EMPTY + 1, 64), dtype=np.int64)
+        square_values[:EMPTY] = SQUARE_VALUES
+        _arrays = square_values, np.array(rays), np.array(knights), np.array(MOBILITY_WEIGHTS, dtype=np.int64)
+    return _arrays
+
+
+def evaluate(positions):
+    """Score a batch of positions at once, returning a NumPy array of centipawns for each side to move.
+
+    Scores material, piece-square tables and mobility (squares each knight, bishop, rook and queen
+    attacks that are empty or hold an enemy piece) with array operations over the whole batch.
+    """
+    if np is None:
+        raise ImportError("evaluate() requires NumPy; use evaluate_position() for single positions")
+    positions = list(positions)
+    scores = [_evaluate_batch(positions[start:start + BATCH_SIZE])
+              for start in range(0, len(positions), BATCH_SIZE)]
+    return np.concatenate(scores) if scores else np.zeros(0, dtype=np.int64)
+
+
+def _evaluate_batch(positions):
+    square_values, rays, knights, weights = _numpy_tables()
+    boards = np.array([pos.mailbox for pos in positions], dtype=np.int64)
+    sides = np.array([pos.side for pos in positions], dtype=np.int64)
+    score = square_values[boards, np.arange(64)].sum(axis=1)
+
+    # Colour of every square with an off-board column 64: 0 White, 1 Black, 2 empty, 3 off the board
+    colors = np.full((len(positions), 65), 3, dtype=np.int8)
+    colors[:, :64] = boards // 6
+    kinds = boards % 6
+    occupied = boards != EMPTY
+
+    # Knights: targets that are on the board and not held by a friendly piece
+    batch, squares = np.nonzero(occupied & (kinds == KNIGHT))
+    own = colors[batch, squares][:, None]
+    targets = colors[batch[:, None], knights[squares]]
+    knight_moves = ((targets != own) & (targets != 3)).sum(axis=1)
+    signs = 1 - 2 * own[:, 0].astype(np.int64)
+    score += np.bincount(batch, weights[KNIGHT] * knight_moves * signs, minlength=len(positions)).astype(np.int64)
+
+    # Sliders: empty squares up to the first blocker on each ray, plus the blocker if it is an enemy
+    batch, squares = np.nonzero(occupied & (kinds >= BISHOP) & (kinds <= QUEEN))
+    own = colors[batch, squares]
+    ray_colors = colors[batch[:, None, None], rays[squares]]
+    free = np.argmax(ray_colors != 2, axis=2)
+    blocker = np.take_along_axis(ray_colors, free[..., None], axis=2)[..., 0]
+    reach = free + (blocker == 1 - own[:, None])
+    slider_kinds = kinds[batch, squares]
+    slider_moves = (reach[:, :4].sum(axis=1) * (slider_kinds != BISHOP)
+                    + reach[:, 4:].sum(axis=1) * (slider_kinds != ROOK))
+    signs = 1 - 2 * own.astype(np.int64)
+    score += np.bincount(batch, weights[slider_kinds] * slider_moves * signs, minlength=len(positions)).astype(np.int64)
+    return np.where(sides == WHITE, score, -score)
@@ -0,0 +1,91 @@
+import atexit
+import queue
+import threading
+
+_STOP = object()
+
+
+class GameLogger:
+    """Append-only text log that batches entries in a bounded queue and writes them on a background thread."""
+
+    def __init__(self, path, mode='w', max_queue=4096, background=True):
+        self.path = path
+        self.file = open(path, mode)
+        self.background = background
+        self.closed = False
+        # Held while checking closed and queueing, so nothing is queued behind the stop marker
+        self.lock = threading.Lock()
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.buffer = []
+        self.max_queue = max_queue
+        if background:
+            self.thread = threading.Thread(target=self._run, name=f"GameLogger({path})", daemon=True)
+            self.thread.start()
+        atexit.register(self.close)
+
+    def write(self, text):
+        """Queue text for writing; blocks only when max_queue entries are already waiting.
+
+        Raises ValueError after close, as a closed file does, rather than queueing text that no
+        thread would ever write.
+        """
+        if self.background:
+            with self.lock:
+                if self.closed:
+                    raise ValueError("write to a closed GameLogger")
+                self.queue.put(text)
+            return
+        if self.closed:
+            raise ValueError("write to a closed GameLogger")
+        self.buffer.append(text)
+        if len(self.buffer) >= self.max_queue:
+            self._write_batch(self.buffer)
+            self.buffer = []
+
+    def flush(self):
+        """Block until every queued entry is on disk."""
+        if self.closed:
+            return
+        if self.background:
+            self.queue.join()
+        elif self.buffer:
+            self._write_batch(self.buffer)
+            self.buffer = []
+        self.file.flush()
+
+    def close(self):
+        """Flush, stop the writer thread and close the file."""
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            if self.background:
+                self.queue.put(_STOP)
+        if self.background:
+            self.thread.join()
+        elif self.buffer:
+            self._write_batch(self.buffer)
+            self.buffer = []
+        self.file.close()
+        atexit.unregister(self.close)
+
+    def _write_batch(self, batch):
+        self.file.write(''.join(batch))
+        self.file.flush()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(entry is _STOP for entry in batch)
+            entries = [entry for entry in batch if entry is not _STOP]
+            if entries:
+                self._write_batch(entries)
+            for _ in batch:
+                self.queue.task_done()
+            if stop:
+                return
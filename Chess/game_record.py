@@ -0,0 +1,169 @@
+import struct
+import sys
+from array import array
+from bitboard import Position, START_FEN, WHITE, PAWN, FEN_CHARS, square_name
+from movegen import (
+    generate_legal_moves, in_check, make_move, unmake_move,
+    KING_CASTLE, QUEEN_CASTLE, CAPTURE, PROMOTION, PROMOTION_PIECES,
+)
+
+MAGIC = b'CHR1'
+HAS_TIMES = 1
+# magic, flags, FEN length, move count
+HEADER = struct.Struct('<4sBHI')
+
+
+def move_to_san(pos, move):
+    """Return move in standard algebraic notation for pos, e.g. 'Nf3', 'exd5', 'O-O' or 'e8=Q#'."""
+    from_sq = move & 63
+    to_sq = move >> 6 & 63
+    flag = move >> 12
+    piece_type = pos.mailbox[from_sq] % 6
+    if flag == KING_CASTLE:
+        san = 'O-O'
+    elif flag == QUEEN_CASTLE:
+        san = 'O-O-O'
+    else:
+        capture = 'x' if flag & CAPTURE else ''
+        if piece_type == PAWN:
+            san = (square_name(from_sq)[0] if capture else '') + capture + square_name(to_sq)
+            if flag & PROMOTION:
+                san += '=' + PROMOTION_PIECES[flag & 3].upper()
+        else:
+            rivals = [other & 63 for other in generate_legal_moves(pos)
+                      if other >> 6 & 63 == to_sq and other & 63 != from_sq
+                      and pos.mailbox[other & 63] == pos.mailbox[from_sq]]
+            disambiguation = ''
+            if rivals:
+                name = square_name(from_sq)
+                if all(rival & 7 != from_sq & 7 for rival in rivals):
+                    disambiguation = name[0]
+                elif all(rival >> 3 != from_sq >> 3 for rival in rivals):
+                    disambiguation = name[1]
+                else:
+                    disambiguation = name
+            san = FEN_CHARS[piece_type] + disambiguation + capture + square_name(to_sq)
+    make_move(pos, move)
+    if in_check(pos):
+        san += '#' if not generate_legal_moves(pos) else '+'
+    unmake_move(pos, move)
+    return san
+
+
+class GameRecord:
+    """Move-list record of a game: a start FEN plus 16-bit moves, with positions rebuilt by replay."""
+
+    def __init__(self, start_fen=START_FEN, keyframe_interval=16):
+        self.start_fen = start_fen
+        self.keyframe_interval = keyframe_interval
+        self.moves = array('H')
+        self.times = array('H')
+        self.keyframes = {0: Position(start_fen)}
+        self._position = Position(start_fen)
+
+    def __len__(self):
+        return len(self.moves)
+
+    def append(self, move, seconds=None):
+        """Add the next move, optionally with the seconds spent on it."""
+        make_move(self._position, move)
+        self._position.undo.clear()
+        self.moves.append(move)
+        if seconds is not None:
+            self.times.append(min(int(seconds * 100), 0xFFFF))
+        if len(self.moves) % self.keyframe_interval == 0:
+            self.keyframes[len(self.moves)] = self._position.copy()
+
+    def position_at(self, ply=None):
+        """Return the position after ply moves (the final position by default), replayed from the nearest keyframe."""
+        if ply is None or ply == len(self.moves):
+            return self._position.copy()
+        start = max(frame for frame in self.keyframes if frame <= ply)
+        pos = self.keyframes[start].copy()
+        for move in self.moves[start:ply]:
+            make_move(pos, move)
+        pos.undo.clear()
+        return pos
+
+    def board_at(self, ply=None):
+        """Return the 8x8 board after ply moves, as the front ends and old text logs show it."""
+        return self.position_at(ply).to_board()
+
+    def to_pgn(self, headers=None, result='*'):
+        """Return the game as PGN text."""
+        tags = {'Event': '?', 'Site': '?', 'Date': '????.??.??', 'Round': '?',
+                'White': '?', 'Black': '?', 'Result': result}
+        tags.update(headers or {})
+        if self.start_fen != START_FEN:
+            tags['SetUp'] = '1'
+            tags['FEN'] = self.start_fen
+        lines = [f'[{name} "{value}"]' for name, value in tags.items()]
+        pos = Position(self.start_fen)
+        tokens = []
+        for index, move in enumerate(self.moves):
+            if pos.side == WHITE:
+                tokens.append(f'{pos.fullmove}.')
+            elif index == 0:
+                tokens.append(f'{pos.fullmove}...')
+            tokens.append(move_to_san(pos, move))
+            make_move(pos, move)
+        tokens.append(tags['Result'])
+        body = []
+        line = ''
+        for token in tokens:
+            if len(line) + len(token) + 1 > 79:
+                body.append(line)
+                line = token
+            else:
+                line = f'{line} {token}' if line else token
+        body.append(line)
+        return '\n'.join(lines) + '\n\n' + '\n'.join(body) + '\n'
+
+    @classmethod
+    def restore(cls, start_fen, moves, times, fen, keyframe_interval=16):
+        """Rebuild a record from its parts and the FEN of its final position, without replaying the moves."""
+        record = cls(start_fen, keyframe_interval)
+        record.moves = array('H', moves)
+        record.times = array('H', times)
+        record._position = Position(fen)
+        return record
+
+    def to_bytes(self):
+        """Pack the record: a small header, the start FEN, 2 bytes per move and optional 2-byte times."""
+        fen = self.start_fen.encode('ascii')
+        has_times = len(self.times) == len(self.moves) and len(self.moves) > 0
+        moves = array('H', self.moves)
+        times = array('H', self.times)
+        if sys.byteorder == 'big':
+            moves.byteswap()
+            times.byteswap()
+        data = HEADER.pack(MAGIC, HAS_TIMES if has_times else 0, len(fen), len(moves)) + fen + moves.tobytes()
+        if has_times:
+            data += times.tobytes()
+        return data
+
+    @classmethod
+    def from_bytes(cls, data, keyframe_interval=16):
+        magic, flags, fen_length, count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not a chess game record")
+        offset = HEADER.size
+        record = cls(data[offset:offset + fen_length].decode('ascii'), keyframe_interval)
+        offset += fen_length
+        moves = array('H', data[offset:offset + count * 2])
+        times = array('H', data[offset + count * 2:offset + count * 4]) if flags & HAS_TIMES else array('H')
+        if sys.byteorder == 'big':
+            moves.byteswap()
+            times.byteswap()
+        for index, move in enumerate(moves):
+            record.append(move, times[index] / 100 if times else None)
+        return record
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path, keyframe_interval=16):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read(), keyframe_interval)
@@ -1,17 +1,41 @@
 import sys
-from chess_kivy import ChessKivy
-from chess_cli import ChessCLI
 
 def main():
-    if len(sys.argv) < 2 or sys.argv[1] not in ['cli', 'gui']:
-        print("Usage: python main.py [cli|gui]")
+    if len(sys.argv) < 2 or sys.argv[1] not in ['cli', 'gui', 'perft', 'selfplay', 'book', 'tablebase', 'server', 'uci', 'analyze', 'smp']:
+        print("Usage: python main.py [cli|gui|perft [depth]|selfplay [options]|book [sources]|tablebase [tables]|server [options]|uci|analyze [paths]|smp [options]]")
         return
 
     if sys.argv[1] == 'cli':
+        from chess_cli import ChessCLI
         game = ChessCLI()
         game.play()
+    elif sys.argv[1] == 'perft':
+        import perft
+        perft.main(sys.argv[2:])
+    elif sys.argv[1] == 'selfplay':
+        import selfplay
+        selfplay.main(sys.argv[2:])
+    elif sys.argv[1] == 'book':
+        import book
+        book.main(sys.argv[2:])
+    elif sys.argv[1] == 'tablebase':
+        import tablebase
+        tablebase.main(sys.argv[2:])
+    elif sys.argv[1] == 'server':
+        import server
+        server.main(sys.argv[2:])
+    elif sys.argv[1] == 'uci':
+        import uci
+        uci.main(sys.argv[2:])
+    elif sys.argv[1] == 'analyze':
+        import analyzer
+        analyzer.main(sys.argv[2:])
+    elif sys.argv[1] == 'smp':
+        import smp
+        smp.main(sys.argv[2:])
     else:
+        from chess_kivy import ChessKivy
         ChessKivy().run()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,387 @@
+from bitboard import (
+    WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, EMPTY, FULL,
+    WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE,
+    ZOBRIST_SIDE, iter_bits, square_name, parse_square,
+)
+
+# Moves are 16-bit ints: from square (6 bits), to square (6 bits) and a 4-bit flag.
+QUIET, DOUBLE_PUSH, KING_CASTLE, QUEEN_CASTLE, CAPTURE, EP_CAPTURE = 0, 1, 2, 3, 4, 5
+PROMOTION = 8
+PROMOTION_CAPTURE = 12
+PROMOTION_PIECES = 'nbrq'
+
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+RANK_1 = 0xFF
+RANK_3 = RANK_1 << 16
+RANK_6 = RANK_1 << 40
+RANK_8 = RANK_1 << 56
+
+
+def encode_move(from_sq, to_sq, flag=QUIET):
+    return from_sq | to_sq << 6 | flag << 12
+
+
+def move_from(move):
+    return move & 63
+
+
+def move_to(move):
+    return move >> 6 & 63
+
+
+def move_flag(move):
+    return move >> 12
+
+
+def is_capture_move(move):
+    return bool(move >> 12 & CAPTURE)
+
+
+def promotion_type(move):
+    """Return the piece type a move promotes to, or None."""
+    flag = move >> 12
+    return KNIGHT + (flag & 3) if flag & PROMOTION else None
+
+
+def move_to_uci(move):
+    """Return a move in long algebraic form, e.g. 'e2e4' or 'e7e8q'."""
+    text = square_name(move & 63) + square_name(move >> 6 & 63)
+    flag = move >> 12
+    if flag & PROMOTION:
+        text += PROMOTION_PIECES[flag & 3]
+    return text
+
+
+def parse_uci(pos, text):
+    """Return the legal move in pos matching a long algebraic string, or None."""
+    from_sq = parse_square(text[0:2])
+    to_sq = parse_square(text[2:4])
+    promotion = PROMOTION_PIECES.index(text[4].lower()) if len(text) > 4 else None
+    for move in generate_legal_moves(pos):
+        if move & 63 == from_sq and move >> 6 & 63 == to_sq:
+            flag = move >> 12
+            if not flag & PROMOTION or flag & 3 == promotion:
+                return move
+    return None
+
+
+def _step_attacks(offsets):
+    table = []
+    for sq in range(64):
+        row, col = sq >> 3, sq & 7
+        mask = 0
+        for d_row, d_col in offsets:
+            r, c = row + d_row, col + d_col
+            if 0 <= r < 8 and 0 <= c < 8:
+                mask |= 1 << (r * 8 + c)
+        table.append(mask)
+    return table
+
+
+KNIGHT_ATTACKS = _step_attacks([(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)])
+KING_ATTACKS = _step_attacks([(1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1)])
+PAWN_ATTACKS = [_step_attacks([(1, -1), (1, 1)]), _step_attacks([(-1, -1), (-1, 1)])]
+
+# Rays run from a square to the board edge. Positive directions grow the square index,
+# so the nearest blocker is the lowest set bit; for negative ones it is the highest.
+ROOK_DIRECTIONS = [((1, 0), True), ((0, 1), True), ((-1, 0), False), ((0, -1), False)]
+BISHOP_DIRECTIONS = [((1, 1), True), ((1, -1), True), ((-1, 1), False), ((-1, -1), False)]
+
+
+def _rays(d_row, d_col):
+    table = []
+    for sq in range(64):
+        r, c = (sq >> 3) + d_row, (sq & 7) + d_col
+        mask = 0
+        while 0 <= r < 8 and 0 <= c < 8:
+            mask |= 1 << (r * 8 + c)
+            r, c = r + d_row, c + d_col
+        table.append(mask)
+    return table
+
+
+ROOK_RAYS = [(_rays(*direction), positive) for direction, positive in ROOK_DIRECTIONS]
+BISHOP_RAYS = [(_rays(*direction), positive) for direction, positive in BISHOP_DIRECTIONS]
+
+
+def _between():
+    table = [[0] * 64 for _ in range(64)]
+    for rays in (ROOK_RAYS, BISHOP_RAYS):
+        for ray, positive in rays:
+            for sq in range(64):
+                for target in iter_bits(ray[sq]):
+                    table[sq][target] = ray[sq] ^ ray[target] ^ (1 << target)
+    return table
+
+
+# BETWEEN[a][b] holds the squares strictly between two aligned squares
+BETWEEN = _between()
+
+# Castling rights that survive a move touching each square
+CASTLING_MASK = [15] * 64
+CASTLING_MASK[4] = 15 ^ (WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASK[7] = 15 ^ WHITE_KINGSIDE
+CASTLING_MASK[0] = 15 ^ WHITE_QUEENSIDE
+CASTLING_MASK[60] = 15 ^ (BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_MASK[63] = 15 ^ BLACK_KINGSIDE
+CASTLING_MASK[56] = 15 ^ BLACK_QUEENSIDE
+
+
+def _slider_attacks(rays, sq, occupied):
+    attacks = 0
+    for ray, positive in rays:
+        mask = ray[sq]
+        blockers = mask & occupied
+        if blockers:
+            if positive:
+                blocker = (blockers & -blockers).bit_length() - 1
+            else:
+                blocker = blockers.bit_length() - 1
+            mask ^= ray[blocker]
+        attacks |= mask
+    return attacks
+
+
+def rook_attacks(sq, occupied):
+    return _slider_attacks(ROOK_RAYS, sq, occupied)
+
+
+def bishop_attacks(sq, occupied):
+    return _slider_attacks(BISHOP_RAYS, sq, occupied)
+
+
+def is_attacked(pos, sq, by, occupied=None, exclude=0):
+    """Return True if side `by` attacks sq, optionally with a different occupancy and pieces on exclude removed."""
+    pieces = pos.pieces
+    base = by * 6
+    keep = ~exclude
+    if occupied is None:
+        occupied = pos.occupied[0] | pos.occupied[1]
+    if PAWN_ATTACKS[by ^ 1][sq] & pieces[base + PAWN] & keep:
+        return True
+    if KNIGHT_ATTACKS[sq] & pieces[base + KNIGHT] & keep:
+        return True
+    if KING_ATTACKS[sq] & pieces[base + KING]:
+        return True
+    queens = pieces[base + QUEEN]
+    diagonal = (pieces[base + BISHOP] | queens) & keep
+    if diagonal and bishop_attacks(sq, occupied) & diagonal:
+        return True
+    straight = (pieces[base + ROOK] | queens) & keep
+    if straight and rook_attacks(sq, occupied) & straight:
+        return True
+    return False
+
+
+def king_square(pos, side):
+    return pos.pieces[side * 6 + KING].bit_length() - 1
+
+
+def in_check(pos, side=None):
+    if side is None:
+        side = pos.side
+    return is_attacked(pos, king_square(pos, side), side ^ 1)
+
+
+def _add_targets(moves, from_sq, targets, enemy):
+    for to_sq in iter_bits(targets & enemy):
+        moves.append(from_sq | to_sq << 6 | CAPTURE << 12)
+    for to_sq in iter_bits(targets & ~enemy):
+        moves.append(from_sq | to_sq << 6)
+
+
+def _add_pawn_moves(moves, targets, offset, flag, promotion_rank):
+    for to_sq in iter_bits(targets & ~promotion_rank):
+        moves.append((to_sq - offset) | to_sq << 6 | flag << 12)
+    for to_sq in iter_bits(targets & promotion_rank):
+        base = (to_sq - offset) | to_sq << 6
+        promotion = PROMOTION | (flag & CAPTURE)
+        for piece in range(4):
+            moves.append(base | (promotion | piece) << 12)
+
+
+def generate_moves(pos):
+    """Return every pseudo-legal move for the side to move; the own king may be left in check."""
+    moves = []
+    us = pos.side
+    them = us ^ 1
+    pieces = pos.pieces
+    base = us * 6
+    own = pos.occupied[us]
+    enemy = pos.occupied[them]
+    occupied = own | enemy
+    empty = ~occupied & FULL
+
+    pawns = pieces[base + PAWN]
+    if us == WHITE:
+        single = (pawns << 8) & empty
+        double = ((single & RANK_3) << 8) & empty
+        _add_pawn_moves(moves, single, 8, QUIET, RANK_8)
+        _add_pawn_moves(moves, double, 16, DOUBLE_PUSH, 0)
+        _add_pawn_moves(moves, ((pawns & ~FILE_A) << 7) & enemy, 7, CAPTURE, RANK_8)
+        _add_pawn_moves(moves, ((pawns & ~FILE_H) << 9) & enemy, 9, CAPTURE, RANK_8)
+    else:
+        single = (pawns >> 8) & empty
+        double = ((single & RANK_6) >> 8) & empty
+        _add_pawn_moves(moves, single, -8, QUIET, RANK_1)
+        _add_pawn_moves(moves, double, -16, DOUBLE_PUSH, 0)
+        _add_pawn_moves(moves, ((pawns & ~FILE_H) >> 7) & enemy, -7, CAPTURE, RANK_1)
+        _add_pawn_moves(moves, ((pawns & ~FILE_A) >> 9) & enemy, -9, CAPTURE, RANK_1)
+    if pos.ep is not None:
+        for from_sq in iter_bits(PAWN_ATTACKS[them][pos.ep] & pawns):
+            moves.append(from_sq | pos.ep << 6 | EP_CAPTURE << 12)
+
+    not_own = ~own
+    for from_sq in iter_bits(pieces[base + KNIGHT]):
+        _add_targets(moves, from_sq, KNIGHT_ATTACKS[from_sq] & not_own, enemy)
+    for from_sq in iter_bits(pieces[base + BISHOP]):
+        _add_targets(moves, from_sq, bishop_attacks(from_sq, occupied) & not_own, enemy)
+    for from_sq in iter_bits(pieces[base + ROOK]):
+        _add_targets(moves, from_sq, rook_attacks(from_sq, occupied) & not_own, enemy)
+    for from_sq in iter_bits(pieces[base + QUEEN]):
+        targets = (rook_attacks(from_sq, occupied) | bishop_attacks(from_sq, occupied)) & not_own
+        _add_targets(moves, from_sq, targets, enemy)
+    king = pieces[base + KING].bit_length() - 1
+    _add_targets(moves, king, KING_ATTACKS[king] & not_own, enemy)
+
+    if pos.castling:
+        if us == WHITE:
+            kingside, queenside = WHITE_KINGSIDE, WHITE_QUEENSIDE
+        else:
+            kingside, queenside = BLACK_KINGSIDE, BLACK_QUEENSIDE
+        if pos.castling & (kingside | queenside) and not is_attacked(pos, king, them):
+            if pos.castling & kingside and not occupied & (0x60 << (king - 4)) and not is_attacked(pos, king + 1, them):
+                moves.append(king | (king + 2) << 6 | KING_CASTLE << 12)
+            if pos.castling & queenside and not occupied & (0x0E << (king - 4)) and not is_attacked(pos, king - 1, them):
+                moves.append(king | (king - 2) << 6 | QUEEN_CASTLE << 12)
+    return moves
+
+
+def _pinned(pos, king, us):
+    """Return a mask of our pieces pinned to the king by an enemy slider."""
+    pieces = pos.pieces
+    them = us ^ 1
+    own = pos.occupied[us]
+    occupied = own | pos.occupied[them]
+    queens = pieces[them * 6 + QUEEN]
+    pinned = 0
+    for attacks, sliders in ((rook_attacks, pieces[them * 6 + ROOK] | queens),
+                             (bishop_attacks, pieces[them * 6 + BISHOP] | queens)):
+        if not sliders:
+            continue
+        seen = attacks(king, occupied)
+        xray = seen ^ attacks(king, occupied ^ (seen & own))
+        for pinner in iter_bits(xray & sliders):
+            pinned |= BETWEEN[king][pinner] & own
+    return pinned
+
+
+def is_legal(pos, move, king=None):
+    """Return True if a pseudo-legal move does not leave the mover's king attacked."""
+    us = pos.side
+    from_sq = move & 63
+    to_sq = move >> 6 & 63
+    if king is None:
+        king = king_square(pos, us)
+    occupied = (pos.occupied[0] | pos.occupied[1]) ^ (1 << from_sq) | (1 << to_sq)
+    captured = 1 << to_sq
+    if move >> 12 == EP_CAPTURE:
+        captured = 1 << (to_sq - 8 if us == WHITE else to_sq + 8)
+        occupied ^= captured
+    if from_sq == king:
+        king = to_sq
+    return not is_attacked(pos, king, us ^ 1, occupied, captured)
+
+
+def generate_legal_moves(pos):
+    """Return every legal move for the side to move."""
+    us = pos.side
+    king = king_square(pos, us)
+    moves = generate_moves(pos)
+    if is_attacked(pos, king, us ^ 1):
+        return [move for move in moves if is_legal(pos, move, king)]
+    # Out of check only king moves, en passant and moves of pinned pieces can expose the king
+    risky = _pinned(pos, king, us) | (1 << king)
+    return [move for move in moves
+            if not (risky >> (move & 63) & 1 or move >> 12 == EP_CAPTURE) or is_legal(pos, move, king)]
+
+
+def make_move(pos, move):
+    """Play a legal move on pos in place, updating castling, en passant, clocks and side to move.
+
+    The captured piece and the previous state are packed into one int on pos.undo so
+    unmake_move can restore the position without copying it.
+    """
+    us = pos.side
+    from_sq = move & 63
+    to_sq = move >> 6 & 63
+    flag = move >> 12
+    piece = pos.mailbox[from_sq]
+    ep = 64 if pos.ep is None else pos.ep
+    state = pos.castling << 4 | ep << 8 | pos.halfmove << 15 | pos.key << 32
+    pos.halfmove += 1
+    if flag == EP_CAPTURE:
+        pos.remove(to_sq - 8 if us == WHITE else to_sq + 8)
+    captured = pos.move(from_sq, to_sq)
+    pos.undo.append(state | captured)
+    if captured != EMPTY or piece % 6 == PAWN:
+        pos.halfmove = 0
+    if flag & PROMOTION:
+        pos.remove(to_sq)
+        pos.put(us * 6 + KNIGHT + (flag & 3), to_sq)
+    elif flag == KING_CASTLE:
+        pos.move(to_sq + 1, to_sq - 1)
+    elif flag == QUEEN_CASTLE:
+        pos.move(to_sq - 2, to_sq + 1)
+    pos.set_ep((from_sq + to_sq) >> 1 if flag == DOUBLE_PUSH else None)
+    pos.set_castling(pos.castling & CASTLING_MASK[from_sq] & CASTLING_MASK[to_sq])
+    if us == BLACK:
+        pos.fullmove += 1
+    pos.side = us ^ 1
+    pos.key ^= ZOBRIST_SIDE
+
+
+def unmake_move(pos, move):
+    """Take back move, which must be the last move made on pos with make_move."""
+    state = pos.undo.pop()
+    us = pos.side ^ 1
+    from_sq = move & 63
+    to_sq = move >> 6 & 63
+    flag = move >> 12
+    pos.side = us
+    if flag & PROMOTION:
+        pos.remove(to_sq)
+        pos.put(us * 6 + PAWN, to_sq)
+    elif flag == KING_CASTLE:
+        pos.move(to_sq - 1, to_sq + 1)
+    elif flag == QUEEN_CASTLE:
+        pos.move(to_sq + 1, to_sq - 2)
+    pos.move(to_sq, from_sq)
+    captured = state & 15
+    if captured != EMPTY:
+        pos.put(captured, to_sq)
+    elif flag == EP_CAPTURE:
+        pos.put((us ^ 1) * 6 + PAWN, to_sq - 8 if us == WHITE else to_sq + 8)
+    if us == BLACK:
+        pos.fullmove -= 1
+    pos.castling = state >> 4 & 15
+    ep = state >> 8 & 127
+    pos.ep = None if ep == 64 else ep
+    pos.halfmove = state >> 15 & 0x1FFFF
+    pos.key = state >> 32
+
+
+def perft(pos, depth):
+    """Count the leaf nodes of the legal move tree to the given depth."""
+    if depth == 0:
+        return 1
+    moves = generate_legal_moves(pos)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        make_move(pos, move)
+        nodes += perft(pos, depth - 1)
+        unmake_move(pos, move)
+    return nodes
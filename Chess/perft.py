@@ -0,0 +1,48 @@
+import sys
+import time
+from bitboard import Position
+from movegen import perft
+
+# Standard perft reference positions with known node counts per depth, starting at depth 1
+REFERENCE_POSITIONS = [
+    ('Initial position', 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+     [20, 400, 8902, 197281, 4865609, 119060324]),
+    ('Kiwipete', 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+     [48, 2039, 97862, 4085603, 193690690]),
+    ('Position 3', '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+     [14, 191, 2812, 43238, 674624, 11030083]),
+    ('Position 4', 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+     [6, 264, 9467, 422333, 15833292]),
+    ('Position 5', 'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+     [44, 1486, 62379, 2103487, 89941194]),
+]
+
+
+def run(depth):
+    """Run perft on every reference position, print nodes per second and return True if all counts match."""
+    all_passed = True
+    total_nodes = 0
+    total_time = 0.0
+    for name, fen, expected in REFERENCE_POSITIONS:
+        target = min(depth, len(expected))
+        start = time.perf_counter()
+        nodes = perft(Position(fen), target)
+        elapsed = time.perf_counter() - start
+        passed = nodes == expected[target - 1]
+        all_passed = all_passed and passed
+        total_nodes += nodes
+        total_time += elapsed
+        status = 'ok' if passed else f'FAIL (expected {expected[target - 1]})'
+        print(f"{name:<18} depth {target}: {nodes:>10} nodes {elapsed:8.2f}s {nodes / max(elapsed, 1e-9):>12,.0f} nps  {status}")
+    print(f"Total: {total_nodes} nodes in {total_time:.2f}s, {total_nodes / max(total_time, 1e-9):,.0f} nps")
+    return all_passed
+
+
+def main(args=None):
+    args = sys.argv[1:] if args is None else args
+    depth = int(args[0]) if args else 3
+    if not run(depth):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import base64
+import json
+import os
+import sys
+import time
+from array import array
+from game_record import GameRecord
+
+SAVE_VERSION = 1
+
+
+def _pack(values):
+    # Little-endian 16-bit words, base64 encoded: two bytes per move inside the JSON snapshot
+    values = array('H', values)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return base64.b64encode(values.tobytes()).decode('ascii')
+
+
+def _unpack(text):
+    values = array('H', base64.b64decode(text))
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def _write_json(path, data):
+    """Write data to path atomically: a reader sees the old file or the new one, never half of each."""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+class SaveSlots:
+    """Numbered save slots: one JSON snapshot per slot plus a small index used to list them."""
+
+    def __init__(self, directory='saves'):
+        self.directory = directory
+        self.index_path = os.path.join(directory, 'index.json')
+
+    def slot_path(self, slot):
+        return os.path.join(self.directory, f"slot_{slot}.json")
+
+    def list(self):
+        """Return {slot: summary} read from the index alone."""
+        try:
+            with open(self.index_path, 'r') as f:
+                return {int(slot): summary for slot, summary in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+
+    def save(self, chess, slot=None, **extra):
+        """Snapshot the game in chess to a slot (a new one by default) and return the slot number.
+
+        The snapshot holds the current FEN, so loading needs no replay, plus the start FEN and the
+        compact move list so the game record survives. extra adds front-end fields such as timers.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        index = self.list()
+        if slot is None:
+            slot = max(index, default=0) + 1
+        record = chess.record
+        fen = chess.position.fen()
+        saved_at = time.time()
+        snapshot = {
+            'version': SAVE_VERSION,
+            'fen': fen,
+            'start_fen': record.start_fen,
+            'moves': _pack(record.moves),
+            'times': _pack(record.times),
+            'saved_at': saved_at,
+        }
+        snapshot.update(extra)
+        _write_json(self.slot_path(slot), snapshot)
+        index[slot] = {'fen': fen, 'turn': chess.turn, 'moves': len(record), 'saved_at': saved_at}
+        _write_json(self.index_path, index)
+        return slot
+
+    def load(self, slot):
+        """Return the snapshot in a slot with its 'record' rebuilt as a GameRecord."""
+        with open(self.slot_path(slot), 'r') as f:
+            snapshot = json.load(f)
+        if snapshot.get('version') != SAVE_VERSION:
+            raise ValueError(f"Unsupported save version {snapshot.get('version')} in slot {slot}")
+        snapshot['record'] = GameRecord.restore(snapshot['start_fen'], _unpack(snapshot['moves']),
+                                                _unpack(snapshot['times']), snapshot['fen'])
+        return snapshot
+
+    def delete(self, slot):
+        """Remove a slot from the index and delete its snapshot."""
+        index = self.list()
+        index.pop(slot, None)
+        _write_json(self.index_path, index)
+        try:
+            os.remove(self.slot_path(slot))
+        except FileNotFoundError:
+            pass
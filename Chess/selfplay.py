@@ -0,0 +1,164 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from multiprocessing import Pool
+from chess import Chess
+from engine import Search
+from bitboard import WHITE
+from movegen import move_to_uci, parse_uci
+
+DEFAULT_OPENINGS = [
+    'e2e4 e7e5',
+    'e2e4 c7c5',
+    'e2e4 e7e6',
+    'e2e4 c7c6',
+    'd2d4 d7d5',
+    'd2d4 g8f6 c2c4 e7e6',
+    'c2c4 e7e5',
+    'g1f3 d7d5',
+]
+
+
+class RandomAgent:
+    """Plays a uniformly random legal move."""
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.nodes = 0
+
+    def choose(self, chess):
+        return self.rng.choice(chess.generate_legal_moves())
+
+
+class EngineAgent:
+    """Plays the engine's best move within a per-move time limit or fixed depth."""
+
+    def __init__(self, time_limit=0.1, depth=None, hash_mb=16):
+        self.search = Search(time_limit=time_limit, hash_mb=hash_mb)
+        self.depth = depth
+        self.nodes = 0
+
+    def choose(self, chess):
+        time_limit = 0 if self.depth else None
+        move = self.search.search(chess.position, time_limit=time_limit, max_depth=self.depth, history=chess.key_history)
+        self.nodes = self.search.nodes
+        return move
+
+
+def make_agent(spec, movetime, seed):
+    """Build an agent from a spec such as 'random', 'engine' or 'engine:4' (fixed depth)."""
+    name, _, option = spec.partition(':')
+    if name == 'random':
+        return RandomAgent(seed)
+    if name == 'engine':
+        return EngineAgent(time_limit=movetime, depth=int(option) if option else None)
+    raise ValueError(f"Unknown agent: {spec}")
+
+
+def apply_opening(chess, opening):
+    """Set up an opening given as a FEN or as space-separated moves in long algebraic form."""
+    if '/' in opening:
+        chess.load_fen(opening)
+        return
+    for text in opening.split():
+        move = parse_uci(chess.position, text)
+        if move is None:
+            raise ValueError(f"Illegal opening move {text} in '{opening}'")
+        chess.make_move(move)
+
+
+def play_game(task):
+    """Play one game and return its result as a dict."""
+    index, white, black, opening, movetime, max_plies, seed = task
+    chess = Chess(log_file=None)
+    apply_opening(chess, opening)
+    first_ply = len(chess.move_stack)
+    agents = {WHITE: make_agent(white, movetime, seed), 1 - WHITE: make_agent(black, movetime, seed + 1)}
+    nodes = 0
+    search_time = 0.0
+    start = time.perf_counter()
+    while True:
+        winner = chess.check_winner()
+        if winner:
+            termination = 'checkmate'
+            break
+        if chess.check_draw():
+            termination = 'draw'
+            break
+        if len(chess.move_stack) - first_ply >= max_plies:
+            termination = 'max_plies'
+            break
+        agent = agents[chess.position.side]
+        move_start = time.perf_counter()
+        move = agent.choose(chess)
+        search_time += time.perf_counter() - move_start
+        nodes += agent.nodes
+        chess.make_move(move)
+    elapsed = time.perf_counter() - start
+    return {
+        'game': index,
+        'white': white,
+        'black': black,
+        'opening': opening,
+        'winner': winner,
+        'result': {'W': '1-0', 'B': '0-1'}.get(winner, '1/2-1/2'),
+        'termination': termination,
+        'plies': len(chess.move_stack) - first_ply,
+        'moves': [move_to_uci(move) for move in chess.move_stack],
+        'nodes': nodes,
+        'nps': int(nodes / search_time) if search_time > 0 else 0,
+        'seconds': round(elapsed, 3),
+    }
+
+
+def load_openings(path):
+    if path is None:
+        return DEFAULT_OPENINGS
+    with open(path, 'r') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+def run(games, workers, white, black, openings, movetime, max_plies, output, seed=0, swap_colors=True):
+    """Play games in a process pool and append one JSON line per finished game to output."""
+    tasks = []
+    for index in range(games):
+        game_white, game_black = white, black
+        if swap_colors and index % 2:
+            game_white, game_black = black, white
+        opening = openings[(index // 2 if swap_colors else index) % len(openings)]
+        tasks.append((index, game_white, game_black, opening, movetime, max_plies, seed + index * 2))
+    start = time.perf_counter()
+    scores = {'1-0': 0, '0-1': 0, '1/2-1/2': 0}
+    with open(output, 'a') as out, Pool(workers) as pool:
+        for result in pool.imap_unordered(play_game, tasks):
+            out.write(json.dumps(result) + '\n')
+            out.flush()
+            scores[result['result']] += 1
+            print(f"Game {result['game']}: {result['white']} vs {result['black']} {result['result']} "
+                  f"({result['termination']}, {result['plies']} plies, {result['nps']} nps)")
+    elapsed = time.perf_counter() - start
+    print(f"{games} games in {elapsed:.1f}s with {workers} workers "
+          f"({games / elapsed:.2f} games/s): +{scores['1-0']} ={scores['1/2-1/2']} -{scores['0-1']} (White's view)")
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='main.py selfplay', description='Play engine games headlessly in parallel.')
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--white', default='engine', help="'engine', 'engine:<depth>' or 'random'")
+    parser.add_argument('--black', default='engine', help="'engine', 'engine:<depth>' or 'random'")
+    parser.add_argument('--openings', help='File with one FEN or move list per line')
+    parser.add_argument('--movetime', type=float, default=0.1, help='Seconds per engine move')
+    parser.add_argument('--max-plies', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-swap', action='store_true', help='Keep the same agent on White every game')
+    parser.add_argument('--output', default='selfplay.jsonl')
+    options = parser.parse_args(sys.argv[1:] if args is None else args)
+    run(options.games, options.workers, options.white, options.black, load_openings(options.openings),
+        options.movetime, options.max_plies, options.output, options.seed, not options.no_swap)
+
+if __name__ == "__main__":
+    main()
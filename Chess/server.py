@@ -0,0 +1,252 @@
+import argparse
+import asyncio
+import os
+import re
+import sys
+import time
+from chess import Chess
+from game_log import GameLogger
+from game_record import GameRecord
+from bitboard import WHITE, QUEEN
+from movegen import parse_uci, move_to_uci, promotion_type
+
+
+class Game:
+    """One hosted game: its Chess state and log, the connected clients and who holds each colour."""
+
+    def __init__(self, game_id, chess):
+        self.id = game_id
+        self.chess = chess
+        self.clients = set()
+        self.seats = {'W': None, 'B': None}
+        self.result = None
+        self.last_active = time.monotonic()
+
+    def broadcast(self, line, exclude=None):
+        for client in self.clients:
+            if client is not exclude:
+                client.send(line)
+
+
+class Client:
+    def __init__(self, writer):
+        self.writer = writer
+        self.game = None
+        self.color = None
+
+    def send(self, line):
+        self.writer.write((line + '\n').encode())
+
+
+class GameServer:
+    """Hosts many games in one process over a TCP line protocol.
+
+    Commands, one per line: new, join <id>, leave, move <uci>, fen, moves, list, quit.
+    Replies start with 'ok' or 'error'. The other clients in a game are sent
+    'moved <id> <uci> <fen>', and everyone 'result <id> <result> <reason>' when it ends.
+    Each game logs to its own file, and games idle for idle_timeout seconds are saved as
+    game records in directory and dropped from memory until someone joins them again.
+    """
+
+    def __init__(self, directory='games', idle_timeout=300.0):
+        self.directory = directory
+        self.idle_timeout = idle_timeout
+        self.games = {}
+        os.makedirs(directory, exist_ok=True)
+        saved = [int(match.group(1)) for name in os.listdir(directory)
+                 for match in [re.fullmatch(r'game_(\d+)\.chr', name)] if match]
+        self.next_id = max(saved, default=0) + 1
+
+    def record_path(self, game_id):
+        return os.path.join(self.directory, f"game_{game_id}.chr")
+
+    def log_path(self, game_id):
+        return os.path.join(self.directory, f"game_{game_id}.log")
+
+    def _new_chess(self, game_id, resume):
+        # Buffered in-thread logger: hundreds of games should not mean hundreds of writer threads
+        chess = Chess(log_file=None)
+        chess.log_file = self.log_path(game_id)
+        chess.logger = GameLogger(chess.log_file, mode='a' if resume else 'w', background=False)
+        return chess
+
+    def create_game(self):
+        game_id = self.next_id
+        self.next_id += 1
+        chess = self._new_chess(game_id, resume=False)
+        chess.logger.write("Game started\n")
+        game = Game(game_id, chess)
+        self.games[game_id] = game
+        return game
+
+    def get_game(self, game_id):
+        """Return a hosted game, reloading it from disk if it was evicted, or None."""
+        game = self.games.get(game_id)
+        if game is None and os.path.exists(self.record_path(game_id)):
+            game = self._restore(game_id)
+        return game
+
+    def _restore(self, game_id):
+        record = GameRecord.load(self.record_path(game_id))
+        chess = self._new_chess(game_id, resume=True)
+        chess.load_fen(record.start_fen)
+        for move in record.moves:
+            chess.make_move(move)
+        chess.record = record
+        chess.turn = 'W' if chess.position.side == WHITE else 'B'
+        chess.turns_played = len(record)
+        chess.logger.write("Game resumed\n")
+        game = Game(game_id, chess)
+        game.result = self._result(chess)
+        self.games[game_id] = game
+        return game
+
+    def evict(self, game):
+        """Write a game's record to disk, close its log and drop it from memory."""
+        path = self.record_path(game.id)
+        game.chess.save_record(path + '.tmp')
+        os.replace(path + '.tmp', path)
+        game.chess.logger.write("Game evicted\n")
+        game.chess.close()
+        for client in game.clients:
+            client.game = None
+            client.color = None
+            client.send(f"evicted {game.id}")
+        del self.games[game.id]
+
+    async def evict_idle(self):
+        while True:
+            await asyncio.sleep(min(self.idle_timeout / 4, 30))
+            now = time.monotonic()
+            for game in list(self.games.values()):
+                if now - game.last_active > self.idle_timeout:
+                    self.evict(game)
+
+    def join(self, client, game):
+        self.leave(client)
+        client.game = game
+        client.color = next((color for color, holder in game.seats.items() if holder is None), '-')
+        if client.color != '-':
+            game.seats[client.color] = client
+        game.clients.add(client)
+        game.last_active = time.monotonic()
+        client.send(f"ok game {game.id} {client.color} {game.chess.position.fen()}")
+
+    def leave(self, client):
+        game = client.game
+        if game is None:
+            return
+        game.clients.discard(client)
+        if client.color in game.seats:
+            game.seats[client.color] = None
+        client.game = None
+        client.color = None
+
+    def _result(self, chess):
+        winner = chess.check_winner()
+        if winner:
+            return ('1-0' if winner == 'W' else '0-1'), 'checkmate'
+        if chess.check_draw():
+            return '1/2-1/2', 'draw'
+        return None
+
+    def play(self, client, text):
+        game = client.game
+        if game is None:
+            return client.send("error not in a game")
+        if game.result:
+            return client.send("error game over")
+        chess = game.chess
+        if client.color != chess.turn:
+            return client.send("error not your turn")
+        move = parse_uci(chess.position, text)
+        if move is None:
+            return client.send(f"error illegal move {text}")
+        chess.move_piece(*chess.move_to_squares(move), promotion_type(move) or QUEEN)
+        game.last_active = time.monotonic()
+        fen = chess.position.fen()
+        client.send(f"ok move {text} {fen}")
+        game.broadcast(f"moved {game.id} {text} {fen}", exclude=client)
+        game.result = self._result(chess)
+        if game.result:
+            chess.logger.write(f"Result: {game.result[0]} ({game.result[1]})\n")
+            game.broadcast(f"result {game.id} {game.result[0]} {game.result[1]}")
+        else:
+            chess.change_turn()
+
+    def handle_command(self, client, line):
+        """Run one protocol line for client; return False when the client quits."""
+        command, _, argument = line.strip().partition(' ')
+        argument = argument.strip()
+        game = client.game
+        if command == 'new':
+            self.join(client, self.create_game())
+        elif command == 'join':
+            game = self.get_game(int(argument)) if argument.isdigit() else None
+            if game is None:
+                client.send(f"error no game {argument}")
+            else:
+                self.join(client, game)
+        elif command == 'leave':
+            self.leave(client)
+            client.send("ok")
+        elif command == 'move':
+            self.play(client, argument)
+        elif command == 'fen':
+            client.send(f"ok fen {game.chess.position.fen()}" if game else "error not in a game")
+        elif command == 'moves':
+            if game is None:
+                client.send("error not in a game")
+            else:
+                client.send("ok moves " + ' '.join(move_to_uci(move) for move in game.chess.generate_legal_moves()))
+        elif command == 'list':
+            client.send("ok games " + ' '.join(str(game_id) for game_id in sorted(self.games)))
+        elif command == 'quit':
+            client.send("ok bye")
+            return False
+        elif command:
+            client.send(f"error unknown command {command}")
+        return True
+
+    async def handle_client(self, reader, writer):
+        client = Client(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line or not self.handle_command(client, line.decode(errors='replace')):
+                    break
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.leave(client)
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=5555):
+        server = await asyncio.start_server(self.handle_client, host, port)
+        evictor = asyncio.create_task(self.evict_idle())
+        print(f"Serving chess on {host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            evictor.cancel()
+            for game in list(self.games.values()):
+                self.evict(game)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='main.py server', description='Host many chess games over TCP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5555)
+    parser.add_argument('--directory', default='games', help='Where game logs and evicted games are kept')
+    parser.add_argument('--idle-timeout', type=float, default=300.0, help='Seconds before an idle game is saved to disk')
+    options = parser.parse_args(sys.argv[1:] if args is None else args)
+    server = GameServer(options.directory, options.idle_timeout)
+    try:
+        asyncio.run(server.serve(options.host, options.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
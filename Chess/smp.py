@@ -0,0 +1,164 @@
+import argparse
+import sys
+import time
+from multiprocessing import Process, Queue, RawValue
+from bitboard import Position
+from engine import Search, SearchTimeout
+from movegen import generate_legal_moves
+from transposition import SharedTranspositionTable
+
+# Middlegame positions for the speedup benchmark: quiet, open and tactical
+BENCH_POSITIONS = [
+    ('Initial position', 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'),
+    ('Italian', 'r1bqk2r/pppp1ppp/2n2n2/2b1p3/2B1P3/2NP1N2/PPP2PPP/R1BQK2R b KQkq - 0 5'),
+    ('Kiwipete', 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'),
+]
+
+
+class _WorkerSearch(Search):
+    """Search run inside a worker process, which also stops when the shared stop flag is raised."""
+
+    def __init__(self, stop_flag, **options):
+        super().__init__(**options)
+        self.stop_flag = stop_flag
+
+    def _tick(self):
+        Search._tick(self)
+        if self.nodes & 1023 == 0 and self.stop_flag.value:
+            raise SearchTimeout()
+
+
+def _worker(index, table_name, hash_mb, tasks, results, stop_flag):
+    table = SharedTranspositionTable(hash_mb, name=table_name)
+    search = _WorkerSearch(stop_flag, table=table)
+    search_id = None
+    if index == 0:
+        search.on_depth = lambda *info: results.put(('depth', search_id, index) + info)
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            search_id, fen, history, time_limit, max_depth = task
+            move = search.search(Position(fen), time_limit=time_limit, max_depth=max_depth, history=history)
+            results.put(('done', search_id, index, move, search.nodes, search.depth_times,
+                         search.tt.hits, search.tt.misses))
+    finally:
+        table.close()
+
+
+class LazySMP(Search):
+    """Lazy SMP: worker processes search the same root and share one transposition table in shared memory.
+
+    Worker 0 plays the move and keeps to the time limit; the helpers search the same position,
+    every other one a ply deeper, and only fill the table with results that let worker 0 cut
+    its own search short. Helpers are stopped as soon as worker 0 is done. Call close() when
+    finished with it so the workers exit and the shared block is freed.
+    """
+
+    def __init__(self, workers=4, time_limit=2.0, max_depth=64, hash_mb=16, book=None, tablebase=None,
+                 on_depth=None):
+        table = SharedTranspositionTable(hash_mb)
+        super().__init__(time_limit, max_depth, hash_mb, book, tablebase, on_depth, table=table)
+        self.workers = max(1, workers)
+        self.search_id = 0
+        self.stop_flag = RawValue('b', 0)
+        self.results = Queue()
+        self.tasks = [Queue() for _ in range(self.workers)]
+        self.processes = [Process(target=_worker, args=(index, table.name, hash_mb, self.tasks[index],
+                                                        self.results, self.stop_flag), daemon=True)
+                          for index in range(self.workers)]
+        for process in self.processes:
+            process.start()
+
+    def stop(self):
+        self.stopped = True
+        self.stop_flag.value = 1
+
+    def _search(self, pos, time_limit, max_depth, history):
+        time_limit = self.time_limit if time_limit is None else time_limit
+        max_depth = max_depth or self.max_depth
+        self.nodes = 0
+        self.depth_times = []
+        start = time.perf_counter()
+        if not generate_legal_moves(pos):
+            return None
+        move = self._lookup(pos)
+        if move:
+            self.elapsed = time.perf_counter() - start
+            return move
+        self.source = 'search'
+        self.search_id += 1
+        # Clear the flag the last search raised for its helpers, but keep a stop() that came
+        # before this point, or the workers would run an infinite search with nothing to stop them
+        self.stop_flag.value = 0
+        if self.stopped:
+            self.stop_flag.value = 1
+        fen = pos.fen()
+        history = list(history)
+        for index, tasks in enumerate(self.tasks):
+            if index == 0:
+                tasks.put((self.search_id, fen, history, time_limit, max_depth))
+            else:
+                tasks.put((self.search_id, fen, history, 0, max_depth + index % 2))
+        best_move = None
+        done = 0
+        while done < self.workers:
+            message = self.results.get()
+            kind, search_id, index = message[:3]
+            if search_id != self.search_id:
+                continue
+            if kind == 'depth':
+                self.depth_times.append(message[3:])
+                if self.on_depth is not None:
+                    self.on_depth(*message[3:])
+                continue
+            done += 1
+            self.nodes += message[4]
+            if index == 0:
+                best_move = message[3]
+                self.depth_times = message[5]
+                self.tt.hits, self.tt.misses = message[6:]
+                self.stop_flag.value = 1
+        self.elapsed = time.perf_counter() - start
+        return best_move
+
+    def close(self):
+        for tasks in self.tasks:
+            tasks.put(None)
+        for process in self.processes:
+            process.join()
+        self.tt.close()
+
+
+def bench(depth=4, worker_counts=(1, 2, 4, 8), hash_mb=16):
+    """Time a fixed-depth search of each benchmark position per worker count and print the speedup over one worker."""
+    baseline = None
+    for workers in worker_counts:
+        smp = LazySMP(workers, hash_mb=hash_mb)
+        total_time = 0.0
+        total_nodes = 0
+        try:
+            for name, fen in BENCH_POSITIONS:
+                smp.tt.clear()
+                smp.search(Position(fen), time_limit=0, max_depth=depth)
+                total_time += smp.elapsed
+                total_nodes += smp.nodes
+                print(f"{workers} workers  {name:<18} {smp.elapsed:8.2f}s {smp.nodes:>10} nodes  {smp.info()}")
+        finally:
+            smp.close()
+        baseline = baseline or total_time
+        print(f"{workers} workers: depth {depth} in {total_time:.2f}s, {total_nodes} nodes, "
+              f"{total_nodes / max(total_time, 1e-9):,.0f} nps, speedup {baseline / max(total_time, 1e-9):.2f}x")
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='main.py smp', description='Benchmark Lazy SMP search speedup.')
+    parser.add_argument('--depth', type=int, default=4, help='Fixed search depth per position')
+    parser.add_argument('--workers', default='1,2,4,8', help='Comma separated worker counts to compare')
+    parser.add_argument('--hash', type=int, default=16, help='Shared transposition table size in MB')
+    options = parser.parse_args(sys.argv[1:] if args is None else args)
+    bench(options.depth, [int(count) for count in options.workers.split(',')], options.hash)
+
+if __name__ == "__main__":
+    main()
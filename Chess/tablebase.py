@@ -0,0 +1,332 @@
+import argparse
+import itertools
+import mmap
+import os
+import sys
+import time
+from bitboard import WHITE, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, FEN_CHARS, iter_bits
+from evaluation import PIECE_VALUES
+from movegen import (
+    KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, rook_attacks, bishop_attacks,
+    generate_legal_moves, make_move, unmake_move, EP_CAPTURE,
+)
+
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tablebases')
+DEFAULT_TABLES = ['KQK', 'KRK', 'KPK']
+MAX_PIECES = 4
+WIN, DRAW, LOSS = 1, 0, -1
+
+# After the two kings, each side's pieces are listed strongest first, e.g. 'KQKR'
+PIECE_ORDER = [QUEEN, ROOK, BISHOP, KNIGHT, PAWN]
+LETTER_TYPES = {FEN_CHARS[kind]: kind for kind in range(6)}
+BACK_RANKS = 0xFF | 0xFF << 56
+ILLEGAL = 255
+
+
+def _attacks(piece, sq, occupied):
+    kind = piece % 6
+    if kind == PAWN:
+        return PAWN_ATTACKS[piece // 6][sq]
+    if kind == KNIGHT:
+        return KNIGHT_ATTACKS[sq]
+    if kind == BISHOP:
+        return bishop_attacks(sq, occupied)
+    if kind == ROOK:
+        return rook_attacks(sq, occupied)
+    if kind == QUEEN:
+        return rook_attacks(sq, occupied) | bishop_attacks(sq, occupied)
+    return KING_ATTACKS[sq]
+
+
+def _attacked(pieces, squares, target, by, occupied, skip=-1):
+    """Return True if a piece of colour by, other than pieces[skip], attacks target."""
+    for index, piece in enumerate(pieces):
+        if piece // 6 == by and index != skip and _attacks(piece, squares[index], occupied) >> target & 1:
+            return True
+    return False
+
+
+def _letters(pieces, color):
+    kinds = sorted((piece % 6 for piece in pieces if piece // 6 == color and piece % 6 != KING), key=PIECE_ORDER.index)
+    return 'K' + ''.join(FEN_CHARS[kind] for kind in kinds)
+
+
+def _material(letters):
+    return sum(PIECE_VALUES[LETTER_TYPES[letter]] for letter in letters[1:])
+
+
+def _sort_key(placed):
+    piece = placed[0]
+    if piece % 6 == KING:
+        return 0, piece // 6
+    return 1 + piece // 6, PIECE_ORDER.index(piece % 6)
+
+
+def _is_dead(pieces):
+    """Return True for material that cannot mate: bare kings or kings and a single minor piece."""
+    extras = [piece % 6 for piece in pieces if piece % 6 != KING]
+    return not extras or (len(extras) == 1 and extras[0] in (KNIGHT, BISHOP))
+
+
+def table_pieces(name):
+    """Return the piece indices of a table in index order: both kings, then White's and Black's pieces."""
+    white, black = name[1:].split('K')
+    return [KING, 6 + KING] + [LETTER_TYPES[letter] for letter in white] + [6 + LETTER_TYPES[letter] for letter in black]
+
+
+class Tablebase:
+    """Distance-to-mate tables for endings of up to four pieces, one memory-mapped file per material signature.
+
+    Each table holds one byte per (piece squares, side to move): 0 for a draw (or an impossible
+    position), otherwise 1 + the number of plies to mate. An odd distance means the side to move
+    mates, an even one that it is mated. Tables are generated in-process by retrograde analysis and
+    only cover positions without castling rights; the fifty-move rule is ignored.
+    """
+
+    def __init__(self, directory=DEFAULT_DIRECTORY):
+        self.directory = directory
+        self.tables = {}
+        self.files = []
+
+    def path(self, name):
+        return os.path.join(self.directory, f"{name}.tb")
+
+    def table(self, name, generate=False):
+        """Return the table for a canonical signature, mapping its file on first use, or None if missing."""
+        if name in self.tables:
+            return self.tables[name]
+        path = self.path(name)
+        if os.path.exists(path):
+            f = open(path, 'rb')
+            self.files.append(f)
+            self.tables[name] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        elif generate:
+            self.tables[name] = self.generate(name)
+        else:
+            return None
+        return self.tables[name]
+
+    def value(self, placement, side, generate=False):
+        """Return the table byte for a list of (piece, square) pairs, or None if its table is missing."""
+        pieces = [piece for piece, _ in placement]
+        if _is_dead(pieces):
+            return 0
+        white, black = _letters(pieces, WHITE), _letters(pieces, 1 - WHITE)
+        if (_material(white), white) < (_material(black), black):
+            # Tables are stored with the stronger side as White: mirror the board and swap colours
+            placement = [((piece + 6) % 12, sq ^ 56) for piece, sq in placement]
+            side ^= 1
+            white, black = black, white
+        table = self.table(white + black, generate)
+        if table is None:
+            return None
+        index = 0
+        for _, sq in sorted(placement, key=_sort_key):
+            index = index * 64 + sq
+        return table[index * 2 + side]
+
+    def probe(self, pos):
+        """Return (WIN, DRAW or LOSS, plies to mate) for the side to move in pos, or None if pos is not covered."""
+        occupied = pos.occupied[0] | pos.occupied[1]
+        if pos.castling or bin(occupied).count('1') > MAX_PIECES:
+            return None
+        if pos.ep is not None and any(move >> 12 == EP_CAPTURE for move in generate_legal_moves(pos)):
+            return None
+        value = self.value([(pos.mailbox[sq], sq) for sq in iter_bits(occupied)], pos.side)
+        if value is None:
+            return None
+        if value == 0:
+            return DRAW, 0
+        plies = value - 1
+        return (WIN if plies & 1 else LOSS), plies
+
+    def best_move(self, pos):
+        """Return the move that mates fastest, holds the draw, or resists longest; None if pos is not covered."""
+        if self.probe(pos) is None:
+            return None
+        best_move = None
+        best_rank = None
+        for move in generate_legal_moves(pos):
+            make_move(pos, move)
+            result = self.probe(pos)
+            unmake_move(pos, move)
+            if result is None:
+                return None
+            outcome, plies = result
+            rank = (-outcome, -plies if outcome == LOSS else plies)
+            if best_rank is None or rank > best_rank:
+                best_move, best_rank = move, rank
+        return best_move
+
+    def generate(self, name):
+        """Build the table for a signature such as 'KRK' by retrograde analysis, save it and return it.
+
+        Tables reached by captures and promotions are generated first when missing.
+        """
+        pieces = table_pieces(name)
+        count = len(pieces)
+        if count > MAX_PIECES:
+            raise ValueError(f"Tables are limited to {MAX_PIECES} pieces: {name}")
+        size = 2 * 64 ** count
+        strides = [2 * 64 ** (count - 1 - index) for index in range(count)]
+        values = bytearray(size)
+        # In-table moves not yet known to lose, or ILLEGAL for positions that cannot occur
+        remaining = bytearray([ILLEGAL]) * size
+        # Longest distance among the moves known to lose, and whether some move avoids losing
+        worst = bytearray(size)
+        escape = bytearray(size)
+        buckets = [[] for _ in range(256)]
+
+        for squares in itertools.product(range(64), repeat=count):
+            occupied = 0
+            for sq in squares:
+                occupied |= 1 << sq
+            if bin(occupied).count('1') < count:
+                continue
+            colors = [0, 0]
+            back_rank_pawn = False
+            for piece, sq in zip(pieces, squares):
+                colors[piece // 6] |= 1 << sq
+                if piece % 6 == PAWN and BACK_RANKS >> sq & 1:
+                    back_rank_pawn = True
+            if back_rank_pawn:
+                continue
+            base = 0
+            for sq in squares:
+                base = base * 64 + sq
+            for side in (0, 1):
+                them = side ^ 1
+                if _attacked(pieces, squares, squares[them], side, occupied):
+                    continue
+                index = base * 2 + side
+                in_table = exits = 0
+                best_win = None
+                for moved, piece in enumerate(pieces):
+                    if piece // 6 != side:
+                        continue
+                    from_sq = squares[moved]
+                    if piece % 6 == PAWN:
+                        step = 8 if side == WHITE else -8
+                        targets = PAWN_ATTACKS[side][from_sq] & colors[them]
+                        if not occupied >> (from_sq + step) & 1:
+                            targets |= 1 << (from_sq + step)
+                            start_rank = 1 if side == WHITE else 6
+                            if from_sq >> 3 == start_rank and not occupied >> (from_sq + 2 * step) & 1:
+                                targets |= 1 << (from_sq + 2 * step)
+                    else:
+                        targets = _attacks(piece, from_sq, occupied) & ~colors[side]
+                    for to_sq in iter_bits(targets):
+                        moved_squares = list(squares)
+                        moved_squares[moved] = to_sq
+                        after = occupied ^ (1 << from_sq) | (1 << to_sq)
+                        captured = squares.index(to_sq) if colors[them] >> to_sq & 1 else -1
+                        if _attacked(pieces, moved_squares, moved_squares[side], them, after, captured):
+                            continue
+                        promotes = piece % 6 == PAWN and BACK_RANKS >> to_sq & 1
+                        if captured < 0 and not promotes:
+                            in_table += 1
+                            continue
+                        placement = [(other, sq) for position, (other, sq) in enumerate(zip(pieces, moved_squares))
+                                     if position != captured]
+                        results = []
+                        if promotes:
+                            for kind in (QUEEN, ROOK, BISHOP, KNIGHT):
+                                placement[moved - (captured >= 0 and captured < moved)] = (side * 6 + kind, to_sq)
+                                results.append(self.value(placement, them, generate=True))
+                        else:
+                            results.append(self.value(placement, them, generate=True))
+                        for value in results:
+                            exits += 1
+                            if value == 0:
+                                escape[index] = 1
+                            elif (value - 1) & 1:
+                                worst[index] = max(worst[index], value - 1)
+                            else:
+                                escape[index] = 1
+                                if best_win is None or value < best_win:
+                                    best_win = value
+                remaining[index] = in_table
+                if not in_table and not exits:
+                    if _attacked(pieces, squares, squares[side], them, occupied):
+                        buckets[0].append(index)
+                    else:
+                        escape[index] = 1
+                elif best_win is not None:
+                    buckets[best_win].append(index)
+                elif not in_table and not escape[index]:
+                    buckets[worst[index] + 1].append(index)
+
+        for distance in range(255):
+            for index in buckets[distance]:
+                if values[index]:
+                    continue
+                values[index] = distance + 1
+                side = index & 1
+                mover = side ^ 1
+                squares = []
+                base = index >> 1
+                for _ in range(count):
+                    base, sq = divmod(base, 64)
+                    squares.append(sq)
+                squares.reverse()
+                occupied = 0
+                for sq in squares:
+                    occupied |= 1 << sq
+                for moved, piece in enumerate(pieces):
+                    if piece // 6 != mover:
+                        continue
+                    to_sq = squares[moved]
+                    if piece % 6 == PAWN:
+                        step = 8 if mover == WHITE else -8
+                        origins = 0
+                        if not BACK_RANKS >> (to_sq - step) & 1 and not occupied >> (to_sq - step) & 1:
+                            origins |= 1 << (to_sq - step)
+                            double_rank = 3 if mover == WHITE else 4
+                            if to_sq >> 3 == double_rank and not occupied >> (to_sq - 2 * step) & 1:
+                                origins |= 1 << (to_sq - 2 * step)
+                    else:
+                        origins = _attacks(piece, to_sq, occupied) & ~occupied
+                    for from_sq in iter_bits(origins):
+                        previous = index + (from_sq - to_sq) * strides[moved] + mover - side
+                        if values[previous] or remaining[previous] == ILLEGAL:
+                            continue
+                        if distance & 1 == 0:
+                            buckets[distance + 1].append(previous)
+                        else:
+                            remaining[previous] -= 1
+                            worst[previous] = max(worst[previous], distance)
+                            if not remaining[previous] and not escape[previous]:
+                                buckets[worst[previous] + 1].append(previous)
+            buckets[distance] = None
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(name)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(values)
+        os.replace(path + '.tmp', path)
+        return values
+
+    def close(self):
+        for table in self.tables.values():
+            if isinstance(table, mmap.mmap):
+                table.close()
+        for f in self.files:
+            f.close()
+        self.tables = {}
+        self.files = []
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='main.py tablebase', description='Generate endgame tables.')
+    parser.add_argument('tables', nargs='*', default=DEFAULT_TABLES, help="Signatures such as KQK or KRKN")
+    parser.add_argument('--directory', default=DEFAULT_DIRECTORY)
+    options = parser.parse_args(sys.argv[1:] if args is None else args)
+    tablebase = Tablebase(options.directory)
+    for name in options.tables:
+        start = time.perf_counter()
+        table = tablebase.table(name.upper(), generate=True)
+        wins = sum(1 for value in table if value & 1 == 0 and value)
+        print(f"{name.upper()}: {len(table)} positions, {wins} wins, {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+from array import array
+from multiprocessing import shared_memory
+
+EXACT, LOWER, UPPER = 1, 2, 3
+
+# Each slot is two 64-bit words: the Zobrist key XORed with the packed entry, and the entry.
+# A slot half written by another process then fails the key check instead of returning bad data
+ENTRY_SIZE = 16
+SCORE_OFFSET = 1 << 23
+
+
+class TranspositionTable:
+    """Fixed-size, always-replaceable hash table of search results keyed by Zobrist key."""
+
+    def __init__(self, memory_mb=16):
+        size = self.slots(memory_mb)
+        self.size = size
+        self.mask = size - 1
+        self.keys = array('Q', bytes(size * 8))
+        self.data = array('Q', bytes(size * 8))
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def slots(memory_mb):
+        """Largest power of two number of slots that fits in memory_mb."""
+        size = 1
+        while size * 2 * ENTRY_SIZE <= memory_mb * 1024 * 1024:
+            size *= 2
+        return size
+
+    @property
+    def memory(self):
+        """Bytes used by the table slots."""
+        return self.size * ENTRY_SIZE
+
+    @property
+    def hit_rate(self):
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+    def clear(self):
+        self.keys = array('Q', bytes(self.size * 8))
+        self.data = array('Q', bytes(self.size * 8))
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def new_search(self):
+        """Age the table so entries from earlier searches are replaced first, and reset the counters."""
+        self.generation = (self.generation + 1) & 0xFF
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, key):
+        """Return (move, depth, flag, score) stored for key, or None."""
+        index = key & self.mask
+        data = self.data[index]
+        if self.keys[index] ^ data != key:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data & 0xFFFF, data >> 16 & 0xFF, data >> 24 & 3, (data >> 26 & 0xFFFFFF) - SCORE_OFFSET
+
+    def store(self, key, move, depth, flag, score):
+        """Store a search result, keeping a deeper entry for another position from the current search."""
+        index = key & self.mask
+        old = self.data[index]
+        old_key = self.keys[index] ^ old
+        if old_key and old_key != key:
+            if old >> 50 == self.generation and old >> 16 & 0xFF > depth:
+                return
+        if not move and old_key == key:
+            move = old & 0xFFFF
+        data = (move | min(depth, 255) << 16 | flag << 24
+                | (score + SCORE_OFFSET) << 26 | self.generation << 50)
+        self.data[index] = data
+        self.keys[index] = key ^ data
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """Transposition table in a shared memory block, probed and stored into by several processes at once.
+
+    The process that creates the table owns the block and unlinks it on close; workers attach
+    to it by name. Hit counters and the generation stay per process.
+    """
+
+    def __init__(self, memory_mb=16, name=None):
+        size = self.slots(memory_mb)
+        self.size = size
+        self.mask = size - 1
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=size * ENTRY_SIZE)
+            self.shm.buf[:size * ENTRY_SIZE] = bytes(size * ENTRY_SIZE)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.keys = self.shm.buf[:size * 8].cast('Q')
+        self.data = self.shm.buf[size * 8:size * ENTRY_SIZE].cast('Q')
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def clear(self):
+        self.shm.buf[:self.size * ENTRY_SIZE] = bytes(self.size * ENTRY_SIZE)
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        self.keys.release()
+        self.data.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,200 @@
+import sys
+import threading
+from bitboard import Position, START_FEN, WHITE
+from book import open_book
+from engine import Search, MATE, MAX_PLY
+from smp import LazySMP
+from movegen import parse_uci, move_to_uci, make_move
+from tablebase import Tablebase
+
+ENGINE_NAME = 'Asrlex Chess'
+ENGINE_AUTHOR = 'Asrlex'
+
+
+class UCIEngine:
+    """UCI front end: reads commands line by line and searches on a worker thread, so stop is handled at once."""
+
+    def __init__(self, output=sys.stdout, hash_mb=16):
+        self.output = output
+        self.output_lock = threading.Lock()
+        self.hash_mb = hash_mb
+        self.own_book = False
+        self.threads = 1
+        self.search = self._new_search()
+        self.position = Position()
+        self.history = [self.position.key]
+        self.thread = None
+        # Set once bestmove may be sent; go infinite and go ponder hold it until stop or ponderhit
+        self.release = threading.Event()
+        self.ponder_time_limit = 0
+        self.timer = None
+
+    def _new_search(self):
+        options = dict(hash_mb=self.hash_mb, book=open_book() if self.own_book else None,
+                       tablebase=Tablebase(), on_depth=self.report)
+        if self.threads > 1:
+            return LazySMP(self.threads, **options)
+        return Search(**options)
+
+    def _replace_search(self):
+        if isinstance(self.search, LazySMP):
+            self.search.close()
+        self.search = self._new_search()
+
+    def send(self, line):
+        with self.output_lock:
+            self.output.write(line + '\n')
+            self.output.flush()
+
+    def run(self, lines=sys.stdin):
+        for line in lines:
+            if not self.handle(line):
+                break
+        self.stop()
+        if isinstance(self.search, LazySMP):
+            self.search.close()
+
+    def handle(self, line):
+        """Run one UCI command; return False on quit."""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, arguments = tokens[0], tokens[1:]
+        if command == 'uci':
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            self.send(f"option name Hash type spin default {self.hash_mb} min 1 max 1024")
+            self.send("option name OwnBook type check default false")
+            self.send("option name Threads type spin default 1 min 1 max 64")
+            self.send("option name Ponder type check default false")
+            self.send("uciok")
+        elif command == 'isready':
+            self.send("readyok")
+        elif command == 'setoption':
+            self.set_option(arguments)
+        elif command == 'ucinewgame':
+            self.stop()
+            self._replace_search()
+        elif command == 'position':
+            self.stop()
+            self.set_position(arguments)
+        elif command == 'go':
+            self.stop()
+            self.go(arguments)
+        elif command == 'stop':
+            self.stop()
+        elif command == 'ponderhit':
+            self.ponderhit()
+        elif command == 'quit':
+            return False
+        return True
+
+    def set_option(self, arguments):
+        text = ' '.join(arguments)
+        name, _, value = text.partition(' value ')
+        name = name.replace('name', '', 1).strip().lower()
+        self.stop()
+        if name == 'hash':
+            self.hash_mb = max(1, int(value))
+        elif name == 'ownbook':
+            self.own_book = value.strip().lower() == 'true'
+        elif name == 'threads':
+            self.threads = max(1, int(value))
+        else:
+            return
+        self._replace_search()
+
+    def set_position(self, arguments):
+        """Handle 'position startpos|fen <fen> [moves <move>...]'."""
+        if 'moves' in arguments:
+            split = arguments.index('moves')
+            setup, moves = arguments[:split], arguments[split + 1:]
+        else:
+            setup, moves = arguments, []
+        if setup and setup[0] == 'fen':
+            self.position = Position(' '.join(setup[1:]))
+        else:
+            self.position = Position(START_FEN)
+        self.history = [self.position.key]
+        for text in moves:
+            move = parse_uci(self.position, text)
+            if move is None:
+                break
+            make_move(self.position, move)
+            self.history.append(self.position.key)
+        self.position.undo.clear()
+
+    def go(self, arguments):
+        """Handle 'go' with depth, movetime, wtime/btime, winc/binc, movestogo, infinite or ponder.
+
+        UCI forbids bestmove before stop during infinite and ponder searches, so a search that
+        finishes early waits for the release. A ponder search runs untimed; the time control it
+        came with starts counting at ponderhit.
+        """
+        options = {}
+        for index, token in enumerate(arguments[:-1]):
+            if token in ('depth', 'movetime', 'wtime', 'btime', 'winc', 'binc', 'movestogo'):
+                options[token] = int(arguments[index + 1])
+        clock, increment = ('wtime', 'winc') if self.position.side == WHITE else ('btime', 'binc')
+        if 'movetime' in options:
+            time_limit = options['movetime'] / 1000
+        elif clock in options:
+            time_limit = Search.allocate_time(options[clock] / 1000, options.get(increment, 0) / 1000,
+                                              options.get('movestogo'))
+        else:
+            # depth-only and infinite searches run until they finish or are stopped
+            time_limit = 0
+        self.release.clear()
+        self.ponder_time_limit = 0
+        if 'ponder' in arguments:
+            self.ponder_time_limit, time_limit = time_limit, 0
+        elif 'infinite' not in arguments:
+            self.release.set()
+        self.thread = threading.Thread(target=self._search, args=(self.position.copy(), list(self.history),
+                                                                  time_limit, options.get('depth')), daemon=True)
+        self.thread.start()
+
+    def _search(self, pos, history, time_limit, depth):
+        move = self.search.search(pos, time_limit=time_limit, max_depth=depth, history=history)
+        self.release.wait()
+        self.send(f"bestmove {move_to_uci(move) if move else '0000'}")
+
+    def ponderhit(self):
+        """The expected move was played: allow bestmove and give the search the time its go asked for."""
+        if self.thread is None or self.release.is_set():
+            return
+        self.release.set()
+        if self.ponder_time_limit:
+            self.timer = threading.Timer(self.ponder_time_limit, self.search.stop)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def stop(self):
+        """Stop a running search and wait for its bestmove to be sent."""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        self.release.set()
+        if self.thread is not None:
+            if self.thread.is_alive():
+                self.search.stop()
+                self.thread.join()
+            self.search.stopped = False
+        self.thread = None
+
+    def report(self, depth, elapsed, nodes, score, move):
+        if abs(score) >= MATE - MAX_PLY:
+            plies = MATE - abs(score)
+            score_text = f"mate {(plies + 1) // 2 if score > 0 else -(plies // 2)}"
+        else:
+            score_text = f"cp {score}"
+        nps = int(nodes / elapsed) if elapsed > 0 else 0
+        self.send(f"info depth {depth} score {score_text} nodes {nodes} nps {nps} "
+                  f"time {int(elapsed * 1000)} pv {move_to_uci(move)}")
+
+
+def main(args=None):
+    UCIEngine().run()
+
+if __name__ == "__main__":
+    main()
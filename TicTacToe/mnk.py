@@ -0,0 +1,353 @@
+import argparse
+import sys
+import time
+
+EMPTY, X, O = 0, 1, 2
+SYMBOLS = '.XO'
+DIRECTIONS = [(0, 1), (1, 0), (1, 1), (1, -1)]
+MAX_SIZE = 19
+WIN_SCORE = 1000000
+# Candidate moves are empty squares within this many squares of a stone
+NEIGHBOURHOOD = 2
+
+
+class MNKBoard:
+    """An m x n board where the first player to get k in a row wins.
+
+    Every k-long window of squares keeps a count of the stones in it, packed into one code as
+    x + o * (k + 1). A move only touches the windows through its square, so win detection,
+    the evaluation and the sets of windows one stone short of a win are all updated in
+    O(k) per move instead of rescanning the board.
+    """
+
+    def __init__(self, rows=3, cols=3, k=3):
+        if not (1 <= rows <= MAX_SIZE and 1 <= cols <= MAX_SIZE):
+            raise ValueError(f"Board must be between 1x1 and {MAX_SIZE}x{MAX_SIZE}")
+        if not 2 <= k <= max(rows, cols):
+            raise ValueError(f"k must be between 2 and {max(rows, cols)}")
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        size = rows * cols
+        self.cells = [EMPTY] * size
+        self.windows = []
+        for row in range(rows):
+            for col in range(cols):
+                for d_row, d_col in DIRECTIONS:
+                    if 0 <= row + d_row * (k - 1) < rows and 0 <= col + d_col * (k - 1) < cols:
+                        self.windows.append([(row + d_row * i) * cols + col + d_col * i for i in range(k)])
+        self.square_windows = [[] for _ in range(size)]
+        for index, squares in enumerate(self.windows):
+            for square in squares:
+                self.square_windows[square].append(index)
+        self.neighbours = [[r * cols + c
+                            for r in range(max(0, row - NEIGHBOURHOOD), min(rows, row + NEIGHBOURHOOD + 1))
+                            for c in range(max(0, col - NEIGHBOURHOOD), min(cols, col + NEIGHBOURHOOD + 1))
+                            if (r, c) != (row, col)]
+                           for row in range(rows) for col in range(cols)]
+
+        base = k + 1
+        self.step = (0, 1, base)
+        self.full = (None, k, k * base)
+        # Window codes one stone short of k, and two short (the moves that make a threat), per player
+        self.short = (None, k - 1, (k - 1) * base)
+        self.building = (None, k - 2, (k - 2) * base) if k > 2 else (None, -1, -1)
+        # Window value from X's side: open windows are worth more the fuller they are
+        self.values = [0] * (base * base)
+        for x in range(base):
+            for o in range(base - x):
+                if not o:
+                    self.values[x + o * base] = 4 ** x - 1
+                elif not x:
+                    self.values[x + o * base] = 1 - 4 ** o
+        self.codes = [0] * len(self.windows)
+        self.threats = (None, set(), set())
+        self.near = [0] * size
+        self.score = 0
+        self.moves = []
+        self.winners = []
+        self.winner = EMPTY
+
+    @property
+    def turn(self):
+        return X if len(self.moves) % 2 == 0 else O
+
+    def is_full(self):
+        return len(self.moves) == len(self.cells)
+
+    def is_over(self):
+        return bool(self.winner) or self.is_full()
+
+    def square(self, row, col):
+        return row * self.cols + col
+
+    def play(self, square):
+        """Place the side to move's stone on an empty square and return the winner after it, if any."""
+        if self.winner or self.cells[square] != EMPTY:
+            raise ValueError(f"Illegal move {square}")
+        player = self.turn
+        self.cells[square] = player
+        self.moves.append(square)
+        self.winners.append(self.winner)
+        if self._update(square, self.step[player], self.full[player]):
+            self.winner = player
+        for neighbour in self.neighbours[square]:
+            self.near[neighbour] += 1
+        return self.winner
+
+    def undo(self):
+        square = self.moves.pop()
+        player = self.cells[square]
+        self.cells[square] = EMPTY
+        self.winner = self.winners.pop()
+        self._update(square, -self.step[player], None)
+        for neighbour in self.neighbours[square]:
+            self.near[neighbour] -= 1
+
+    def _update(self, square, step, full):
+        codes = self.codes
+        values = self.values
+        short_x, short_o = self.short[X], self.short[O]
+        threats_x, threats_o = self.threats[X], self.threats[O]
+        won = False
+        delta = 0
+        for window in self.square_windows[square]:
+            code = codes[window]
+            if code == short_x:
+                threats_x.discard(window)
+            elif code == short_o:
+                threats_o.discard(window)
+            new = code + step
+            codes[window] = new
+            delta += values[new] - values[code]
+            if new == full:
+                won = True
+            elif new == short_x:
+                threats_x.add(window)
+            elif new == short_o:
+                threats_o.add(window)
+        self.score += delta
+        return won
+
+    def evaluate(self):
+        """Static score for the side to move."""
+        return self.score if self.turn == X else -self.score
+
+    def winning_squares(self, player):
+        """Return the empty squares that would complete k in a row for player."""
+        cells = self.cells
+        return {square for window in self.threats[player] for square in self.windows[window] if not cells[square]}
+
+    def candidates(self):
+        cells = self.cells
+        near = self.near
+        moves = [square for square in range(len(cells)) if not cells[square] and near[square]]
+        return moves or [self.square(self.rows // 2, self.cols // 2)]
+
+    def gain(self, square, player):
+        """Change in evaluation, from player's side, of player taking square: building and blocking lines."""
+        codes = self.codes
+        values = self.values
+        step = self.step[player]
+        total = sum(values[codes[window] + step] - values[codes[window]] for window in self.square_windows[square])
+        return total if player == X else -total
+
+    def ordered_moves(self, player):
+        return sorted(self.candidates(), key=lambda square: self.gain(square, player), reverse=True)
+
+    def threat_moves(self, player):
+        """Return the empty squares that leave player one stone short of k in some window."""
+        building = self.building[player]
+        codes = self.codes
+        return {square for square in self.candidates()
+                if any(codes[window] == building for window in self.square_windows[square])}
+
+    def __str__(self):
+        header = '    ' + ' '.join(f"{col + 1:>2}" for col in range(self.cols))
+        rows = [f"{row + 1:>2}  " + ' '.join(f"{SYMBOLS[self.cells[row * self.cols + col]]:>2}" for col in range(self.cols))
+                for row in range(self.rows)]
+        return '\n'.join([header] + rows)
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class MNKSearch:
+    """Iterative-deepening alpha-beta for m,n,k games with threat-space pruning.
+
+    A side that can win at once does so; a side facing one winning square must block it and
+    a side facing two has lost, so those nodes are resolved without searching other moves.
+    Otherwise the width best candidates by gain are searched, and at the horizon only moves
+    that make a new threat are followed (the opponent's reply is forced) up to threat_depth.
+    """
+
+    def __init__(self, max_depth=9, time_limit=2.0, width=10, threat_depth=8):
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.width = width
+        self.threat_depth = threat_depth
+        self.nodes = 0
+        self.depth = 0
+        self.score = 0
+        self.deadline = None
+
+    def search(self, board):
+        """Return the best square for the side to move, or None if the game is over."""
+        if board.is_over():
+            return None
+        self.nodes = 0
+        self.deadline = time.perf_counter() + self.time_limit if self.time_limit else None
+        moves = self._moves(board, board.turn)
+        best_move = moves[0]
+        played = len(board.moves)
+        for depth in range(1, self.max_depth + 1):
+            try:
+                score, move = self._root(board, moves, depth, best_move)
+            except SearchTimeout:
+                # The timeout can unwind from any depth, so take back the moves it left on the board
+                while len(board.moves) > played:
+                    board.undo()
+                break
+            best_move, self.depth, self.score = move, depth, score
+            if abs(score) >= WIN_SCORE - len(board.cells) or len(board.moves) + depth >= len(board.cells):
+                break
+        return best_move
+
+    def _moves(self, board, player):
+        wins = board.winning_squares(player)
+        if wins:
+            return sorted(wins)
+        blocks = board.winning_squares(3 - player)
+        if blocks:
+            return sorted(blocks)
+        return board.ordered_moves(player)[:self.width]
+
+    def _root(self, board, moves, depth, previous_best):
+        alpha = -WIN_SCORE - 1
+        best_move = previous_best
+        ordered = [previous_best] + [move for move in moves if move != previous_best]
+        for move in ordered:
+            board.play(move)
+            score = -self._negamax(board, depth - 1, -WIN_SCORE - 1, -alpha, 1)
+            board.undo()
+            if score > alpha:
+                alpha = score
+                best_move = move
+        return alpha, best_move
+
+    def _tick(self):
+        self.nodes += 1
+        if self.nodes & 1023 == 0 and self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+    def _negamax(self, board, depth, alpha, beta, ply):
+        self._tick()
+        if board.winner:
+            return -(WIN_SCORE - ply)
+        if board.is_full():
+            return 0
+        player = board.turn
+        if board.threats[player]:
+            return WIN_SCORE - ply - 1
+        blocks = board.winning_squares(3 - player)
+        if len(blocks) > 1:
+            return -(WIN_SCORE - ply - 2)
+        if blocks:
+            # A forced block does not use up depth
+            moves = list(blocks)
+        elif depth <= 0:
+            return self._threat_search(board, alpha, beta, ply, self.threat_depth)
+        else:
+            moves = board.ordered_moves(player)[:self.width]
+            depth -= 1
+        best = -WIN_SCORE - 1
+        for move in moves:
+            board.play(move)
+            score = -self._negamax(board, depth, -beta, -alpha, ply + 1)
+            board.undo()
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best
+
+    def _threat_search(self, board, alpha, beta, ply, depth):
+        self._tick()
+        if board.winner:
+            return -(WIN_SCORE - ply)
+        if board.is_full():
+            return 0
+        player = board.turn
+        if board.threats[player]:
+            return WIN_SCORE - ply - 1
+        blocks = board.winning_squares(3 - player)
+        if len(blocks) > 1:
+            return -(WIN_SCORE - ply - 2)
+        stand_pat = board.evaluate()
+        if blocks:
+            if depth <= 0:
+                return stand_pat
+            board.play(blocks.pop())
+            score = -self._threat_search(board, -beta, -alpha, ply + 1, depth - 1)
+            board.undo()
+            return score
+        if stand_pat >= beta or depth <= 0:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+        for move in board.threat_moves(player):
+            board.play(move)
+            score = -self._threat_search(board, -beta, -alpha, ply + 1, depth - 1)
+            board.undo()
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+        return alpha
+
+
+def play_game(board, ai_player, search):
+    rows, cols = board.rows, board.cols
+    print(f"{rows}x{cols} board, {board.k} in a row wins. Enter moves as 'row column'.")
+    while not board.is_over():
+        print(board)
+        player = board.turn
+        if player == ai_player:
+            start = time.perf_counter()
+            square = search.search(board)
+            print(f"Computer plays {square // cols + 1} {square % cols + 1} "
+                  f"(depth {search.depth}, {search.nodes} nodes, {time.perf_counter() - start:.2f}s)")
+        else:
+            try:
+                row, col = map(int, input(f"Player {SYMBOLS[player]}, make your move: ").split())
+                square = board.square(row - 1, col - 1)
+                if not (0 < row <= rows and 0 < col <= cols) or board.cells[square] != EMPTY:
+                    raise ValueError
+            except ValueError:
+                print("Invalid move. Try again.")
+                continue
+        board.play(square)
+    print(board)
+    print(f"Player {SYMBOLS[board.winner]} wins!" if board.winner else "It's a tie!")
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Play k in a row on an m x n board.')
+    parser.add_argument('--rows', type=int, default=3)
+    parser.add_argument('--cols', type=int, default=3)
+    parser.add_argument('-k', type=int, default=3, help='Stones in a row needed to win')
+    parser.add_argument('--ai', choices=['X', 'O', 'none'], default='O', help='Side played by the computer')
+    parser.add_argument('--depth', type=int, default=9, help='Maximum search depth')
+    parser.add_argument('--time', type=float, default=2.0, help='Seconds per computer move')
+    parser.add_argument('--width', type=int, default=10, help='Candidate moves searched per node')
+    options = parser.parse_args(sys.argv[1:] if args is None else args)
+    ai_player = SYMBOLS.index(options.ai) if options.ai != 'none' else None
+    try:
+        board = MNKBoard(options.rows, options.cols, options.k)
+    except ValueError as error:
+        parser.error(str(error))
+    play_game(board, ai_player, MNKSearch(options.depth, options.time, options.width))
+
+if __name__ == '__main__':
+    main()
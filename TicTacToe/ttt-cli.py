@@ -1,7 +1,11 @@
-class TicTacToe():
+from ttt_bots import MinimaxBot
+from ttt_core import TicTacToe as TicTacToeCore
+
+class TicTacToe(TicTacToeCore):
     def __init__(self):
-        self.board = [' ']*9
-        self.current_winner = None
+        super().__init__()
+        self.ai_player = None
+        self.bot = MinimaxBot()
     
     def print_menu(self):
         print("Welcome to Tic Tac Toe!")
@@ -12,6 +16,9 @@ class TicTacToe():
         self.print_board_numbers()
         print("Player 1 is 'X' and Player 2 is 'O'.")
         print("Player 1 goes first.")
+        choice = input("Play against the computer? Enter X or O to play as that player, or press Enter for two players: ")
+        if choice.strip().upper() in ('X', 'O'):
+            self.ai_player = 'O' if choice.strip().upper() == 'X' else 'X'
         print("Good luck!")
 
     def print_board(self):
@@ -25,40 +32,17 @@ class TicTacToe():
             print('---------')
 
     def make_move(self, square, player):
-        if self.board[square-1] == ' ':
-            self.board[square-1] = player
-            return True
-        else:
-            return False
-        
-    def check_winner(self):
-        # Check rows
-        for i in range(0, 9, 3):
-            if self.board[i] == self.board[i+1] == self.board[i+2] != ' ':
-                self.current_winner = self.board[i]
-                return True
-        # Check columns
-        for i in range(3):
-            if self.board[i] == self.board[i+3] == self.board[i+6] != ' ':
-                self.current_winner = self.board[i]
-                return True
-        # Check diagonals
-        if self.board[0] == self.board[4] == self.board[8] != ' ':
-            self.current_winner = self.board[0]
-            return True
-        if self.board[2] == self.board[4] == self.board[6] != ' ':
-            self.current_winner = self.board[2]
-            return True
-        return False
-    
-    def check_tie(self):
-        return ' ' not in self.board
-    
+        return 1 <= square <= 9 and player == self.player and self.play(square-1)
+
     def play_game(self):
         self.print_menu()
-        player = 'X'
         while True:
-            square = int(input(f"Player {player}, make your move: "))
+            player = self.player
+            if player == self.ai_player:
+                square = self.bot.choose(self) + 1
+                print(f"Computer plays {square}")
+            else:
+                square = int(input(f"Player {player}, make your move: "))
             if self.make_move(square, player):
                 self.print_board()
                 if self.check_winner():
@@ -67,7 +51,6 @@ class TicTacToe():
                 if self.check_tie():
                     print("It's a tie!")
                     break
-                player = 'O' if player == 'X' else 'X'
             else:
                 print("Invalid move. Try again.")
         print("Game over.")
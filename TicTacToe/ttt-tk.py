@@ -1,14 +1,16 @@
 import tkinter as tk
 from tkinter import messagebox
 from PIL import Image, ImageTk
+from ttt_bots import MinimaxBot
+from ttt_core import TicTacToe as TicTacToeCore
 
 class TicTacToe:
     def __init__(self, root):
         self.root = root
         self.root.title("Tic Tac Toe")
-        self.board = [' ']*9
-        self.current_winner = None
-        self.player = 'X'
+        self.game = TicTacToeCore()
+        self.bot = MinimaxBot()
+        self.vs_computer = tk.BooleanVar(value=False)
         self.x_icon = ImageTk.PhotoImage(Image.open("./img/rec.png").resize((70, 70), Image.Resampling.LANCZOS))
         self.o_icon = ImageTk.PhotoImage(Image.open("./img/close.png").resize((80, 80), Image.Resampling.LANCZOS))
         self.buttons = []
@@ -24,53 +26,44 @@ class TicTacToe:
                             bg='white', relief='ridge', bd=5)
             button.grid(row=(i//3)+1, column=i%3, padx=5, pady=5)
             self.buttons.append(button)
+        tk.Checkbutton(self.root, text="Play against the computer (O)", variable=self.vs_computer,
+                       font=('Helvetica', 12), command=self.on_toggle_computer).grid(row=4, column=0, columnspan=3)
+
+    def on_toggle_computer(self):
+        if self.vs_computer.get() and self.game.player == 'O':
+            self.root.after(200, self.computer_move)
+
+    def computer_move(self):
+        if self.vs_computer.get() and self.game.player == 'O' and not self.game.is_over():
+            self.play(self.bot.choose(self.game))
 
     def on_click(self, index):
-        if self.board[index] == ' ':
-            self.board[index] = self.player
+        if self.vs_computer.get() and self.game.player == 'O':
+            return
+        self.play(index)
+
+    def play(self, index):
+        if self.game.play(index):
             self.update_button(index)
-            if self.check_winner():
-                messagebox.showinfo("Tic Tac Toe", f"Player {self.player} wins!")
+            if self.game.check_winner():
+                messagebox.showinfo("Tic Tac Toe", f"Player {self.game.current_winner} wins!")
                 self.reset_game()
-            elif self.check_tie():
+            elif self.game.check_tie():
                 messagebox.showinfo("Tic Tac Toe", "It's a tie!")
                 self.reset_game()
             else:
-                self.player = 'O' if self.player == 'X' else 'X'
-                self.scoreboard.config(text=f"Player {self.player}'s turn")
+                self.scoreboard.config(text=f"Player {self.game.player}'s turn")
+                if self.vs_computer.get() and self.game.player == 'O':
+                    self.root.after(200, self.computer_move)
 
     def update_button(self, index):
-        if self.board[index] == 'X':
+        if self.game.board[index] == 'X':
             self.buttons[index].config(image=self.x_icon, text='', compound='center', height=80, width=80)
-        elif self.board[index] == 'O':
+        elif self.game.board[index] == 'O':
             self.buttons[index].config(image=self.o_icon, text='', compound='center', height=80, width=80)
 
-    def check_winner(self):
-        # Check rows
-        for i in range(0, 9, 3):
-            if self.board[i] == self.board[i+1] == self.board[i+2] != ' ':
-                self.current_winner = self.board[i]
-                return True
-        # Check columns
-        for i in range(3):
-            if self.board[i] == self.board[i+3] == self.board[i+6] != ' ':
-                self.current_winner = self.board[i]
-                return True
-        # Check diagonals
-        if self.board[0] == self.board[4] == self.board[8] != ' ':
-            self.current_winner = self.board[0]
-            return True
-        if self.board[2] == self.board[4] == self.board[6] != ' ':
-            self.current_winner = self.board[2]
-            return True
-        return False
-
-    def check_tie(self):
-        return ' ' not in self.board
-
     def reset_game(self):
-        self.board = [' ']*9
-        self.player = 'X'
+        self.game = TicTacToeCore()
         self.scoreboard.config(text="Player X's turn")
         for button in self.buttons:
             button.config(image='', text='', height=2, width=5)
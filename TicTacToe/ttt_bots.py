@@ -0,0 +1,87 @@
+import math
+import random
+from ttt_core import wins
+from ttt_solver import CELL_VALUES, POWERS, best_move
+
+
+class RandomBot:
+    name = 'random'
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def choose(self, game):
+        return self.rng.choice(game.available_moves())
+
+
+class MinimaxBot:
+    """Perfect play from the solved minimax table in ttt_solver: one lookup per move."""
+    name = 'minimax'
+
+    def __init__(self, seed=None):
+        pass
+
+    def choose(self, game):
+        return best_move(game.code)
+
+
+class MCTSBot:
+    """Monte Carlo tree search with UCT selection and random playouts.
+
+    Statistics are kept per board code, so transpositions share them. Each node stores its
+    visits and the score of the player who moved into it (1 a win, 0.5 a draw).
+    """
+    name = 'mcts'
+
+    def __init__(self, seed=None, iterations=200, exploration=1.4):
+        self.rng = random.Random(seed)
+        self.iterations = iterations
+        self.exploration = exploration
+
+    def choose(self, game):
+        rng = self.rng
+        root = game.code
+        stats = {root: [0, 0.0]}
+        for _ in range(self.iterations):
+            board = game.board[:]
+            code = root
+            player = game.player
+            path = [(code, None)]
+            winner = None
+            empty = [square for square in range(9) if board[square] == ' ']
+            # Selection and expansion: follow UCT until a new node is added or the game ends
+            while empty:
+                children = [(code + CELL_VALUES[player] * POWERS[square], square) for square in empty]
+                unvisited = [child for child in children if child[0] not in stats]
+                if unvisited:
+                    code, square = rng.choice(unvisited)
+                    stats[code] = [0, 0.0]
+                else:
+                    log_visits = math.log(stats[code][0] or 1)
+                    code, square = max(children, key=lambda child: stats[child[0]][1] / stats[child[0]][0]
+                                       + self.exploration * math.sqrt(log_visits / stats[child[0]][0]))
+                board[square] = player
+                empty.remove(square)
+                path.append((code, player))
+                if wins(board, square):
+                    winner = player
+                    break
+                player = 'O' if player == 'X' else 'X'
+                if unvisited:
+                    break
+            # Playout
+            while winner is None and empty:
+                square = empty.pop(rng.randrange(len(empty)))
+                board[square] = player
+                if wins(board, square):
+                    winner = player
+                player = 'O' if player == 'X' else 'X'
+            for code, mover in path:
+                node = stats[code]
+                node[0] += 1
+                node[1] += 0.5 if winner is None else mover == winner
+        moves = game.available_moves()
+        return max(moves, key=lambda square: stats.get(root + CELL_VALUES[game.player] * POWERS[square], (0,))[0])
+
+
+BOTS = {bot.name: bot for bot in (RandomBot, MinimaxBot, MCTSBot)}
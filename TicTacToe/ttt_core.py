@@ -0,0 +1,50 @@
+from ttt_solver import CELL_VALUES, LINES, POWERS
+
+# The lines through each square: only these can be completed by a move there
+LINES_THROUGH = [[line for line in LINES if square in line] for square in range(9)]
+
+
+def wins(board, square):
+    """Return True if the piece on square completes a line on board."""
+    player = board[square]
+    return any(board[a] == board[b] == board[c] == player for a, b, c in LINES_THROUGH[square])
+
+
+class TicTacToe:
+    """TicTacToe rules with no user interface, shared by the front ends, the bots and the tournament runner.
+
+    Squares are numbered 0-8. X moves first and players alternate; the winner is checked only
+    along the lines through the last move, and the base-3 board code is kept for ttt_solver.
+    """
+
+    def __init__(self):
+        self.board = [' ']*9
+        self.current_winner = None
+        self.player = 'X'
+        self.code = 0
+        self.moves = []
+
+    def available_moves(self):
+        return [square for square in range(9) if self.board[square] == ' ']
+
+    def play(self, square):
+        """Place the current player's piece on an empty square and pass the turn; return False if it is taken."""
+        if self.current_winner or self.board[square] != ' ':
+            return False
+        player = self.player
+        self.board[square] = player
+        self.code += CELL_VALUES[player] * POWERS[square]
+        self.moves.append(square)
+        if wins(self.board, square):
+            self.current_winner = player
+        self.player = 'O' if player == 'X' else 'X'
+        return True
+
+    def check_winner(self):
+        return self.current_winner is not None
+
+    def check_tie(self):
+        return self.current_winner is None and len(self.moves) == 9
+
+    def is_over(self):
+        return self.current_winner is not None or len(self.moves) == 9
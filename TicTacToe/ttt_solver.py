@@ -0,0 +1,147 @@
+import os
+import sys
+
+# A board is encoded as a base-3 number: square i holds 0 (empty), 1 (X) or 2 (O) times 3**i
+CELL_VALUES = {' ': 0, 'X': 1, 'O': 2}
+POWERS = [3 ** i for i in range(9)]
+STATES = 3 ** 9
+LINES = [(0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6)]
+# The 8 symmetries of the board as square permutations: rotations, then their mirror images
+_ROTATE = [6, 3, 0, 7, 4, 1, 8, 5, 2]
+_MIRROR = [2, 1, 0, 5, 4, 3, 8, 7, 6]
+
+# Each table byte holds the best move in its low 4 bits and the outcome for the side to move + 1 above them
+NO_MOVE = 15
+WIN, DRAW, LOSS = 1, 0, -1
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ttt_table.bin')
+
+
+def _symmetries():
+    perms = [list(range(9))]
+    for _ in range(3):
+        perms.append([perms[-1][square] for square in _ROTATE])
+    return perms + [[perm[square] for square in _MIRROR] for perm in perms]
+
+
+SYMMETRIES = _symmetries()
+
+
+def encode(board):
+    """Return the code of a board given as a list of 9 ' ', 'X' or 'O' cells."""
+    return sum(CELL_VALUES[cell] * power for cell, power in zip(board, POWERS))
+
+
+def decode(code):
+    cells = []
+    for _ in range(9):
+        code, cell = divmod(code, 3)
+        cells.append(cell)
+    return cells
+
+
+def winner(cells):
+    """Return 1 or 2 for the player with three in a row in cells, else 0."""
+    for a, b, c in LINES:
+        if cells[a] and cells[a] == cells[b] == cells[c]:
+            return cells[a]
+    return 0
+
+
+def canonical(cells):
+    """Return the smallest code among the 8 symmetric images of cells."""
+    return min(sum(cells[perm[square]] * POWERS[square] for square in range(9)) for perm in SYMMETRIES)
+
+
+def solve():
+    """Solve every reachable position with memoized minimax and return the packed move table.
+
+    Scores are memoized per canonical position, so each of the 8 images of a position is
+    searched once; every reachable code then gets its own byte so a lookup is one index.
+    """
+    memo = {}
+
+    def score(cells, empty):
+        # Side to move's score: winning sooner and losing later score higher
+        key = canonical(cells)
+        if key in memo:
+            return memo[key]
+        if winner(cells):
+            result = -(1 + empty)
+        elif not empty:
+            result = 0
+        else:
+            player = 1 if empty % 2 else 2
+            result = -10
+            for square in range(9):
+                if not cells[square]:
+                    cells[square] = player
+                    result = max(result, -score(cells, empty - 1))
+                    cells[square] = 0
+        memo[key] = result
+        return result
+
+    table = bytearray([(DRAW + 1) << 4 | NO_MOVE]) * STATES
+    stack = [0]
+    seen = {0}
+    while stack:
+        code = stack.pop()
+        cells = decode(code)
+        empty = cells.count(0)
+        if winner(cells) or not empty:
+            continue
+        player = 1 if empty % 2 else 2
+        best_move, best = NO_MOVE, -10
+        for square in range(9):
+            if not cells[square]:
+                cells[square] = player
+                value = -score(cells, empty - 1)
+                cells[square] = 0
+                if value > best:
+                    best_move, best = square, value
+                child = code + player * POWERS[square]
+                if child not in seen:
+                    seen.add(child)
+                    stack.append(child)
+        outcome = WIN if best > 0 else LOSS if best < 0 else DRAW
+        table[code] = (outcome + 1) << 4 | best_move
+    return table
+
+
+def load(path=TABLE_PATH):
+    """Return the move table from its packed file, or solve it if the file is missing or stale."""
+    try:
+        with open(path, 'rb') as f:
+            table = bytearray(f.read())
+        if len(table) == STATES:
+            return table
+    except OSError:
+        pass
+    return solve()
+
+
+def save(table, path=TABLE_PATH):
+    with open(path + '.tmp', 'wb') as f:
+        f.write(table)
+    os.replace(path + '.tmp', path)
+
+
+TABLE = load()
+
+
+def best_move(code):
+    """Return the best square (0-8) for the side to move in the board with this code, or None when it is over."""
+    move = TABLE[code] & 15
+    return None if move == NO_MOVE else move
+
+
+def outcome(code):
+    """Return WIN, DRAW or LOSS for the side to move under perfect play."""
+    return (TABLE[code] >> 4) - 1
+
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else TABLE_PATH
+    table = solve()
+    save(table, path)
+    reachable = sum(1 for value in table if value & 15 != NO_MOVE)
+    print(f"Wrote {path}: {reachable} positions with a move, outcome from the empty board: {outcome(0)}")
@@ -0,0 +1,88 @@
+import argparse
+import itertools
+import os
+import sys
+import time
+from multiprocessing import Pool
+from ttt_bots import BOTS, MCTSBot
+from ttt_core import TicTacToe
+
+
+def play(x_bot, o_bot):
+    """Play one game and return 'X', 'O' or None for a draw."""
+    game = TicTacToe()
+    bots = {'X': x_bot, 'O': o_bot}
+    while not game.is_over():
+        game.play(bots[game.player].choose(game))
+    return game.current_winner
+
+
+def _make_bot(name, seed, mcts_iterations):
+    if name == MCTSBot.name:
+        return MCTSBot(seed, mcts_iterations)
+    return BOTS[name](seed)
+
+
+def _run_batch(task):
+    x_name, o_name, games, seed, mcts_iterations = task
+    x_bot = _make_bot(x_name, seed, mcts_iterations)
+    o_bot = _make_bot(o_name, seed + 1, mcts_iterations)
+    counts = {'X': 0, 'O': 0, None: 0}
+    for _ in range(games):
+        counts[play(x_bot, o_bot)] += 1
+    return x_name, o_name, counts
+
+
+def tournament(names, games=1000, workers=None, batch=2000, seed=0, mcts_iterations=200):
+    """Play games between every ordered pair of bots on a process pool; return {(x, o): counts} and the elapsed time."""
+    tasks = []
+    for x_name, o_name in itertools.product(names, repeat=2):
+        for start in range(0, games, batch):
+            tasks.append((x_name, o_name, min(batch, games - start), seed + len(tasks) * 2, mcts_iterations))
+    results = {pair: {'X': 0, 'O': 0, None: 0} for pair in itertools.product(names, repeat=2)}
+    start = time.perf_counter()
+    with Pool(workers) as pool:
+        for x_name, o_name, counts in pool.imap_unordered(_run_batch, tasks):
+            for outcome, count in counts.items():
+                results[x_name, o_name][outcome] += count
+    return results, time.perf_counter() - start
+
+
+def print_table(names, results):
+    """Print X wins / draws / O wins for each pairing, X bots down the side and O bots across the top."""
+    width = max(18, max(len(name) for name in names) + 2)
+    print('X \\ O'.ljust(10) + ''.join(name.rjust(width) for name in names))
+    for x_name in names:
+        cells = []
+        for o_name in names:
+            counts = results[x_name, o_name]
+            total = sum(counts.values()) or 1
+            cells.append(f"{counts['X'] / total:.0%}/{counts[None] / total:.0%}/{counts['O'] / total:.0%}".rjust(width))
+        print(x_name.ljust(10) + ''.join(cells))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Play TicTacToe bots against each other and report win/draw rates.')
+    parser.add_argument('--bots', default='random,minimax,mcts', help=f"Comma separated bots from {', '.join(BOTS)}")
+    parser.add_argument('--games', type=int, default=1000, help='Games per ordered pairing')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--batch', type=int, default=2000, help='Games per worker task')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--mcts-iterations', type=int, default=200)
+    options = parser.parse_args(sys.argv[1:] if args is None else args)
+    names = options.bots.split(',')
+    unknown = [name for name in names if name not in BOTS]
+    if unknown:
+        parser.error(f"unknown bots: {', '.join(unknown)}")
+    for option in ('games', 'workers', 'batch', 'mcts_iterations'):
+        if getattr(options, option) < 1:
+            parser.error(f"--{option.replace('_', '-')} must be at least 1")
+    results, elapsed = tournament(names, options.games, options.workers, options.batch, options.seed,
+                                  options.mcts_iterations)
+    total = sum(sum(counts.values()) for counts in results.values())
+    print_table(names, results)
+    print(f"{total} games in {elapsed:.2f}s ({total / elapsed if elapsed else 0:,.0f} games/s) "
+          f"on {options.workers} workers (X wins/draws/O wins)")
+
+if __name__ == '__main__':
+    main()